@@ -0,0 +1,199 @@
+import hashlib
+import marshal
+import os
+
+import tokenizer
+import parser
+from tokenizer import tokenize, LineIndex
+from parser import parse
+
+# Parsed programs are cached as marshalled ASTs, one file per source,
+# named by a hash of the source text and of the tokenizer and parser code.
+# The cache is only ever a shortcut: when its directory cannot be used, or
+# another run evicts an entry under us, the program is parsed as usual.
+
+default_directory = os.environ.get(
+    "TRIVIAL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "trivial")
+)
+default_limit = 64 * 1024 * 1024  # bytes kept before the oldest entries go
+
+
+def toolchain_version():
+    # any change to the tokenizer or parser invalidates every cached AST
+    digest = hashlib.sha256()
+    for module in [tokenizer, parser]:
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+# computed on first use, so runs that do not use the cache never read the code
+version = None
+
+
+def cache_path(source, directory):
+    global version
+    if version is None:
+        version = toolchain_version()
+    digest = hashlib.sha256(version.encode())
+    digest.update(source)
+    return os.path.join(directory, digest.hexdigest() + ".ast")
+
+
+def load_ast(source, directory=default_directory):
+    path = cache_path(source, directory)
+    try:
+        # marshal.load on a file object reads in small pieces; read it whole
+        with open(path, "rb") as f:
+            ast = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    # mark the entry as recently used
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return ast
+
+
+def store_ast(source, ast, directory=default_directory, limit=default_limit):
+    try:
+        data = marshal.dumps(ast)
+    except ValueError:
+        # marshal refuses very deeply nested trees; those are just not cached
+        return
+    # imported here, as runs that never store need none of it
+    import tempfile
+
+    temporary_path = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # write to a temporary file first so readers never see a partial entry
+        handle, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(handle, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, cache_path(source, directory))
+        temporary_path = None
+        evict(directory, limit)
+    except OSError:
+        # an unusable cache directory only costs the next run a parse
+        if temporary_path is not None:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+
+
+def evict(directory, limit):
+    # remove least recently used entries until the cache fits in the limit
+    entries = []
+    for name in os.listdir(directory):
+        if name.endswith(".ast"):
+            try:
+                status = os.stat(os.path.join(directory, name))
+            except FileNotFoundError:
+                # evicted by another run since listdir
+                continue
+            entries.append([status.st_mtime, status.st_size, name])
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in entries:
+        if total <= limit:
+            break
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def cached_parse(source, directory=default_directory, limit=default_limit, line_index=None):
+    """Return the AST for UTF-8 source bytes, tokenizing and parsing on a miss.
+    A line_index, when given, is filled on a miss so parse errors give lines."""
+    ast = load_ast(source, directory)
+    if ast is None:
+        ast = parse(tokenize(bytes(source).decode(), line_index=line_index), line_index)
+        store_ast(source, ast, directory, limit)
+    return ast
+
+
+def test_cached_parse():
+    print("testing cached_parse...")
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = b"x = 3; function f(y) { return y + 1 }; print f(x)"
+        assert load_ast(source, directory) is None
+        ast = cached_parse(source, directory)
+        assert ast == parse(tokenize(source.decode()))
+        assert load_ast(source, directory) == ast
+        assert load_ast(source + b"; print 4", directory) is None
+        # a hit is served from the cache without parsing
+        store_ast(source, {"tag": "program", "statements": []}, directory)
+        assert cached_parse(source, directory) == {"tag": "program", "statements": []}
+        # trees too deep for marshal are parsed every time
+        deep = b"x = " + b"[" * 5000 + b"]" * 5000
+        assert cached_parse(deep, directory)["tag"] == "program"
+        assert load_ast(deep, directory) is None
+        try:
+            cached_parse(b"x = 1;\ny = ", directory, line_index=LineIndex())
+            assert False, "the source is incomplete"
+        except Exception as e:
+            assert "line 2" in str(e), str(e)
+
+
+def test_unusable_directory():
+    print("testing an unusable cache directory...")
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        # a file where the cache directory should be
+        shadow = os.path.join(directory, "cache")
+        with open(shadow, "w") as f:
+            f.write("not a directory")
+        for path in [shadow, os.path.join(shadow, "trivial")]:
+            assert cached_parse(b"print 1", path) == parse(tokenize("print 1"))
+            assert load_ast(b"print 1", path) is None
+
+
+def test_corrupt_entry():
+    print("testing corrupt cache entries...")
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = b"print 1"
+        cached_parse(source, directory)
+        with open(cache_path(source, directory), "wb") as f:
+            f.write(b"\x00garbage")
+        assert load_ast(source, directory) is None
+        assert cached_parse(source, directory) == parse(tokenize("print 1"))
+
+
+def test_eviction():
+    print("testing cache eviction...")
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        sources = [f"print {i}".encode() for i in range(4)]
+        for i, source in enumerate(sources):
+            cached_parse(source, directory)
+            path = cache_path(source, directory)
+            os.utime(path, (1000 + i, 1000 + i))
+        size = os.path.getsize(cache_path(sources[0], directory))
+        # using the oldest entry makes the second oldest the one to go
+        load_ast(sources[0], directory)
+        evict(directory, 3 * size)
+        assert load_ast(sources[1], directory) is None
+        for source in [sources[0], sources[2], sources[3]]:
+            assert load_ast(source, directory) is not None
+        # an entry that disappears while evict looks, as when another run evicts it
+        os.symlink(os.path.join(directory, "gone"), os.path.join(directory, "gone.ast"))
+        evict(directory, 3 * size)
+
+
+if __name__ == "__main__":
+    test_cached_parse()
+    test_unusable_directory()
+    test_corrupt_entry()
+    test_eviction()
+    print("done.")
@@ -0,0 +1,546 @@
+import operator
+
+from tokenizer import tokenize
+from parser import parse
+from nodes import (
+    from_dict,
+    node_kinds,
+    NUMBER,
+    STRING,
+    IDENTIFIER,
+    LIST,
+    OBJECT,
+    NEGATE,
+    LOGICAL_NOT,
+    FUNCTION,
+    COMPLEX,
+    CALL,
+    ADD,
+    SUBTRACT,
+    MULTIPLY,
+    DIVIDE,
+    LESS,
+    GREATER,
+    LESS_EQUAL,
+    GREATER_EQUAL,
+    EQUAL,
+    NOT_EQUAL,
+    AND,
+    OR,
+    STATEMENT_LIST,
+    PROGRAM,
+    IF,
+    WHILE,
+    RETURN,
+    PRINT,
+    ASSIGN,
+    CHAIN,
+    CONSTANT,
+)
+
+# A second engine, with the semantics of evaluator.evaluate. The tree is
+# compiled once into nested closures, one per node, and running a program is
+# a call of the root closure with an environment.
+#
+# Expressions compile to closures that return a value. Statements compile to
+# closures that return (value, return_chain), as evaluate does, so a return
+# inside a while or if unwinds to the call that ran it.
+#
+# Variables live in cells, a list with a slot for each name, and names are
+# resolved to slots as they are compiled, so reading a variable is one
+# indexed load however deep the calls are. Scoping is dynamic, as it is for
+# evaluate: a name means what the nearest active call bound it to, so a
+# name has the same slot everywhere (shallow binding). A call saves the slots
+# of its parameters and of the names its body assigns, binds the parameters
+# and puts the saved values back when it returns.
+#
+# The environment given to run is the outermost scope. Assignments at the
+# top level write it as well as the cell, so it ends as evaluate leaves it,
+# and a name with an empty cell is looked up there, once per run. Cells are
+# emptied again when the run ends.
+#
+# Functions are still the function nodes, as evaluate has them. A function's
+# body is compiled the first time it is called and kept in a side table,
+# keyed by the node, until the run ends; the body of a lazily parsed
+# function is not parsed until then either.
+
+# statements return (value, return_chain); everything else returns a value
+statement_opcodes = {PRINT, IF, WHILE, STATEMENT_LIST, PROGRAM, RETURN, ASSIGN}
+
+# id(function node): (function node, parameter slots, frame slots, compiled body)
+bodies = {}
+
+# name: slot; slot: name; slot: value, or unset
+slots = {}
+names = []
+cells = []
+unset = object()
+
+# slots filled from the environment during the current run; a set, since
+# a call empties its frame's slots and the next call fills them again
+loaded = set()
+
+
+class Scope:
+    """The slots assigned by the code being compiled: a function body, or the
+    top level of a run."""
+
+    def __init__(self, top):
+        self.top = top
+        self.assigned = []
+
+    def assign(self, identifier):
+        slot = resolve(identifier)
+        if slot not in self.assigned:
+            self.assigned.append(slot)
+        return slot
+
+
+# the scope being compiled
+scope = None
+
+
+def resolve(identifier):
+    """The slot of a name, given one the first time the name is seen."""
+    slot = slots.get(identifier)
+    if slot is None:
+        slot = slots[identifier] = len(names)
+        names.append(identifier)
+        cells.append(unset)
+    return slot
+
+
+def run(ast, environment):
+    """Compiles a tree (dict or nodes) and runs it, as evaluate(ast, environment) would."""
+    global scope
+    if type(ast) is dict:
+        ast = from_dict(ast)
+    scope = Scope(top=True)
+    try:
+        statement = compile_statement(ast)
+    finally:
+        top, scope = scope, None
+    try:
+        return statement(environment)
+    finally:
+        for slot in loaded.union(top.assigned):
+            cells[slot] = unset
+        loaded.clear()
+        bodies.clear()
+
+
+def load(slot, environment):
+    # an empty cell: the name was not bound by this run, so it is the
+    # environment's, if anyone's
+    identifier = names[slot]
+    while identifier not in environment:
+        assert "$parent" in environment, f"Unknown identifier: '{identifier}'."
+        environment = environment["$parent"]
+    value = cells[slot] = environment[identifier]
+    loaded.add(slot)
+    return value
+
+
+def compile_expression(ast):
+    compiled = compilers[ast.opcode](ast)
+    if ast.opcode in statement_opcodes:
+        statement = compiled
+        return lambda environment: statement(environment)[0]
+    return compiled
+
+
+def compile_statement(ast):
+    compiled = compilers[ast.opcode](ast)
+    if ast.opcode not in statement_opcodes:
+        expression = compiled
+        return lambda environment: (expression(environment), False)
+    return compiled
+
+
+def compiled_body(function):
+    global scope
+    entry = bodies.get(id(function))
+    if entry is None or entry[0] is not function:
+        parameters = [resolve(parameter.value) for parameter in function.parameters]
+        body = function.body
+        outer, scope = scope, Scope(top=False)
+        try:
+            compiled = compile_statement(body)
+            frame = list(dict.fromkeys(parameters + scope.assigned))
+        finally:
+            scope = outer
+        entry = bodies[id(function)] = (function, parameters, frame, compiled)
+    return entry
+
+
+def compile_number(ast):
+    assert type(ast.value) in [
+        float,
+        int,
+    ], f"unexpected type {type(ast.value)}"
+    value = ast.value
+    return lambda environment: value
+
+
+def compile_string(ast):
+    assert type(ast.value) == str, f"unexpected type {type(ast.value)}"
+    value = ast.value
+    return lambda environment: value
+
+
+def compile_list(ast):
+    items = [compile_expression(item) for item in ast.items]
+    return lambda environment: [item(environment) for item in items]
+
+
+def compile_constant(ast):
+    # a new list or object on every evaluation, as the literal would give
+    return lambda environment: ast.copy()
+
+
+def compile_object(ast):
+    items = [(compile_expression(item.key), compile_expression(item.value)) for item in ast.items]
+
+    def run_object(environment):
+        object = {}
+        for key, value in items:
+            key = key(environment)
+            assert type(key) is str, "Object key must be a string"
+            object[key] = value(environment)
+        return object
+
+    return run_object
+
+
+def compile_identifier(ast):
+    slot = resolve(ast.value)
+    values = cells
+
+    def run_identifier(environment):
+        value = values[slot]
+        if value is unset:
+            value = load(slot, environment)
+        return value
+
+    return run_identifier
+
+
+def binary_compiler(operation):
+    def compile_binary(ast):
+        left = compile_expression(ast.left)
+        if ast.right.opcode in (NUMBER, STRING):
+            # the common `i + 1`, `i < 10`: keep the constant in the closure
+            right_value = ast.right.value
+            return lambda environment: operation(left(environment), right_value)
+        right = compile_expression(ast.right)
+        return lambda environment: operation(left(environment), right(environment))
+
+    return compile_binary
+
+
+def divide(left_value, right_value):
+    assert right_value != 0, "Division by zero"
+    return left_value / right_value
+
+
+def compile_negate(ast):
+    value = compile_expression(ast.value)
+    return lambda environment: -value(environment)
+
+
+def compile_chain(ast):
+    # all operands are computed, left to right, even for && and ||, as evaluate does
+    first, *rest = [compile_expression(operand) for operand in ast.operands]
+    operation = {"+": operator.add, "*": operator.mul, "&&": logical_and, "||": logical_or}[ast.operator]
+    if ast.operator == "+":
+
+        def run_chain(environment):
+            value = first(environment)
+            for operand in rest:
+                value = value + operand(environment)
+            return value
+
+    else:
+
+        def run_chain(environment):
+            value = first(environment)
+            for operand in rest:
+                value = operation(value, operand(environment))
+            return value
+
+    return run_chain
+
+
+def logical_and(left_value, right_value):
+    return left_value and right_value
+
+
+def logical_or(left_value, right_value):
+    return left_value or right_value
+
+
+def compile_logical_not(ast):
+    value = compile_expression(ast.value)
+    return lambda environment: not value(environment)
+
+
+def compile_print(ast):
+    if ast.value:
+        value = compile_expression(ast.value)
+
+        def run_print(environment):
+            result = value(environment)
+            print(result)
+            return str(result) + "\n", False
+
+        return run_print
+
+    def run_empty_print(environment):
+        print()
+        return "\n", False
+
+    return run_empty_print
+
+
+def compile_if(ast):
+    condition = compile_expression(ast.condition)
+    then = compile_statement(ast.then)
+    else_ = compile_statement(ast.else_) if "else" in ast else None
+
+    def run_if(environment):
+        if condition(environment):
+            value, return_chain = then(environment)
+            if return_chain:
+                return value, return_chain
+        elif else_ is not None:
+            value, return_chain = else_(environment)
+            if return_chain:
+                return value, return_chain
+        return None, False
+
+    return run_if
+
+
+def compile_while(ast):
+    condition = compile_expression(ast.condition)
+    do = compile_statement(ast.do)
+
+    def run_while(environment):
+        while condition(environment):
+            value, return_chain = do(environment)
+            if return_chain:
+                return value, return_chain
+        return None, False
+
+    return run_while
+
+
+def compile_statements(ast):
+    # statement lists and programs
+    statements = [compile_statement(statement) for statement in ast.statements]
+
+    def run_statements(environment):
+        for statement in statements:
+            value, return_chain = statement(environment)
+            if return_chain:
+                return value, return_chain
+        return value, return_chain
+
+    return run_statements
+
+
+def compile_function(ast):
+    return lambda environment: ast
+
+
+def compile_call(ast):
+    function = compile_expression(ast.function)
+    arguments = [compile_expression(argument) for argument in ast.arguments]
+    values = cells
+
+    def run_call(environment):
+        called = function(environment)
+        argument_values = [argument(environment) for argument in arguments]
+        _, parameters, frame, body = compiled_body(called)
+        saved = [values[slot] for slot in frame]
+        for slot, value in zip(parameters, argument_values):
+            values[slot] = value
+        try:
+            value, return_chain = body(environment)
+        finally:
+            for slot, saved_value in zip(frame, saved):
+                values[slot] = saved_value
+        if return_chain:
+            return value
+        return None
+
+    return run_call
+
+
+def compile_complex(ast):
+    base = compile_expression(ast.base)
+    index = compile_expression(ast.index)
+
+    def run_complex(environment):
+        print(ast)
+        base_value = base(environment)
+        index_value = index(environment)
+        if index_value == None:
+            return base_value
+        if type(index_value) in [int, float]:
+            assert int(index_value) == index_value
+            assert type(base_value) == list
+            assert len(base_value) > index_value
+            return base_value[index_value]
+        if type(index_value) == str:
+            assert type(base_value) == dict
+            return base_value[index_value]
+        assert False, f"Unknown index type [{index_value}]"
+
+    return run_complex
+
+
+def compile_assign(ast):
+    assert "target" in ast
+    target = ast.target
+    value = compile_expression(ast.value)
+    if target.opcode == IDENTIFIER:
+        identifier = target.value
+        slot = scope.assign(identifier)
+        values = cells
+        if scope.top:
+
+            def run_top_assign(environment):
+                environment[identifier] = values[slot] = value(environment)
+                return None, False
+
+            return run_top_assign
+
+        def run_assign(environment):
+            values[slot] = value(environment)
+            return None, False
+
+        return run_assign
+    assert target.opcode == COMPLEX, f"Unknown target type in assignment. {target}"
+    base = compile_expression(target.base)
+    index = compile_expression(target.index)
+
+    def run_index_assign(environment):
+        base_value = base(environment)
+        print(f"Target Base = {[base_value]}")
+        index_value = index(environment)
+        print(f"Target Index = {[index_value]}")
+        assert type(index_value) in [int, float, str], f"Unknown index type [{index_value}]"
+        if type(index_value) in [int, float]:
+            assert int(index_value) == index_value
+            assert type(base_value) == list
+            assert len(base_value) > index_value
+        if type(index_value) in [str]:
+            assert type(base_value) == dict
+        base_value[index_value] = value(environment)
+        return None, False
+
+    return run_index_assign
+
+
+def compile_return(ast):
+    if "value" in ast:
+        value = compile_expression(ast.value)
+        return lambda environment: (value(environment), True)
+    return lambda environment: (None, True)
+
+
+def compile_unknown(ast):
+    # evaluate fails only when it reaches the node, so the closure does too
+    def run_unknown(environment):
+        assert False, f"Unknown tag [{ast.tag}] in AST"
+
+    return run_unknown
+
+
+compilers = [compile_unknown] * len(node_kinds)
+compilers[NUMBER] = compile_number
+compilers[STRING] = compile_string
+compilers[IDENTIFIER] = compile_identifier
+compilers[LIST] = compile_list
+compilers[CONSTANT] = compile_constant
+compilers[OBJECT] = compile_object
+compilers[NEGATE] = compile_negate
+compilers[LOGICAL_NOT] = compile_logical_not
+compilers[FUNCTION] = compile_function
+compilers[COMPLEX] = compile_complex
+compilers[CALL] = compile_call
+compilers[ADD] = binary_compiler(operator.add)
+compilers[SUBTRACT] = binary_compiler(operator.sub)
+compilers[MULTIPLY] = binary_compiler(operator.mul)
+compilers[DIVIDE] = binary_compiler(divide)
+compilers[LESS] = binary_compiler(operator.lt)
+compilers[GREATER] = binary_compiler(operator.gt)
+compilers[LESS_EQUAL] = binary_compiler(operator.le)
+compilers[GREATER_EQUAL] = binary_compiler(operator.ge)
+compilers[EQUAL] = binary_compiler(operator.eq)
+compilers[NOT_EQUAL] = binary_compiler(operator.ne)
+compilers[AND] = binary_compiler(logical_and)
+compilers[OR] = binary_compiler(logical_or)
+compilers[CHAIN] = compile_chain
+compilers[STATEMENT_LIST] = compile_statements
+compilers[PROGRAM] = compile_statements
+compilers[IF] = compile_if
+compilers[WHILE] = compile_while
+compilers[RETURN] = compile_return
+compilers[PRINT] = compile_print
+compilers[ASSIGN] = compile_assign
+
+
+def test_run_cells():
+    print("test run cells")
+    # runs that share an environment, as the REPL and --stream do
+    environment = {}
+    for code in ["function f() { return y + 1 }", "y = 1", "x = f(); y = x"]:
+        run(parse(tokenize(code)), environment)
+    assert environment["x"] == 2 and environment["y"] == 2
+    assert all(cell is unset for cell in cells), "cells are emptied when a run ends"
+    # each call of f loads g from the environment again; loaded holds it once.
+    # The program is compiled here rather than by run, to look before run clears up
+    global scope
+    scope = Scope(top=True)
+    statement = compile_statement(from_dict(parse(tokenize("function f() { g = g + 1 }; i = 0; while (i < 100) { f(); i = i + 1 }"))))
+    top, scope = scope, None
+    statement({"g": 5})
+    assert loaded == {slots["g"]}
+    for slot in loaded.union(top.assigned):
+        cells[slot] = unset
+    loaded.clear()
+    try:
+        run(parse(tokenize("function h(y) { y = 5; return 1 / 0 }; h(4)")), environment)
+        assert False, "h divides by zero"
+    except AssertionError as e:
+        assert str(e).startswith("Division by zero"), str(e)
+    assert all(cell is unset for cell in cells)
+    run(parse(tokenize("x = f()")), environment)
+    assert environment["x"] == 3 and not bodies, "compiled bodies are dropped when a run ends"
+    # the same name has the same slot wherever it is compiled
+    assert resolve("y") == slots["y"] and names[slots["y"]] == "y"
+    try:
+        run(parse(tokenize("x = f()")), {"f": environment["f"]})
+        assert False, "y is not defined in this environment"
+    except AssertionError as e:
+        assert str(e).startswith("Unknown identifier: 'y'."), str(e)
+
+
+def test_run_lazy_functions():
+    print("test run lazy functions")
+    environment = {}
+    run(parse(tokenize("function f(a) { return a + 1 }; function g() { return 1 + }; x = f(1)"), lazy=True), environment)
+    assert environment["x"] == 2
+    try:
+        run(parse(tokenize("g()")), environment)
+        assert False, "g's body is not valid"
+    except AssertionError as e:
+        assert str(e).startswith("Unexpected token '}'"), str(e)
+
+
+if __name__ == "__main__":
+    test_run_cells()
+    test_run_lazy_functions()
+    print("done.")
@@ -1,221 +1,318 @@
+import operator
+
 from tokenizer import tokenize
 from parser import parse
+from nodes import (
+    from_dict,
+    node_kinds,
+    NUMBER,
+    STRING,
+    IDENTIFIER,
+    LIST,
+    OBJECT,
+    NEGATE,
+    LOGICAL_NOT,
+    FUNCTION,
+    COMPLEX,
+    CALL,
+    ADD,
+    SUBTRACT,
+    MULTIPLY,
+    DIVIDE,
+    LESS,
+    GREATER,
+    LESS_EQUAL,
+    GREATER_EQUAL,
+    EQUAL,
+    NOT_EQUAL,
+    AND,
+    OR,
+    STATEMENT_LIST,
+    PROGRAM,
+    IF,
+    WHILE,
+    RETURN,
+    PRINT,
+    ASSIGN,
+    CHAIN,
+    CONSTANT,
+)
 from pprint import pprint
 
 
+# Each kind of node has a handler, found by indexing handlers with the
+# node's opcode, so every kind costs the same to dispatch. Handlers take a
+# node and an environment and return (value, return_chain), as evaluate
+# does; they dispatch on their children directly.
+
+
 def evaluate(ast, environment):
-    if ast["tag"] == "number":
-        assert type(ast["value"]) in [
-            float,
-            int,
-        ], f"unexpected type {type(ast["value"])}"
-        return ast["value"], False
-    if ast["tag"] == "string":
-        assert type(ast["value"]) == str, f"unexpected type {type(ast["value"])}"
-        return ast["value"], False
-    if ast["tag"] == "list":
-        items = []
-        for item in ast["items"]:
-            result, _ = evaluate(item, environment)
-            items.append(result)
-        return items, False        
-    if ast["tag"] == "object":
-        object = {}
-        for item in ast["items"]:
-            key, _ = evaluate(item["key"], environment)
-            assert type(key) is str, "Object key must be a string"
-            value, _ = evaluate(item["value"], environment)
-            object[key] = value
-        return object, False        
-    if ast["tag"] == "identifier":
-        identifier = ast["value"]
-        if identifier in environment:
-            return environment[identifier], False
-        if "$parent" in environment:
-            return evaluate(ast, environment["$parent"])
-        assert False, f"Unknown identifier: '{identifier}'."
-    if ast["tag"] == "+":
-        left_value, _ = evaluate(ast["left"], environment)
-        right_value, _ = evaluate(ast["right"], environment)
-        return left_value + right_value, False
-    if ast["tag"] == "-":
-        left_value, _ = evaluate(ast["left"], environment)
-        right_value, _ = evaluate(ast["right"], environment)
-        return left_value - right_value, False
-    if ast["tag"] == "*":
-        left_value, _ = evaluate(ast["left"], environment)
-        right_value, _ = evaluate(ast["right"], environment)
-        return left_value * right_value, False
-    if ast["tag"] == "/":
-        left_value, _ = evaluate(ast["left"], environment)
-        right_value, _ = evaluate(ast["right"], environment)
-        assert right_value != 0, "Division by zero"
-        return left_value / right_value, False
-    if ast["tag"] == "negate":
-        value, _ = evaluate(ast["value"], environment)
-        return -value, False
-    if ast["tag"] == "&&":
-        left_value, _ = evaluate(ast["left"], environment)
-        right_value, _ = evaluate(ast["right"], environment)
-        return left_value and right_value, False
-    if ast["tag"] == "||":
-        left_value, _ = evaluate(ast["left"], environment)
-        right_value, _ = evaluate(ast["right"], environment)
-        return left_value or right_value, False
-    if ast["tag"] == "!":
-        value, _ = evaluate(ast["value"], environment)
-        return not value, False
-    if ast["tag"] == "<":
-        left_value, _ = evaluate(ast["left"], environment)
-        right_value, _ = evaluate(ast["right"], environment)
-        return left_value < right_value, False
-    if ast["tag"] == ">":
-        left_value, _ = evaluate(ast["left"], environment)
-        right_value, _ = evaluate(ast["right"], environment)
-        return left_value > right_value, False
-    if ast["tag"] == "<=":
-        left_value, _ = evaluate(ast["left"], environment)
-        right_value, _ = evaluate(ast["right"], environment)
-        return left_value <= right_value, False
-    if ast["tag"] == ">=":
-        left_value, _ = evaluate(ast["left"], environment)
-        right_value, _ = evaluate(ast["right"], environment)
-        return left_value >= right_value, False
-    if ast["tag"] == "==":
-        left_value, _ = evaluate(ast["left"], environment)
-        right_value, _ = evaluate(ast["right"], environment)
-        return left_value == right_value, False
-    if ast["tag"] == "!=":
-        left_value, _ = evaluate(ast["left"], environment)
-        right_value, _ = evaluate(ast["right"], environment)
-        return left_value != right_value, False
-
-    if ast["tag"] == "print":
-        if ast["value"]:
-            value, _ = evaluate(ast["value"], environment)
-            print(value)
-            return str(value) + "\n", False
-        else:
-            print()
-        return "\n", False
+    if type(ast) is dict:
+        # dict ASTs from the parser or the cache are converted once, at the root
+        ast = from_dict(ast)
+    return handlers[ast.opcode](ast, environment)
 
-    if ast["tag"] == "if":
-        condition, _ = evaluate(ast["condition"], environment)
-        if condition:
-            value, return_chain = evaluate(ast["then"], environment)
-            if return_chain:
-                return value, return_chain
+
+def evaluate_number(ast, environment):
+    assert type(ast.value) in [
+        float,
+        int,
+    ], f"unexpected type {type(ast.value)}"
+    return ast.value, False
+
+
+def evaluate_string(ast, environment):
+    assert type(ast.value) == str, f"unexpected type {type(ast.value)}"
+    return ast.value, False
+
+
+def evaluate_list(ast, environment):
+    items = []
+    for item in ast.items:
+        result, _ = handlers[item.opcode](item, environment)
+        items.append(result)
+    return items, False
+
+
+def evaluate_constant(ast, environment):
+    # a new list or object on every evaluation, as the literal would give
+    return ast.copy(), False
+
+
+def evaluate_object(ast, environment):
+    object = {}
+    for item in ast.items:
+        key, _ = handlers[item.key.opcode](item.key, environment)
+        assert type(key) is str, "Object key must be a string"
+        value, _ = handlers[item.value.opcode](item.value, environment)
+        object[key] = value
+    return object, False
+
+
+def evaluate_identifier(ast, environment):
+    identifier = ast.value
+    if identifier in environment:
+        return environment[identifier], False
+    if "$parent" in environment:
+        return evaluate_identifier(ast, environment["$parent"])
+    assert False, f"Unknown identifier: '{identifier}'."
+
+
+def binary_handler(operation):
+    def evaluate_binary(ast, environment):
+        left = ast.left
+        right = ast.right
+        left_value, _ = handlers[left.opcode](left, environment)
+        right_value, _ = handlers[right.opcode](right, environment)
+        return operation(left_value, right_value), False
+
+    return evaluate_binary
+
+
+def divide(left_value, right_value):
+    assert right_value != 0, "Division by zero"
+    return left_value / right_value
+
+
+def evaluate_negate(ast, environment):
+    value, _ = handlers[ast.value.opcode](ast.value, environment)
+    return -value, False
+
+
+def evaluate_chain(ast, environment):
+    # operands are computed left to right and combined as they come,
+    # just as the left-deep binary nodes the chain replaces would be
+    operator = ast.operator
+    operands = iter(ast.operands)
+    operand = next(operands)
+    value, _ = handlers[operand.opcode](operand, environment)
+    for operand in operands:
+        right_value, _ = handlers[operand.opcode](operand, environment)
+        if operator == "+":
+            value = value + right_value
+        elif operator == "*":
+            value = value * right_value
+        elif operator == "&&":
+            value = value and right_value
         else:
-            if "else" in ast:
-                value, return_chain = evaluate(ast["else"], environment)
-                if return_chain:
-                    return value, return_chain
-        return None, False
+            value = value or right_value
+    return value, False
 
-    if ast["tag"] == "while":
-        condition_value, return_chain = evaluate(ast["condition"], environment)
-        if return_chain:
-            return condition_value, return_chain
-        while condition_value:
-            value, return_chain = evaluate(ast["do"], environment)
-            if return_chain:
-                return value, return_chain
-            condition_value, return_chain = evaluate(ast["condition"], environment)
-            if return_chain:
-                return condition_value, return_chain
-        return None, False
 
-    if ast["tag"] == "statement_list":
-        for statement in ast["statements"]:
-            value, return_chain = evaluate(statement, environment)
-            if return_chain:
-                return value, return_chain
-        return value, return_chain
+def evaluate_logical_not(ast, environment):
+    value, _ = handlers[ast.value.opcode](ast.value, environment)
+    return not value, False
 
-    if ast["tag"] == "program":
-        for statement in ast["statements"]:
-            value, return_chain = evaluate(statement, environment)
+
+def evaluate_print(ast, environment):
+    if ast.value:
+        value, _ = handlers[ast.value.opcode](ast.value, environment)
+        print(value)
+        return str(value) + "\n", False
+    else:
+        print()
+    return "\n", False
+
+
+def evaluate_if(ast, environment):
+    condition, _ = handlers[ast.condition.opcode](ast.condition, environment)
+    if condition:
+        value, return_chain = handlers[ast.then.opcode](ast.then, environment)
+        if return_chain:
+            return value, return_chain
+    else:
+        if "else" in ast:
+            value, return_chain = handlers[ast.else_.opcode](ast.else_, environment)
             if return_chain:
                 return value, return_chain
-        return value, return_chain
+    return None, False
+
+
+def evaluate_while(ast, environment):
+    condition = ast.condition
+    condition_handler = handlers[condition.opcode]
+    do = ast.do
+    do_handler = handlers[do.opcode]
+    condition_value, return_chain = condition_handler(condition, environment)
+    if return_chain:
+        return condition_value, return_chain
+    while condition_value:
+        value, return_chain = do_handler(do, environment)
+        if return_chain:
+            return value, return_chain
+        condition_value, return_chain = condition_handler(condition, environment)
+        if return_chain:
+            return condition_value, return_chain
+    return None, False
 
-    if ast["tag"] == "function":
-        return ast, False
-
-    if ast["tag"] == "call":
-        function, _ = evaluate(ast["function"], environment)
-        local_environment = {}
-        argument_values = []
-        for argument in ast["arguments"]:
-            value, _ = evaluate(argument, environment)
-            argument_values.append(value)
-        parameter_identifiers = []
-        for parameter in function["parameters"]:
-            identifier = parameter["value"]
-            parameter_identifiers.append(identifier)
-        p = list(zip(parameter_identifiers, argument_values))
-        for identifier, value in p:
-            local_environment[identifier] = value
-        local_environment["$parent"] = environment
-        value, return_chain = evaluate(function["body"], local_environment)
+
+def evaluate_statements(ast, environment):
+    # statement lists and programs
+    for statement in ast.statements:
+        value, return_chain = handlers[statement.opcode](statement, environment)
         if return_chain:
-            return value, False
-        else:
-            return None, False
-
-    if ast["tag"] == "complex":
-        print(ast)
-        base, _ = evaluate(ast["base"], environment)
-        index, _ = evaluate(ast["index"], environment)
-        if index == None:
-            return base, False
+            return value, return_chain
+    return value, return_chain
+
+
+def evaluate_function(ast, environment):
+    return ast, False
+
+
+def evaluate_call(ast, environment):
+    function, _ = handlers[ast.function.opcode](ast.function, environment)
+    local_environment = {}
+    argument_values = []
+    for argument in ast.arguments:
+        value, _ = handlers[argument.opcode](argument, environment)
+        argument_values.append(value)
+    parameter_identifiers = []
+    for parameter in function.parameters:
+        identifier = parameter.value
+        parameter_identifiers.append(identifier)
+    p = list(zip(parameter_identifiers, argument_values))
+    for identifier, value in p:
+        local_environment[identifier] = value
+    local_environment["$parent"] = environment
+    body = function.body
+    value, return_chain = handlers[body.opcode](body, local_environment)
+    if return_chain:
+        return value, False
+    else:
+        return None, False
+
+
+def evaluate_complex(ast, environment):
+    print(ast)
+    base, _ = handlers[ast.base.opcode](ast.base, environment)
+    index, _ = handlers[ast.index.opcode](ast.index, environment)
+    if index == None:
+        return base, False
+    if type(index) in [int, float]:
+        assert int(index) == index
+        assert type(base) == list
+        assert len(base) > index
+        return base[index], False
+    if type(index) == str:
+        assert type(base) == dict
+        return base[index], False
+    assert False, f"Unknown index type [{index}]"
+
+
+def evaluate_assign(ast, environment):
+    assert "target" in ast
+    target = ast.target
+    if target.opcode == IDENTIFIER:
+        target_base = environment
+        target_index = target.value 
+    elif target.opcode == COMPLEX:
+        base, _ = handlers[target.base.opcode](target.base, environment)
+        print(f"Target Base = {[base]}")
+        index, _ = handlers[target.index.opcode](target.index, environment)
+        print(f"Target Index = {[index]}")
+        assert type(index) in [int, float, str], f"Unknown index type [{index}]"
         if type(index) in [int, float]:
             assert int(index) == index
             assert type(base) == list
             assert len(base) > index
-            return base[index], False
-        if type(index) == str:
+            target_base = base
+            target_index = index
+        if type(index) in [str]:
             assert type(base) == dict
-            return base[index], False
-        assert False, f"Unknown index type [{index}]"
-
-    if ast["tag"] == "assign":
-        assert "target" in ast
-        target = ast["target"]
-        if target["tag"] == "identifier":
-            target_base = environment
-            target_index = target["value"] 
-        elif target["tag"] == "complex":
-            base, _ = evaluate(target["base"], environment)
-            print(f"Target Base = {[base]}")
-            index, _ = evaluate(target["index"], environment)
-            print(f"Target Index = {[index]}")
-            assert type(index) in [int, float, str], f"Unknown index type [{index}]"
-            if type(index) in [int, float]:
-                assert int(index) == index
-                assert type(base) == list
-                assert len(base) > index
-                target_base = base
-                target_index = index
-            if type(index) in [str]:
-                assert type(base) == dict
-                target_base = base
-                target_index = index
-        else:
-            assert False, f"Unknown target type in assignment. {target}"
-        value, return_chain = evaluate(ast["value"], environment)
-        if return_chain:
-            return value, return_chain
-        target_base[target_index] = value
-        return None, False
-
-    if ast["tag"] == "return":
-        if "value" in ast:
-            value, return_chain = evaluate(ast["value"], environment)
-            return value, True
-        return None, True
-
-    assert False, f"Unknown tag [{ast['tag']}] in AST"
+            target_base = base
+            target_index = index
+    else:
+        assert False, f"Unknown target type in assignment. {target}"
+    value, return_chain = handlers[ast.value.opcode](ast.value, environment)
+    if return_chain:
+        return value, return_chain
+    target_base[target_index] = value
+    return None, False
+
+
+def evaluate_return(ast, environment):
+    if "value" in ast:
+        value, return_chain = handlers[ast.value.opcode](ast.value, environment)
+        return value, True
+    return None, True
+
+
+def evaluate_unknown(ast, environment):
+    assert False, f"Unknown tag [{ast.tag}] in AST"
+
+
+handlers = [evaluate_unknown] * len(node_kinds)
+handlers[NUMBER] = evaluate_number
+handlers[STRING] = evaluate_string
+handlers[IDENTIFIER] = evaluate_identifier
+handlers[LIST] = evaluate_list
+handlers[CONSTANT] = evaluate_constant
+handlers[OBJECT] = evaluate_object
+handlers[NEGATE] = evaluate_negate
+handlers[LOGICAL_NOT] = evaluate_logical_not
+handlers[FUNCTION] = evaluate_function
+handlers[COMPLEX] = evaluate_complex
+handlers[CALL] = evaluate_call
+handlers[ADD] = binary_handler(operator.add)
+handlers[SUBTRACT] = binary_handler(operator.sub)
+handlers[MULTIPLY] = binary_handler(operator.mul)
+handlers[DIVIDE] = binary_handler(divide)
+handlers[LESS] = binary_handler(operator.lt)
+handlers[GREATER] = binary_handler(operator.gt)
+handlers[LESS_EQUAL] = binary_handler(operator.le)
+handlers[GREATER_EQUAL] = binary_handler(operator.ge)
+handlers[EQUAL] = binary_handler(operator.eq)
+handlers[NOT_EQUAL] = binary_handler(operator.ne)
+handlers[AND] = binary_handler(lambda left_value, right_value: left_value and right_value)
+handlers[OR] = binary_handler(lambda left_value, right_value: left_value or right_value)
+handlers[CHAIN] = evaluate_chain
+handlers[STATEMENT_LIST] = evaluate_statements
+handlers[PROGRAM] = evaluate_statements
+handlers[IF] = evaluate_if
+handlers[WHILE] = evaluate_while
+handlers[RETURN] = evaluate_return
+handlers[PRINT] = evaluate_print
+handlers[ASSIGN] = evaluate_assign
 
 
 def equals(code, environment, expected_result, expected_environment=None):
@@ -516,6 +613,29 @@ def test_evaluate_complex_assignment():
     result, _ = evaluate(ast, environment)
     assert environment["x"]["b"] == 4
 
+def test_evaluate_chain():
+    print("test evaluate chain")
+    for code in ['1 + 2 * 3 * 4 + 5', '"a" + "b" + "c"', '0 || 0 || 3 && 4 && 5', '2 * (3 + 4 + 5) * 2']:
+        flat, _ = evaluate(parse(tokenize(code), flatten=True), {})
+        assert flat == evaluate(parse(tokenize(code)), {})[0], code
+    # a chain far longer than the recursion limit allows for binary nodes
+    code = "x = 0" + " + 1" * 100000
+    environment = {}
+    evaluate(parse(tokenize(code), flatten=True), environment)
+    assert environment["x"] == 100000
+
+def test_evaluate_constant():
+    print("test evaluate constant")
+    code = 'function f() { return [1, [2, 3], {"a": -4}] }; x = f(); x[1][0] = 9; y = f()'
+    environment = {}
+    evaluate(parse(tokenize(code), constants=True), environment)
+    assert environment["x"] == [1, [9, 3], {"a": -4}]
+    assert environment["y"] == [1, [2, 3], {"a": -4}]
+    code = 'x = ["a", 1.5]; y = x; y[0] = "b"'
+    environment = {}
+    evaluate(parse(tokenize(code), constants=True), environment)
+    assert environment["x"] == ["b", 1.5] and environment["x"] is environment["y"]
+
 if __name__ == "__main__":
     # statement_lists and programs are tested implicitly
     test_evaluate_single_value()
@@ -535,4 +655,6 @@ if __name__ == "__main__":
     test_evaluate_return_statement()
     test_evaluate_list_literal()
     test_evaluate_object_literal()
+    test_evaluate_chain()
+    test_evaluate_constant()
     print("done.")
@@ -0,0 +1,301 @@
+from tokenizer import tokenize, Token
+from parser import grammar, parameter_node
+import parser
+import grammar_tables
+import parser_generator
+
+# A table-driven parser for the grammar in parser.py, run from the tables
+# that parser_generator.py writes to grammar_tables.py. It builds the same
+# dict ASTs as parser.parse.
+#
+# The parser keeps a stack of what it still expects: tags, nonterminals
+# (their table rows) and reductions (the builders below). The tokens of a
+# rule, and the nodes of the rules inside it, collect on a value stack; when
+# the rule's reduction comes off the stack, its builder turns them into one
+# node. marks holds where each unfinished rule's values start. A rule such
+# as arithmetic_term is reduced once for each operator it matches, over the
+# node so far, the operator and the next operand; a lone operand is passed
+# up as it is.
+
+assert grammar_tables.grammar_hash == parser_generator.grammar_hash(
+    grammar
+), "grammar_tables.py is out of date; run `python parser_generator.py --write`"
+
+leaf_tags = {"identifier", "boolean", "number", "string"}
+
+
+def is_token(value, tag):
+    return type(value) is Token and value.tag == tag
+
+
+def build_simple_expression(values):
+    first = values[0]
+    if type(first) is not Token:
+        # a list, object or function literal
+        return first
+    if first.tag in leaf_tags:
+        return {"tag": first.tag, "value": first.value}
+    if first.tag == "-":
+        return {"tag": "negate", "value": values[1]}
+    if first.tag == "!":
+        return {"tag": "not", "value": values[1]}
+    # a parenthesized expression
+    return values[1]
+
+
+def build_list_literal(values):
+    return {"tag": "list", "items": values[1:-1:2]}
+
+
+def build_object_literal(values):
+    items = [{"key": values[i], "value": values[i + 2]} for i in range(1, len(values) - 1, 4)]
+    return {"tag": "object", "items": items}
+
+
+def build_function_literal(values):
+    return {"tag": "function", "parameters": [parameter_node(token) for token in values[2:-2:2]], "body": values[-1]}
+
+
+def build_complex_expression(values):
+    node = values[0]
+    i = 1
+    while i < len(values):
+        tag = values[i].tag
+        if tag == "[":
+            node = {"tag": "complex", "base": node, "index": values[i + 1]}
+            i += 3
+        elif tag == ".":
+            node = {"tag": "complex", "base": node, "index": {"tag": "string", "value": values[i + 1].value}}
+            i += 2
+        else:
+            arguments = []
+            i += 1
+            while not is_token(values[i], ")"):
+                if not is_token(values[i], ","):
+                    arguments.append(values[i])
+                i += 1
+            node = {"tag": "call", "function": node, "arguments": arguments}
+            i += 1
+    return node
+
+
+def build_binary_expression(values):
+    node = values[0]
+    for i in range(1, len(values), 2):
+        node = {"tag": values[i].tag, "left": node, "right": values[i + 1]}
+    return node
+
+
+def build_assignment_statement(values):
+    return {"tag": "assign", "target": values[0], "value": values[2]}
+
+
+def build_return_statement(values):
+    if len(values) == 1:
+        return {"tag": "return"}
+    return {"tag": "return", "value": values[1]}
+
+
+def build_print_statement(values):
+    return {"tag": "print", "value": values[1] if len(values) > 1 else None}
+
+
+def build_function_statement(values):
+    # syntactic sugar for identifier = function(...) {...}
+    function = {"tag": "function", "parameters": [parameter_node(token) for token in values[3:-2:2]], "body": values[-1]}
+    return {"tag": "assign", "target": {"tag": "identifier", "value": values[1].value}, "value": function}
+
+
+def build_if_statement(values):
+    node = {"tag": "if", "condition": values[2], "then": values[4]}
+    if len(values) > 5:
+        node["else"] = values[6]
+    return node
+
+
+def build_while_statement(values):
+    return {"tag": "while", "condition": values[2], "do": values[4]}
+
+
+def build_statement_list(values):
+    return {"tag": "statement_list", "statements": values[1:-1:2]}
+
+
+def build_program(values):
+    return {"tag": "program", "statements": values[::2]}
+
+
+# the builder of each rule that makes a node of its own
+builders = {
+    "simple_expression": build_simple_expression,
+    "list_literal": build_list_literal,
+    "object_literal": build_object_literal,
+    "function_literal": build_function_literal,
+    "complex_expression": build_complex_expression,
+    "arithmetic_term": build_binary_expression,
+    "arithmetic_expression": build_binary_expression,
+    "relational_expression": build_binary_expression,
+    "logical_term": build_binary_expression,
+    "logical_expression": build_binary_expression,
+    "assignment_statement": build_assignment_statement,
+    "return_statement": build_return_statement,
+    "print_statement": build_print_statement,
+    "function_statement": build_function_statement,
+    "if_statement": build_if_statement,
+    "while_statement": build_while_statement,
+    "statement_list": build_statement_list,
+    "program": build_program,
+}
+
+
+class Row(dict):
+    """The table row of a nonterminal: {tag: (symbols to push, marks, shift)}.
+    A nonterminal that can match nothing does so on any tag not in the row,
+    which leaves the error to be reported where the tag is really expected."""
+
+    __slots__ = ("default",)
+
+
+def link(tables):
+    """Turns the numbers in the generated rows into the rows and reductions
+    they stand for."""
+    for rule in tables.reducing:
+        assert rule in builders, f"No builder for rule [{rule}]"
+    reductions = [builders[rule] for rule in tables.reducing]
+    rows = [Row() for _ in tables.rows]
+
+    def entry(stack, marks, shift):
+        symbols = tuple(
+            rows[symbol] if type(symbol) is int and symbol >= 0 else reductions[-1 - symbol] if type(symbol) is int else symbol
+            for symbol in stack
+        )
+        return symbols, marks, reductions[-1 - shift] if type(shift) is int else shift
+
+    for row, generated, default in zip(rows, tables.rows, tables.defaults):
+        for tag, choice in generated.items():
+            if type(choice) is dict:
+                row[tag] = {second: entry(*production) for second, production in choice.items()}
+            else:
+                row[tag] = entry(*choice)
+        row.default = None if default is None else entry(*default)
+    return rows[tables.start]
+
+
+start_row = link(grammar_tables)
+
+
+def parse(tokens, line_index=None):
+    """Parses a program, as parser.parse does without its options."""
+    try:
+        return parse_tokens(tokens if type(tokens) is list else list(tokens))
+    except Exception as error:
+        if line_index is not None:
+            error.args = (line_index.describe_positions(str(error)),)
+        raise
+
+
+def parse_tokens(tokens):
+    stack = [start_row]
+    values = []
+    marks = []
+    index = 0
+    token = tokens[0]
+    tag = token.tag
+    while stack:
+        symbol = stack.pop()
+        kind = type(symbol)
+        if kind is Row:
+            choice = symbol.get(tag) or symbol.default
+            if choice is None:
+                assert False, f"Unexpected token '{tag}' at position {token.position}"
+            if type(choice) is dict:
+                # the tag starts more than one production; the next tag decides
+                choice = choice.get(tokens[index + 1].tag)
+                if choice is None:
+                    assert False, f"Unexpected token '{tokens[index + 1].tag}' at position {tokens[index + 1].position}"
+            pushed, count, shift = choice
+            stack.extend(pushed)
+            if count:
+                if count > 0:
+                    marks.extend([len(values)] * count)
+                else:
+                    marks.append(len(values) - 1)
+            if shift:
+                values.append(token if shift is True else shift([token]))
+                index += 1
+                token = tokens[index]
+                tag = token.tag
+        elif kind is not str:
+            start = marks.pop()
+            values[start:] = [symbol(values[start:])]
+        else:
+            # a tag
+            assert tag == symbol, f"Expected '{symbol}' at position {token.position}"
+            values.append(token)
+            index += 1
+            token = tokens[index]
+            tag = token.tag
+    assert tag is None, f"Expected end of input at position {token.position}, got [{token}]"
+    return values[0]
+
+
+def test_parse_matches_parser():
+    print("testing grammar parser matches parser")
+    for code in [
+        "",
+        "x = 1",
+        "print 1 + 2 * 3 - 4 / 5; print; return; return [1, (2 + 3)]",
+        'x = {"a": [1, -2.5, "s"], "b": {}}; y = []; z = x["a"][1](2)(3, (4 * 5))',
+        "function f(y) { if (y < 1) { return } else if (y > 2) { print !y } else { print -y } }",
+        "while (x[1] && f(x) || g()) { x = x * 2 / 3 - 1; y = (x == 1) != (x <= 2) }",
+        "f = function(a, b) { return a >= b }; f(1, 2); function g() {}",
+        "if (1) {} else {}",
+    ]:
+        assert parse(tokenize(code)) == parser.parse(tokenize(code)), code
+
+
+def test_parse_grammar_only():
+    print("testing grammar parser follows the grammar")
+    # the hand-written parser takes only simple expressions here
+    assert parse(tokenize("x = [1, 2 + 3]")) == parser.parse(tokenize("x = [1, (2 + 3)]"))
+    ast = parse(tokenize("x.abc"))
+    assert ast["statements"][0] == {
+        "tag": "complex",
+        "base": {"tag": "identifier", "value": "x"},
+        "index": {"tag": "string", "value": "abc"},
+    }
+    # "function" starts a function statement or an expression; the next token decides
+    ast = parse(tokenize("function(a) { return a }(1)"))
+    assert ast["statements"][0]["tag"] == "call"
+
+
+def test_parse_errors():
+    print("testing grammar parser errors")
+    for code, message in [
+        ("print 1;", "Unexpected token 'None' at position 8"),
+        ("x = (1", "Expected ')' at position 6"),
+        ("x = 1 2", "Expected end of input at position 6"),
+        ("function 1", "Unexpected token 'number' at position 9"),
+    ]:
+        try:
+            parse(tokenize(code))
+            assert False, f"{code} should not parse"
+        except AssertionError as e:
+            assert str(e).startswith(message), str(e)
+
+
+def test_parse_deep():
+    print("testing grammar parser on deep nesting")
+    depth = 20000
+    node = parse(tokenize("x = " + "[" * depth + "]" * depth))["statements"][0]["value"]
+    for _ in range(depth - 1):
+        node = node["items"][0]
+    assert node == {"tag": "list", "items": []}
+
+
+if __name__ == "__main__":
+    test_parse_matches_parser()
+    test_parse_grammar_only()
+    test_parse_errors()
+    test_parse_deep()
+    print("done.")
@@ -0,0 +1,1212 @@
+# Generated by parser_generator.py from the grammar in parser.py. Do not edit;
+# run `python parser_generator.py --write` after changing the grammar.
+
+grammar_hash = '84bea7e638e84d0b900edf5aef4116c6511ead22a8f61c4bb7605db44b2ec378'
+
+start = 48
+
+nonterminals = ['simple_expression',
+ 'list_literal',
+ 'list_literal.1',
+ 'list_literal.2',
+ 'object_literal',
+ 'object_literal.1',
+ 'object_literal.2',
+ 'function_literal',
+ 'function_literal.1',
+ 'function_literal.2',
+ 'complex_expression',
+ 'complex_expression.1',
+ 'complex_expression.2',
+ 'complex_expression.3',
+ 'complex_expression.4',
+ 'arithmetic_factor',
+ 'arithmetic_term',
+ 'arithmetic_term.1',
+ 'arithmetic_term.2',
+ 'arithmetic_expression',
+ 'arithmetic_expression.1',
+ 'arithmetic_expression.2',
+ 'relational_expression',
+ 'relational_expression.1',
+ 'relational_expression.2',
+ 'logical_factor',
+ 'logical_term',
+ 'logical_term.1',
+ 'logical_expression',
+ 'logical_expression.1',
+ 'expression',
+ 'assignment_statement',
+ 'assignment_statement.1',
+ 'return_statement',
+ 'return_statement.1',
+ 'print_statement',
+ 'print_statement.1',
+ 'function_statement',
+ 'function_statement.1',
+ 'function_statement.2',
+ 'if_statement',
+ 'if_statement.1',
+ 'if_statement.2',
+ 'while_statement',
+ 'statement_list',
+ 'statement_list.1',
+ 'statement_list.2',
+ 'statement',
+ 'program',
+ 'program.1',
+ 'program.2',
+ 'complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 '
+ 'logical_term.1 logical_expression.1 list_literal.2',
+ 'complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 '
+ 'logical_term.1 logical_expression.1',
+ 'complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 '
+ 'logical_term.1 logical_expression.1 complex_expression.4',
+ 'complex_expression.1 arithmetic_term.1',
+ 'complex_expression.1 arithmetic_term.1 arithmetic_expression.1',
+ 'complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1',
+ 'complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 '
+ 'logical_term.1',
+ 'complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 '
+ 'logical_term.1 logical_expression.1 assignment_statement.1',
+ 'complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 '
+ 'logical_term.1 logical_expression.1 assignment_statement.1 statement_list.2',
+ 'complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 '
+ 'logical_term.1 logical_expression.1 assignment_statement.1 program.2',
+ 'arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 '
+ 'logical_expression.1 list_literal.2',
+ 'arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 '
+ 'list_literal.2',
+ 'relational_expression.1 logical_term.1 logical_expression.1 list_literal.2',
+ 'logical_term.1 logical_expression.1 list_literal.2',
+ 'logical_expression.1 list_literal.2',
+ 'arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 '
+ 'logical_expression.1',
+ 'arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1',
+ 'relational_expression.1 logical_term.1 logical_expression.1',
+ 'logical_term.1 logical_expression.1',
+ 'arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 '
+ 'logical_expression.1 complex_expression.4',
+ 'arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 '
+ 'complex_expression.4',
+ 'relational_expression.1 logical_term.1 logical_expression.1 complex_expression.4',
+ 'logical_term.1 logical_expression.1 complex_expression.4',
+ 'logical_expression.1 complex_expression.4',
+ 'arithmetic_term.1 arithmetic_expression.1',
+ 'arithmetic_term.1 arithmetic_expression.1 relational_expression.1',
+ 'arithmetic_expression.1 relational_expression.1',
+ 'arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1',
+ 'arithmetic_expression.1 relational_expression.1 logical_term.1',
+ 'relational_expression.1 logical_term.1',
+ 'arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 '
+ 'logical_expression.1 assignment_statement.1',
+ 'arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 '
+ 'assignment_statement.1',
+ 'relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1',
+ 'logical_term.1 logical_expression.1 assignment_statement.1',
+ 'logical_expression.1 assignment_statement.1',
+ 'arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 '
+ 'logical_expression.1 assignment_statement.1 statement_list.2',
+ 'arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 '
+ 'assignment_statement.1 statement_list.2',
+ 'relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1 '
+ 'statement_list.2',
+ 'logical_term.1 logical_expression.1 assignment_statement.1 statement_list.2',
+ 'logical_expression.1 assignment_statement.1 statement_list.2',
+ 'arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 '
+ 'logical_expression.1 assignment_statement.1 program.2',
+ 'arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 '
+ 'assignment_statement.1 program.2',
+ 'relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1 program.2',
+ 'logical_term.1 logical_expression.1 assignment_statement.1 program.2',
+ 'logical_expression.1 assignment_statement.1 program.2']
+
+reducing = ['simple_expression',
+ 'list_literal',
+ 'object_literal',
+ 'function_literal',
+ 'complex_expression',
+ 'arithmetic_term',
+ 'arithmetic_expression',
+ 'relational_expression',
+ 'logical_term',
+ 'logical_expression',
+ 'assignment_statement',
+ 'return_statement',
+ 'print_statement',
+ 'function_statement',
+ 'if_statement',
+ 'while_statement',
+ 'statement_list',
+ 'program']
+
+defaults = [None,
+ None,
+ [(), 0, False],
+ [(), 0, False],
+ None,
+ [(), 0, False],
+ [(), 0, False],
+ None,
+ [(), 0, False],
+ [(), 0, False],
+ None,
+ [(), 0, False],
+ None,
+ [(), 0, False],
+ [(), 0, False],
+ None,
+ None,
+ [(), 0, False],
+ None,
+ None,
+ [(), 0, False],
+ None,
+ None,
+ [(), 0, False],
+ None,
+ None,
+ None,
+ [(), 0, False],
+ None,
+ [(), 0, False],
+ None,
+ None,
+ [(), 0, False],
+ None,
+ [(), 0, False],
+ None,
+ [(), 0, False],
+ None,
+ [(), 0, False],
+ [(), 0, False],
+ None,
+ [(), 0, False],
+ None,
+ None,
+ None,
+ [(), 0, False],
+ [(), 0, False],
+ None,
+ [(-18,), 1, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False],
+ [(), 0, False]]
+
+rows = [
+    # simple_expression
+    {
+        '!': [(-1, 0), 1, True],
+        '(': [(-1, ')', 30), 1, True],
+        '-': [(-1, 0), 1, True],
+        '[': [(-1, -2, ']', 2), 2, True],
+        'boolean': [(), 0, -1],
+        'function': [(-1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(), 0, -1],
+        'number': [(), 0, -1],
+        'string': [(), 0, -1],
+        '{': [(-1, -3, '}', 5), 2, True],
+    },
+    # list_literal
+    {
+        '[': [(-2, ']', 2), 1, True],
+    },
+    # list_literal.1
+    {
+        '!': [(51, -1, 0), 1, True],
+        '(': [(51, -1, ')', 30), 1, True],
+        '-': [(51, -1, 0), 1, True],
+        '[': [(51, -1, -2, ']', 2), 2, True],
+        'boolean': [(51,), 0, -1],
+        'function': [(51, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(51,), 0, -1],
+        'number': [(51,), 0, -1],
+        'string': [(51,), 0, -1],
+        '{': [(51, -1, -3, '}', 5), 2, True],
+    },
+    # list_literal.2
+    {
+        ',': [(3, 30), 0, True],
+    },
+    # object_literal
+    {
+        '{': [(-3, '}', 5), 1, True],
+    },
+    # object_literal.1
+    {
+        '!': [(6, 30, ':', 52, -1, 0), 1, True],
+        '(': [(6, 30, ':', 52, -1, ')', 30), 1, True],
+        '-': [(6, 30, ':', 52, -1, 0), 1, True],
+        '[': [(6, 30, ':', 52, -1, -2, ']', 2), 2, True],
+        'boolean': [(6, 30, ':', 52), 0, -1],
+        'function': [(6, 30, ':', 52, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(6, 30, ':', 52), 0, -1],
+        'number': [(6, 30, ':', 52), 0, -1],
+        'string': [(6, 30, ':', 52), 0, -1],
+        '{': [(6, 30, ':', 52, -1, -3, '}', 5), 2, True],
+    },
+    # object_literal.2
+    {
+        ',': [(6, 30, ':', 30), 0, True],
+    },
+    # function_literal
+    {
+        'function': [(-4, 44, ')', 8, '('), 1, True],
+    },
+    # function_literal.1
+    {
+        'identifier': [(9,), 0, True],
+    },
+    # function_literal.2
+    {
+        ',': [(9, 'identifier'), 0, True],
+    },
+    # complex_expression
+    {
+        '!': [(11, -1, 0), 1, True],
+        '(': [(11, -1, ')', 30), 1, True],
+        '-': [(11, -1, 0), 1, True],
+        '[': [(11, -1, -2, ']', 2), 2, True],
+        'boolean': [(11,), 0, -1],
+        'function': [(11, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(11,), 0, -1],
+        'number': [(11,), 0, -1],
+        'string': [(11,), 0, -1],
+        '{': [(11, -1, -3, '}', 5), 2, True],
+    },
+    # complex_expression.1
+    {
+        '(': [(11, -5, ')', 13), -1, True],
+        '.': [(11, -5, 'identifier'), -1, True],
+        '[': [(11, -5, ']', 30), -1, True],
+    },
+    # complex_expression.2
+    {
+        '(': [(')', 13), 0, True],
+        '.': [('identifier',), 0, True],
+        '[': [(']', 30), 0, True],
+    },
+    # complex_expression.3
+    {
+        '!': [(53, -1, 0), 1, True],
+        '(': [(53, -1, ')', 30), 1, True],
+        '-': [(53, -1, 0), 1, True],
+        '[': [(53, -1, -2, ']', 2), 2, True],
+        'boolean': [(53,), 0, -1],
+        'function': [(53, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(53,), 0, -1],
+        'number': [(53,), 0, -1],
+        'string': [(53,), 0, -1],
+        '{': [(53, -1, -3, '}', 5), 2, True],
+    },
+    # complex_expression.4
+    {
+        ',': [(14, 30), 0, True],
+    },
+    # arithmetic_factor
+    {
+        '!': [(11, -1, 0), 1, True],
+        '(': [(11, -1, ')', 30), 1, True],
+        '-': [(11, -1, 0), 1, True],
+        '[': [(11, -1, -2, ']', 2), 2, True],
+        'boolean': [(11,), 0, -1],
+        'function': [(11, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(11,), 0, -1],
+        'number': [(11,), 0, -1],
+        'string': [(11,), 0, -1],
+        '{': [(11, -1, -3, '}', 5), 2, True],
+    },
+    # arithmetic_term
+    {
+        '!': [(54, -1, 0), 1, True],
+        '(': [(54, -1, ')', 30), 1, True],
+        '-': [(54, -1, 0), 1, True],
+        '[': [(54, -1, -2, ']', 2), 2, True],
+        'boolean': [(54,), 0, -1],
+        'function': [(54, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(54,), 0, -1],
+        'number': [(54,), 0, -1],
+        'string': [(54,), 0, -1],
+        '{': [(54, -1, -3, '}', 5), 2, True],
+    },
+    # arithmetic_term.1
+    {
+        '*': [(17, -6, 15), -1, True],
+        '/': [(17, -6, 15), -1, True],
+    },
+    # arithmetic_term.2
+    {
+        '*': [(), 0, True],
+        '/': [(), 0, True],
+    },
+    # arithmetic_expression
+    {
+        '!': [(55, -1, 0), 1, True],
+        '(': [(55, -1, ')', 30), 1, True],
+        '-': [(55, -1, 0), 1, True],
+        '[': [(55, -1, -2, ']', 2), 2, True],
+        'boolean': [(55,), 0, -1],
+        'function': [(55, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(55,), 0, -1],
+        'number': [(55,), 0, -1],
+        'string': [(55,), 0, -1],
+        '{': [(55, -1, -3, '}', 5), 2, True],
+    },
+    # arithmetic_expression.1
+    {
+        '+': [(20, -7, 16), -1, True],
+        '-': [(20, -7, 16), -1, True],
+    },
+    # arithmetic_expression.2
+    {
+        '+': [(), 0, True],
+        '-': [(), 0, True],
+    },
+    # relational_expression
+    {
+        '!': [(56, -1, 0), 1, True],
+        '(': [(56, -1, ')', 30), 1, True],
+        '-': [(56, -1, 0), 1, True],
+        '[': [(56, -1, -2, ']', 2), 2, True],
+        'boolean': [(56,), 0, -1],
+        'function': [(56, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(56,), 0, -1],
+        'number': [(56,), 0, -1],
+        'string': [(56,), 0, -1],
+        '{': [(56, -1, -3, '}', 5), 2, True],
+    },
+    # relational_expression.1
+    {
+        '!=': [(23, -8, 19), -1, True],
+        '<': [(23, -8, 19), -1, True],
+        '<=': [(23, -8, 19), -1, True],
+        '==': [(23, -8, 19), -1, True],
+        '>': [(23, -8, 19), -1, True],
+        '>=': [(23, -8, 19), -1, True],
+    },
+    # relational_expression.2
+    {
+        '!=': [(), 0, True],
+        '<': [(), 0, True],
+        '<=': [(), 0, True],
+        '==': [(), 0, True],
+        '>': [(), 0, True],
+        '>=': [(), 0, True],
+    },
+    # logical_factor
+    {
+        '!': [(56, -1, 0), 1, True],
+        '(': [(56, -1, ')', 30), 1, True],
+        '-': [(56, -1, 0), 1, True],
+        '[': [(56, -1, -2, ']', 2), 2, True],
+        'boolean': [(56,), 0, -1],
+        'function': [(56, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(56,), 0, -1],
+        'number': [(56,), 0, -1],
+        'string': [(56,), 0, -1],
+        '{': [(56, -1, -3, '}', 5), 2, True],
+    },
+    # logical_term
+    {
+        '!': [(57, -1, 0), 1, True],
+        '(': [(57, -1, ')', 30), 1, True],
+        '-': [(57, -1, 0), 1, True],
+        '[': [(57, -1, -2, ']', 2), 2, True],
+        'boolean': [(57,), 0, -1],
+        'function': [(57, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(57,), 0, -1],
+        'number': [(57,), 0, -1],
+        'string': [(57,), 0, -1],
+        '{': [(57, -1, -3, '}', 5), 2, True],
+    },
+    # logical_term.1
+    {
+        '&&': [(27, -9, 25), -1, True],
+    },
+    # logical_expression
+    {
+        '!': [(52, -1, 0), 1, True],
+        '(': [(52, -1, ')', 30), 1, True],
+        '-': [(52, -1, 0), 1, True],
+        '[': [(52, -1, -2, ']', 2), 2, True],
+        'boolean': [(52,), 0, -1],
+        'function': [(52, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(52,), 0, -1],
+        'number': [(52,), 0, -1],
+        'string': [(52,), 0, -1],
+        '{': [(52, -1, -3, '}', 5), 2, True],
+    },
+    # logical_expression.1
+    {
+        '||': [(29, -10, 26), -1, True],
+    },
+    # expression
+    {
+        '!': [(52, -1, 0), 1, True],
+        '(': [(52, -1, ')', 30), 1, True],
+        '-': [(52, -1, 0), 1, True],
+        '[': [(52, -1, -2, ']', 2), 2, True],
+        'boolean': [(52,), 0, -1],
+        'function': [(52, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(52,), 0, -1],
+        'number': [(52,), 0, -1],
+        'string': [(52,), 0, -1],
+        '{': [(52, -1, -3, '}', 5), 2, True],
+    },
+    # assignment_statement
+    {
+        '!': [(58, -1, 0), 1, True],
+        '(': [(58, -1, ')', 30), 1, True],
+        '-': [(58, -1, 0), 1, True],
+        '[': [(58, -1, -2, ']', 2), 2, True],
+        'boolean': [(58,), 0, -1],
+        'function': [(58, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(58,), 0, -1],
+        'number': [(58,), 0, -1],
+        'string': [(58,), 0, -1],
+        '{': [(58, -1, -3, '}', 5), 2, True],
+    },
+    # assignment_statement.1
+    {
+        '=': [(-11, 30), -1, True],
+    },
+    # return_statement
+    {
+        'return': [(-12, 34), 1, True],
+    },
+    # return_statement.1
+    {
+        '!': [(52, -1, 0), 1, True],
+        '(': [(52, -1, ')', 30), 1, True],
+        '-': [(52, -1, 0), 1, True],
+        '[': [(52, -1, -2, ']', 2), 2, True],
+        'boolean': [(52,), 0, -1],
+        'function': [(52, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(52,), 0, -1],
+        'number': [(52,), 0, -1],
+        'string': [(52,), 0, -1],
+        '{': [(52, -1, -3, '}', 5), 2, True],
+    },
+    # print_statement
+    {
+        'print': [(-13, 36), 1, True],
+    },
+    # print_statement.1
+    {
+        '!': [(52, -1, 0), 1, True],
+        '(': [(52, -1, ')', 30), 1, True],
+        '-': [(52, -1, 0), 1, True],
+        '[': [(52, -1, -2, ']', 2), 2, True],
+        'boolean': [(52,), 0, -1],
+        'function': [(52, -1, -4, 44, ')', 8, '('), 2, True],
+        'identifier': [(52,), 0, -1],
+        'number': [(52,), 0, -1],
+        'string': [(52,), 0, -1],
+        '{': [(52, -1, -3, '}', 5), 2, True],
+    },
+    # function_statement
+    {
+        'function': [(-14, 44, ')', 38, '(', 'identifier'), 1, True],
+    },
+    # function_statement.1
+    {
+        'identifier': [(39,), 0, True],
+    },
+    # function_statement.2
+    {
+        ',': [(39, 'identifier'), 0, True],
+    },
+    # if_statement
+    {
+        'if': [(-15, 41, 44, ')', 30, '('), 1, True],
+    },
+    # if_statement.1
+    {
+        'else': [(42,), 0, True],
+    },
+    # if_statement.2
+    {
+        'if': [(-15, 41, 44, ')', 30, '('), 1, True],
+        '{': [(-17, '}', 45), 1, True],
+    },
+    # while_statement
+    {
+        'while': [(-16, 44, ')', 30, '('), 1, True],
+    },
+    # statement_list
+    {
+        '{': [(-17, '}', 45), 1, True],
+    },
+    # statement_list.1
+    {
+        '!': [(59, -1, 0), 1, True],
+        '(': [(59, -1, ')', 30), 1, True],
+        '-': [(59, -1, 0), 1, True],
+        '[': [(59, -1, -2, ']', 2), 2, True],
+        'boolean': [(59,), 0, -1],
+        'function': [(46, 47), 0, False],
+        'identifier': [(59,), 0, -1],
+        'if': [(46, -15, 41, 44, ')', 30, '('), 1, True],
+        'number': [(59,), 0, -1],
+        'print': [(46, -13, 36), 1, True],
+        'return': [(46, -12, 34), 1, True],
+        'string': [(59,), 0, -1],
+        'while': [(46, -16, 44, ')', 30, '('), 1, True],
+        '{': [(59, -1, -3, '}', 5), 2, True],
+    },
+    # statement_list.2
+    {
+        ';': [(46, 47), 0, True],
+    },
+    # statement
+    {
+        '!': [(58, -1, 0), 1, True],
+        '(': [(58, -1, ')', 30), 1, True],
+        '-': [(58, -1, 0), 1, True],
+        '[': [(58, -1, -2, ']', 2), 2, True],
+        'boolean': [(58,), 0, -1],
+        'function': {'(': [(31,), 0, False], 'identifier': [(37,), 0, False]},
+        'identifier': [(58,), 0, -1],
+        'if': [(-15, 41, 44, ')', 30, '('), 1, True],
+        'number': [(58,), 0, -1],
+        'print': [(-13, 36), 1, True],
+        'return': [(-12, 34), 1, True],
+        'string': [(58,), 0, -1],
+        'while': [(-16, 44, ')', 30, '('), 1, True],
+        '{': [(58, -1, -3, '}', 5), 2, True],
+    },
+    # program
+    {
+        '!': [(-18, 60, -1, 0), 2, True],
+        '(': [(-18, 60, -1, ')', 30), 2, True],
+        '-': [(-18, 60, -1, 0), 2, True],
+        '[': [(-18, 60, -1, -2, ']', 2), 3, True],
+        'boolean': [(-18, 60), 1, -1],
+        'function': [(-18, 50, 47), 1, False],
+        'identifier': [(-18, 60), 1, -1],
+        'if': [(-18, 50, -15, 41, 44, ')', 30, '('), 2, True],
+        'number': [(-18, 60), 1, -1],
+        'print': [(-18, 50, -13, 36), 2, True],
+        'return': [(-18, 50, -12, 34), 2, True],
+        'string': [(-18, 60), 1, -1],
+        'while': [(-18, 50, -16, 44, ')', 30, '('), 2, True],
+        '{': [(-18, 60, -1, -3, '}', 5), 3, True],
+    },
+    # program.1
+    {
+        '!': [(60, -1, 0), 1, True],
+        '(': [(60, -1, ')', 30), 1, True],
+        '-': [(60, -1, 0), 1, True],
+        '[': [(60, -1, -2, ']', 2), 2, True],
+        'boolean': [(60,), 0, -1],
+        'function': [(50, 47), 0, False],
+        'identifier': [(60,), 0, -1],
+        'if': [(50, -15, 41, 44, ')', 30, '('), 1, True],
+        'number': [(60,), 0, -1],
+        'print': [(50, -13, 36), 1, True],
+        'return': [(50, -12, 34), 1, True],
+        'string': [(60,), 0, -1],
+        'while': [(50, -16, 44, ')', 30, '('), 1, True],
+        '{': [(60, -1, -3, '}', 5), 2, True],
+    },
+    # program.2
+    {
+        ';': [(50, 47), 0, True],
+    },
+    # complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 list_literal.2
+    {
+        '!=': [(63, -8, 19), -1, True],
+        '&&': [(64, -9, 25), -1, True],
+        '(': [(51, -5, ')', 13), -1, True],
+        '*': [(61, -6, 15), -1, True],
+        '+': [(62, -7, 16), -1, True],
+        ',': [(3, 30), 0, True],
+        '-': [(62, -7, 16), -1, True],
+        '.': [(51, -5, 'identifier'), -1, True],
+        '/': [(61, -6, 15), -1, True],
+        '<': [(63, -8, 19), -1, True],
+        '<=': [(63, -8, 19), -1, True],
+        '==': [(63, -8, 19), -1, True],
+        '>': [(63, -8, 19), -1, True],
+        '>=': [(63, -8, 19), -1, True],
+        '[': [(51, -5, ']', 30), -1, True],
+        '||': [(65, -10, 26), -1, True],
+    },
+    # complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1
+    {
+        '!=': [(68, -8, 19), -1, True],
+        '&&': [(69, -9, 25), -1, True],
+        '(': [(52, -5, ')', 13), -1, True],
+        '*': [(66, -6, 15), -1, True],
+        '+': [(67, -7, 16), -1, True],
+        '-': [(67, -7, 16), -1, True],
+        '.': [(52, -5, 'identifier'), -1, True],
+        '/': [(66, -6, 15), -1, True],
+        '<': [(68, -8, 19), -1, True],
+        '<=': [(68, -8, 19), -1, True],
+        '==': [(68, -8, 19), -1, True],
+        '>': [(68, -8, 19), -1, True],
+        '>=': [(68, -8, 19), -1, True],
+        '[': [(52, -5, ']', 30), -1, True],
+        '||': [(29, -10, 26), -1, True],
+    },
+    # complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 complex_expression.4
+    {
+        '!=': [(72, -8, 19), -1, True],
+        '&&': [(73, -9, 25), -1, True],
+        '(': [(53, -5, ')', 13), -1, True],
+        '*': [(70, -6, 15), -1, True],
+        '+': [(71, -7, 16), -1, True],
+        ',': [(14, 30), 0, True],
+        '-': [(71, -7, 16), -1, True],
+        '.': [(53, -5, 'identifier'), -1, True],
+        '/': [(70, -6, 15), -1, True],
+        '<': [(72, -8, 19), -1, True],
+        '<=': [(72, -8, 19), -1, True],
+        '==': [(72, -8, 19), -1, True],
+        '>': [(72, -8, 19), -1, True],
+        '>=': [(72, -8, 19), -1, True],
+        '[': [(53, -5, ']', 30), -1, True],
+        '||': [(74, -10, 26), -1, True],
+    },
+    # complex_expression.1 arithmetic_term.1
+    {
+        '(': [(54, -5, ')', 13), -1, True],
+        '*': [(17, -6, 15), -1, True],
+        '.': [(54, -5, 'identifier'), -1, True],
+        '/': [(17, -6, 15), -1, True],
+        '[': [(54, -5, ']', 30), -1, True],
+    },
+    # complex_expression.1 arithmetic_term.1 arithmetic_expression.1
+    {
+        '(': [(55, -5, ')', 13), -1, True],
+        '*': [(75, -6, 15), -1, True],
+        '+': [(20, -7, 16), -1, True],
+        '-': [(20, -7, 16), -1, True],
+        '.': [(55, -5, 'identifier'), -1, True],
+        '/': [(75, -6, 15), -1, True],
+        '[': [(55, -5, ']', 30), -1, True],
+    },
+    # complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1
+    {
+        '!=': [(23, -8, 19), -1, True],
+        '(': [(56, -5, ')', 13), -1, True],
+        '*': [(76, -6, 15), -1, True],
+        '+': [(77, -7, 16), -1, True],
+        '-': [(77, -7, 16), -1, True],
+        '.': [(56, -5, 'identifier'), -1, True],
+        '/': [(76, -6, 15), -1, True],
+        '<': [(23, -8, 19), -1, True],
+        '<=': [(23, -8, 19), -1, True],
+        '==': [(23, -8, 19), -1, True],
+        '>': [(23, -8, 19), -1, True],
+        '>=': [(23, -8, 19), -1, True],
+        '[': [(56, -5, ']', 30), -1, True],
+    },
+    # complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1
+    {
+        '!=': [(80, -8, 19), -1, True],
+        '&&': [(27, -9, 25), -1, True],
+        '(': [(57, -5, ')', 13), -1, True],
+        '*': [(78, -6, 15), -1, True],
+        '+': [(79, -7, 16), -1, True],
+        '-': [(79, -7, 16), -1, True],
+        '.': [(57, -5, 'identifier'), -1, True],
+        '/': [(78, -6, 15), -1, True],
+        '<': [(80, -8, 19), -1, True],
+        '<=': [(80, -8, 19), -1, True],
+        '==': [(80, -8, 19), -1, True],
+        '>': [(80, -8, 19), -1, True],
+        '>=': [(80, -8, 19), -1, True],
+        '[': [(57, -5, ']', 30), -1, True],
+    },
+    # complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1
+    {
+        '!=': [(83, -8, 19), -1, True],
+        '&&': [(84, -9, 25), -1, True],
+        '(': [(58, -5, ')', 13), -1, True],
+        '*': [(81, -6, 15), -1, True],
+        '+': [(82, -7, 16), -1, True],
+        '-': [(82, -7, 16), -1, True],
+        '.': [(58, -5, 'identifier'), -1, True],
+        '/': [(81, -6, 15), -1, True],
+        '<': [(83, -8, 19), -1, True],
+        '<=': [(83, -8, 19), -1, True],
+        '=': [(-11, 30), -1, True],
+        '==': [(83, -8, 19), -1, True],
+        '>': [(83, -8, 19), -1, True],
+        '>=': [(83, -8, 19), -1, True],
+        '[': [(58, -5, ']', 30), -1, True],
+        '||': [(85, -10, 26), -1, True],
+    },
+    # complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1 statement_list.2
+    {
+        '!=': [(88, -8, 19), -1, True],
+        '&&': [(89, -9, 25), -1, True],
+        '(': [(59, -5, ')', 13), -1, True],
+        '*': [(86, -6, 15), -1, True],
+        '+': [(87, -7, 16), -1, True],
+        '-': [(87, -7, 16), -1, True],
+        '.': [(59, -5, 'identifier'), -1, True],
+        '/': [(86, -6, 15), -1, True],
+        ';': [(46, 47), 0, True],
+        '<': [(88, -8, 19), -1, True],
+        '<=': [(88, -8, 19), -1, True],
+        '=': [(46, -11, 30), -1, True],
+        '==': [(88, -8, 19), -1, True],
+        '>': [(88, -8, 19), -1, True],
+        '>=': [(88, -8, 19), -1, True],
+        '[': [(59, -5, ']', 30), -1, True],
+        '||': [(90, -10, 26), -1, True],
+    },
+    # complex_expression.1 arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1 program.2
+    {
+        '!=': [(93, -8, 19), -1, True],
+        '&&': [(94, -9, 25), -1, True],
+        '(': [(60, -5, ')', 13), -1, True],
+        '*': [(91, -6, 15), -1, True],
+        '+': [(92, -7, 16), -1, True],
+        '-': [(92, -7, 16), -1, True],
+        '.': [(60, -5, 'identifier'), -1, True],
+        '/': [(91, -6, 15), -1, True],
+        ';': [(50, 47), 0, True],
+        '<': [(93, -8, 19), -1, True],
+        '<=': [(93, -8, 19), -1, True],
+        '=': [(50, -11, 30), -1, True],
+        '==': [(93, -8, 19), -1, True],
+        '>': [(93, -8, 19), -1, True],
+        '>=': [(93, -8, 19), -1, True],
+        '[': [(60, -5, ']', 30), -1, True],
+        '||': [(95, -10, 26), -1, True],
+    },
+    # arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 list_literal.2
+    {
+        '!=': [(63, -8, 19), -1, True],
+        '&&': [(64, -9, 25), -1, True],
+        '*': [(61, -6, 15), -1, True],
+        '+': [(62, -7, 16), -1, True],
+        ',': [(3, 30), 0, True],
+        '-': [(62, -7, 16), -1, True],
+        '/': [(61, -6, 15), -1, True],
+        '<': [(63, -8, 19), -1, True],
+        '<=': [(63, -8, 19), -1, True],
+        '==': [(63, -8, 19), -1, True],
+        '>': [(63, -8, 19), -1, True],
+        '>=': [(63, -8, 19), -1, True],
+        '||': [(65, -10, 26), -1, True],
+    },
+    # arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 list_literal.2
+    {
+        '!=': [(63, -8, 19), -1, True],
+        '&&': [(64, -9, 25), -1, True],
+        '+': [(62, -7, 16), -1, True],
+        ',': [(3, 30), 0, True],
+        '-': [(62, -7, 16), -1, True],
+        '<': [(63, -8, 19), -1, True],
+        '<=': [(63, -8, 19), -1, True],
+        '==': [(63, -8, 19), -1, True],
+        '>': [(63, -8, 19), -1, True],
+        '>=': [(63, -8, 19), -1, True],
+        '||': [(65, -10, 26), -1, True],
+    },
+    # relational_expression.1 logical_term.1 logical_expression.1 list_literal.2
+    {
+        '!=': [(63, -8, 19), -1, True],
+        '&&': [(64, -9, 25), -1, True],
+        ',': [(3, 30), 0, True],
+        '<': [(63, -8, 19), -1, True],
+        '<=': [(63, -8, 19), -1, True],
+        '==': [(63, -8, 19), -1, True],
+        '>': [(63, -8, 19), -1, True],
+        '>=': [(63, -8, 19), -1, True],
+        '||': [(65, -10, 26), -1, True],
+    },
+    # logical_term.1 logical_expression.1 list_literal.2
+    {
+        '&&': [(64, -9, 25), -1, True],
+        ',': [(3, 30), 0, True],
+        '||': [(65, -10, 26), -1, True],
+    },
+    # logical_expression.1 list_literal.2
+    {
+        ',': [(3, 30), 0, True],
+        '||': [(65, -10, 26), -1, True],
+    },
+    # arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1
+    {
+        '!=': [(68, -8, 19), -1, True],
+        '&&': [(69, -9, 25), -1, True],
+        '*': [(66, -6, 15), -1, True],
+        '+': [(67, -7, 16), -1, True],
+        '-': [(67, -7, 16), -1, True],
+        '/': [(66, -6, 15), -1, True],
+        '<': [(68, -8, 19), -1, True],
+        '<=': [(68, -8, 19), -1, True],
+        '==': [(68, -8, 19), -1, True],
+        '>': [(68, -8, 19), -1, True],
+        '>=': [(68, -8, 19), -1, True],
+        '||': [(29, -10, 26), -1, True],
+    },
+    # arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1
+    {
+        '!=': [(68, -8, 19), -1, True],
+        '&&': [(69, -9, 25), -1, True],
+        '+': [(67, -7, 16), -1, True],
+        '-': [(67, -7, 16), -1, True],
+        '<': [(68, -8, 19), -1, True],
+        '<=': [(68, -8, 19), -1, True],
+        '==': [(68, -8, 19), -1, True],
+        '>': [(68, -8, 19), -1, True],
+        '>=': [(68, -8, 19), -1, True],
+        '||': [(29, -10, 26), -1, True],
+    },
+    # relational_expression.1 logical_term.1 logical_expression.1
+    {
+        '!=': [(68, -8, 19), -1, True],
+        '&&': [(69, -9, 25), -1, True],
+        '<': [(68, -8, 19), -1, True],
+        '<=': [(68, -8, 19), -1, True],
+        '==': [(68, -8, 19), -1, True],
+        '>': [(68, -8, 19), -1, True],
+        '>=': [(68, -8, 19), -1, True],
+        '||': [(29, -10, 26), -1, True],
+    },
+    # logical_term.1 logical_expression.1
+    {
+        '&&': [(69, -9, 25), -1, True],
+        '||': [(29, -10, 26), -1, True],
+    },
+    # arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 complex_expression.4
+    {
+        '!=': [(72, -8, 19), -1, True],
+        '&&': [(73, -9, 25), -1, True],
+        '*': [(70, -6, 15), -1, True],
+        '+': [(71, -7, 16), -1, True],
+        ',': [(14, 30), 0, True],
+        '-': [(71, -7, 16), -1, True],
+        '/': [(70, -6, 15), -1, True],
+        '<': [(72, -8, 19), -1, True],
+        '<=': [(72, -8, 19), -1, True],
+        '==': [(72, -8, 19), -1, True],
+        '>': [(72, -8, 19), -1, True],
+        '>=': [(72, -8, 19), -1, True],
+        '||': [(74, -10, 26), -1, True],
+    },
+    # arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 complex_expression.4
+    {
+        '!=': [(72, -8, 19), -1, True],
+        '&&': [(73, -9, 25), -1, True],
+        '+': [(71, -7, 16), -1, True],
+        ',': [(14, 30), 0, True],
+        '-': [(71, -7, 16), -1, True],
+        '<': [(72, -8, 19), -1, True],
+        '<=': [(72, -8, 19), -1, True],
+        '==': [(72, -8, 19), -1, True],
+        '>': [(72, -8, 19), -1, True],
+        '>=': [(72, -8, 19), -1, True],
+        '||': [(74, -10, 26), -1, True],
+    },
+    # relational_expression.1 logical_term.1 logical_expression.1 complex_expression.4
+    {
+        '!=': [(72, -8, 19), -1, True],
+        '&&': [(73, -9, 25), -1, True],
+        ',': [(14, 30), 0, True],
+        '<': [(72, -8, 19), -1, True],
+        '<=': [(72, -8, 19), -1, True],
+        '==': [(72, -8, 19), -1, True],
+        '>': [(72, -8, 19), -1, True],
+        '>=': [(72, -8, 19), -1, True],
+        '||': [(74, -10, 26), -1, True],
+    },
+    # logical_term.1 logical_expression.1 complex_expression.4
+    {
+        '&&': [(73, -9, 25), -1, True],
+        ',': [(14, 30), 0, True],
+        '||': [(74, -10, 26), -1, True],
+    },
+    # logical_expression.1 complex_expression.4
+    {
+        ',': [(14, 30), 0, True],
+        '||': [(74, -10, 26), -1, True],
+    },
+    # arithmetic_term.1 arithmetic_expression.1
+    {
+        '*': [(75, -6, 15), -1, True],
+        '+': [(20, -7, 16), -1, True],
+        '-': [(20, -7, 16), -1, True],
+        '/': [(75, -6, 15), -1, True],
+    },
+    # arithmetic_term.1 arithmetic_expression.1 relational_expression.1
+    {
+        '!=': [(23, -8, 19), -1, True],
+        '*': [(76, -6, 15), -1, True],
+        '+': [(77, -7, 16), -1, True],
+        '-': [(77, -7, 16), -1, True],
+        '/': [(76, -6, 15), -1, True],
+        '<': [(23, -8, 19), -1, True],
+        '<=': [(23, -8, 19), -1, True],
+        '==': [(23, -8, 19), -1, True],
+        '>': [(23, -8, 19), -1, True],
+        '>=': [(23, -8, 19), -1, True],
+    },
+    # arithmetic_expression.1 relational_expression.1
+    {
+        '!=': [(23, -8, 19), -1, True],
+        '+': [(77, -7, 16), -1, True],
+        '-': [(77, -7, 16), -1, True],
+        '<': [(23, -8, 19), -1, True],
+        '<=': [(23, -8, 19), -1, True],
+        '==': [(23, -8, 19), -1, True],
+        '>': [(23, -8, 19), -1, True],
+        '>=': [(23, -8, 19), -1, True],
+    },
+    # arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1
+    {
+        '!=': [(80, -8, 19), -1, True],
+        '&&': [(27, -9, 25), -1, True],
+        '*': [(78, -6, 15), -1, True],
+        '+': [(79, -7, 16), -1, True],
+        '-': [(79, -7, 16), -1, True],
+        '/': [(78, -6, 15), -1, True],
+        '<': [(80, -8, 19), -1, True],
+        '<=': [(80, -8, 19), -1, True],
+        '==': [(80, -8, 19), -1, True],
+        '>': [(80, -8, 19), -1, True],
+        '>=': [(80, -8, 19), -1, True],
+    },
+    # arithmetic_expression.1 relational_expression.1 logical_term.1
+    {
+        '!=': [(80, -8, 19), -1, True],
+        '&&': [(27, -9, 25), -1, True],
+        '+': [(79, -7, 16), -1, True],
+        '-': [(79, -7, 16), -1, True],
+        '<': [(80, -8, 19), -1, True],
+        '<=': [(80, -8, 19), -1, True],
+        '==': [(80, -8, 19), -1, True],
+        '>': [(80, -8, 19), -1, True],
+        '>=': [(80, -8, 19), -1, True],
+    },
+    # relational_expression.1 logical_term.1
+    {
+        '!=': [(80, -8, 19), -1, True],
+        '&&': [(27, -9, 25), -1, True],
+        '<': [(80, -8, 19), -1, True],
+        '<=': [(80, -8, 19), -1, True],
+        '==': [(80, -8, 19), -1, True],
+        '>': [(80, -8, 19), -1, True],
+        '>=': [(80, -8, 19), -1, True],
+    },
+    # arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1
+    {
+        '!=': [(83, -8, 19), -1, True],
+        '&&': [(84, -9, 25), -1, True],
+        '*': [(81, -6, 15), -1, True],
+        '+': [(82, -7, 16), -1, True],
+        '-': [(82, -7, 16), -1, True],
+        '/': [(81, -6, 15), -1, True],
+        '<': [(83, -8, 19), -1, True],
+        '<=': [(83, -8, 19), -1, True],
+        '=': [(-11, 30), -1, True],
+        '==': [(83, -8, 19), -1, True],
+        '>': [(83, -8, 19), -1, True],
+        '>=': [(83, -8, 19), -1, True],
+        '||': [(85, -10, 26), -1, True],
+    },
+    # arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1
+    {
+        '!=': [(83, -8, 19), -1, True],
+        '&&': [(84, -9, 25), -1, True],
+        '+': [(82, -7, 16), -1, True],
+        '-': [(82, -7, 16), -1, True],
+        '<': [(83, -8, 19), -1, True],
+        '<=': [(83, -8, 19), -1, True],
+        '=': [(-11, 30), -1, True],
+        '==': [(83, -8, 19), -1, True],
+        '>': [(83, -8, 19), -1, True],
+        '>=': [(83, -8, 19), -1, True],
+        '||': [(85, -10, 26), -1, True],
+    },
+    # relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1
+    {
+        '!=': [(83, -8, 19), -1, True],
+        '&&': [(84, -9, 25), -1, True],
+        '<': [(83, -8, 19), -1, True],
+        '<=': [(83, -8, 19), -1, True],
+        '=': [(-11, 30), -1, True],
+        '==': [(83, -8, 19), -1, True],
+        '>': [(83, -8, 19), -1, True],
+        '>=': [(83, -8, 19), -1, True],
+        '||': [(85, -10, 26), -1, True],
+    },
+    # logical_term.1 logical_expression.1 assignment_statement.1
+    {
+        '&&': [(84, -9, 25), -1, True],
+        '=': [(-11, 30), -1, True],
+        '||': [(85, -10, 26), -1, True],
+    },
+    # logical_expression.1 assignment_statement.1
+    {
+        '=': [(-11, 30), -1, True],
+        '||': [(85, -10, 26), -1, True],
+    },
+    # arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1 statement_list.2
+    {
+        '!=': [(88, -8, 19), -1, True],
+        '&&': [(89, -9, 25), -1, True],
+        '*': [(86, -6, 15), -1, True],
+        '+': [(87, -7, 16), -1, True],
+        '-': [(87, -7, 16), -1, True],
+        '/': [(86, -6, 15), -1, True],
+        ';': [(46, 47), 0, True],
+        '<': [(88, -8, 19), -1, True],
+        '<=': [(88, -8, 19), -1, True],
+        '=': [(46, -11, 30), -1, True],
+        '==': [(88, -8, 19), -1, True],
+        '>': [(88, -8, 19), -1, True],
+        '>=': [(88, -8, 19), -1, True],
+        '||': [(90, -10, 26), -1, True],
+    },
+    # arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1 statement_list.2
+    {
+        '!=': [(88, -8, 19), -1, True],
+        '&&': [(89, -9, 25), -1, True],
+        '+': [(87, -7, 16), -1, True],
+        '-': [(87, -7, 16), -1, True],
+        ';': [(46, 47), 0, True],
+        '<': [(88, -8, 19), -1, True],
+        '<=': [(88, -8, 19), -1, True],
+        '=': [(46, -11, 30), -1, True],
+        '==': [(88, -8, 19), -1, True],
+        '>': [(88, -8, 19), -1, True],
+        '>=': [(88, -8, 19), -1, True],
+        '||': [(90, -10, 26), -1, True],
+    },
+    # relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1 statement_list.2
+    {
+        '!=': [(88, -8, 19), -1, True],
+        '&&': [(89, -9, 25), -1, True],
+        ';': [(46, 47), 0, True],
+        '<': [(88, -8, 19), -1, True],
+        '<=': [(88, -8, 19), -1, True],
+        '=': [(46, -11, 30), -1, True],
+        '==': [(88, -8, 19), -1, True],
+        '>': [(88, -8, 19), -1, True],
+        '>=': [(88, -8, 19), -1, True],
+        '||': [(90, -10, 26), -1, True],
+    },
+    # logical_term.1 logical_expression.1 assignment_statement.1 statement_list.2
+    {
+        '&&': [(89, -9, 25), -1, True],
+        ';': [(46, 47), 0, True],
+        '=': [(46, -11, 30), -1, True],
+        '||': [(90, -10, 26), -1, True],
+    },
+    # logical_expression.1 assignment_statement.1 statement_list.2
+    {
+        ';': [(46, 47), 0, True],
+        '=': [(46, -11, 30), -1, True],
+        '||': [(90, -10, 26), -1, True],
+    },
+    # arithmetic_term.1 arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1 program.2
+    {
+        '!=': [(93, -8, 19), -1, True],
+        '&&': [(94, -9, 25), -1, True],
+        '*': [(91, -6, 15), -1, True],
+        '+': [(92, -7, 16), -1, True],
+        '-': [(92, -7, 16), -1, True],
+        '/': [(91, -6, 15), -1, True],
+        ';': [(50, 47), 0, True],
+        '<': [(93, -8, 19), -1, True],
+        '<=': [(93, -8, 19), -1, True],
+        '=': [(50, -11, 30), -1, True],
+        '==': [(93, -8, 19), -1, True],
+        '>': [(93, -8, 19), -1, True],
+        '>=': [(93, -8, 19), -1, True],
+        '||': [(95, -10, 26), -1, True],
+    },
+    # arithmetic_expression.1 relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1 program.2
+    {
+        '!=': [(93, -8, 19), -1, True],
+        '&&': [(94, -9, 25), -1, True],
+        '+': [(92, -7, 16), -1, True],
+        '-': [(92, -7, 16), -1, True],
+        ';': [(50, 47), 0, True],
+        '<': [(93, -8, 19), -1, True],
+        '<=': [(93, -8, 19), -1, True],
+        '=': [(50, -11, 30), -1, True],
+        '==': [(93, -8, 19), -1, True],
+        '>': [(93, -8, 19), -1, True],
+        '>=': [(93, -8, 19), -1, True],
+        '||': [(95, -10, 26), -1, True],
+    },
+    # relational_expression.1 logical_term.1 logical_expression.1 assignment_statement.1 program.2
+    {
+        '!=': [(93, -8, 19), -1, True],
+        '&&': [(94, -9, 25), -1, True],
+        ';': [(50, 47), 0, True],
+        '<': [(93, -8, 19), -1, True],
+        '<=': [(93, -8, 19), -1, True],
+        '=': [(50, -11, 30), -1, True],
+        '==': [(93, -8, 19), -1, True],
+        '>': [(93, -8, 19), -1, True],
+        '>=': [(93, -8, 19), -1, True],
+        '||': [(95, -10, 26), -1, True],
+    },
+    # logical_term.1 logical_expression.1 assignment_statement.1 program.2
+    {
+        '&&': [(94, -9, 25), -1, True],
+        ';': [(50, 47), 0, True],
+        '=': [(50, -11, 30), -1, True],
+        '||': [(95, -10, 26), -1, True],
+    },
+    # logical_expression.1 assignment_statement.1 program.2
+    {
+        ';': [(50, 47), 0, True],
+        '=': [(50, -11, 30), -1, True],
+        '||': [(95, -10, 26), -1, True],
+    },
+]
@@ -0,0 +1,467 @@
+import marshal
+import sys
+from keyword import iskeyword
+
+from tokenizer import tokenize
+from parser import parse, LazyFunction
+
+# Compact AST nodes. The parser builds dicts such as
+#   {"tag": "+", "left": ..., "right": ...}
+# which from_dict turns into instances of small __slots__ classes, one per
+# tag, each carrying an integer opcode. to_dict turns a tree back into the
+# parser's dicts, and nodes also answer ["tag"], ["left"] and `in`, so code
+# written against dict ASTs keeps working.
+
+(
+    NUMBER,
+    STRING,
+    BOOLEAN,
+    IDENTIFIER,
+    LIST,
+    OBJECT,
+    NEGATE,
+    NOT,
+    LOGICAL_NOT,
+    FUNCTION,
+    COMPLEX,
+    CALL,
+    ADD,
+    SUBTRACT,
+    MULTIPLY,
+    DIVIDE,
+    LESS,
+    GREATER,
+    LESS_EQUAL,
+    GREATER_EQUAL,
+    EQUAL,
+    NOT_EQUAL,
+    AND,
+    OR,
+    STATEMENT_LIST,
+    PROGRAM,
+    IF,
+    WHILE,
+    RETURN,
+    PRINT,
+    ASSIGN,
+    CHAIN,
+    CONSTANT,
+) = range(33)
+
+# opcode: (tag, class name, fields), with the fields in the order the parser writes them
+node_kinds = {
+    NUMBER: ("number", "Number", ["value"]),
+    STRING: ("string", "String", ["value"]),
+    BOOLEAN: ("boolean", "Boolean", ["value"]),
+    IDENTIFIER: ("identifier", "Identifier", ["value", "position"]),
+    LIST: ("list", "List", ["items"]),
+    OBJECT: ("object", "Object", ["items"]),
+    NEGATE: ("negate", "Negate", ["value"]),
+    NOT: ("not", "Not", ["value"]),
+    LOGICAL_NOT: ("!", "LogicalNot", ["value"]),
+    FUNCTION: ("function", "Function", ["parameters", "body"]),
+    COMPLEX: ("complex", "Complex", ["base", "index"]),
+    CALL: ("call", "Call", ["function", "arguments"]),
+    ADD: ("+", "Add", ["left", "right"]),
+    SUBTRACT: ("-", "Subtract", ["left", "right"]),
+    MULTIPLY: ("*", "Multiply", ["left", "right"]),
+    DIVIDE: ("/", "Divide", ["left", "right"]),
+    LESS: ("<", "Less", ["left", "right"]),
+    GREATER: (">", "Greater", ["left", "right"]),
+    LESS_EQUAL: ("<=", "LessEqual", ["left", "right"]),
+    GREATER_EQUAL: (">=", "GreaterEqual", ["left", "right"]),
+    EQUAL: ("==", "Equal", ["left", "right"]),
+    NOT_EQUAL: ("!=", "NotEqual", ["left", "right"]),
+    AND: ("&&", "And", ["left", "right"]),
+    OR: ("||", "Or", ["left", "right"]),
+    STATEMENT_LIST: ("statement_list", "StatementList", ["statements"]),
+    PROGRAM: ("program", "Program", ["statements"]),
+    IF: ("if", "If", ["condition", "then", "else"]),
+    WHILE: ("while", "While", ["condition", "do"]),
+    RETURN: ("return", "Return", ["value"]),
+    PRINT: ("print", "Print", ["value"]),
+    ASSIGN: ("assign", "Assign", ["target", "value"]),
+    # a flattened run of one associative operator, from parse(..., flatten=True)
+    CHAIN: ("chain", "Chain", ["operator", "operands"]),
+    # a literal of constants, from parse(..., constants=True)
+    CONSTANT: ("constant", "Constant", ["value"]),
+}
+
+
+class Node:
+    """Base of the node classes. Fields that a dict node would leave out,
+    such as an if without an else, are left unset."""
+
+    __slots__ = ()
+    tag = None
+    opcode = None
+    fields = ()
+    attributes = {}
+
+    def __init__(self, **fields):
+        for key, value in fields.items():
+            setattr(self, self.attributes[key], value)
+
+    def __getitem__(self, key):
+        if key == "tag" and self.tag is not None:
+            return self.tag
+        try:
+            return getattr(self, self.attributes[key])
+        except (KeyError, AttributeError):
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        if key == "tag":
+            return self.tag is not None
+        return key in self.attributes and hasattr(self, self.attributes[key])
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        return to_dict(self)
+
+    def __eq__(self, other):
+        if isinstance(other, Node):
+            other = other.to_dict()
+        if not isinstance(other, dict):
+            return NotImplemented
+        return self.to_dict() == other
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class Entry(Node):
+    """A key and value of an object literal; these have no tag."""
+
+    __slots__ = ("key", "value")
+    fields = ("key", "value")
+    attributes = {"key": "key", "value": "value"}
+
+
+def node_class(opcode, tag, name, fields):
+    # "else" is a Python keyword, so that field is stored as else_
+    slots = tuple(field + "_" if iskeyword(field) else field for field in fields)
+    return type(
+        name + "Node",
+        (Node,),
+        {
+            "__slots__": slots,
+            "tag": tag,
+            "opcode": opcode,
+            "fields": tuple(fields),
+            "attributes": dict(zip(fields, slots)),
+        },
+    )
+
+
+node_classes = {
+    tag: node_class(opcode, tag, name, fields)
+    for opcode, (tag, name, fields) in node_kinds.items()
+}
+
+
+class LazyFunctionNode(node_classes["function"]):
+    """A function node whose body is still an unparsed LazyFunction from
+    the parser. The body is parsed and converted when first used."""
+
+    __slots__ = ("source",)
+
+    def __getattr__(self, name):
+        # only called for unset slots
+        if name != "body":
+            raise AttributeError(name)
+        self.body = from_dict(self.source["body"])
+        self.source = None
+        return self.body
+
+
+class ConstantNode(node_classes["constant"]):
+    """A constant node. Its value is never handed out, only copies: data
+    holds the value marshalled, when it nests lists or objects, so a copy
+    is made in one call; a flat value is copied with .copy(). A value
+    nested too deeply to marshal has data False and is copied by copy_data."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, value):
+        self.value = value
+        items = value.values() if type(value) is dict else value
+        if any(type(item) in (list, dict) for item in items):
+            try:
+                self.data = marshal.dumps(value)
+            except ValueError:
+                # marshal refuses very deeply nested values
+                self.data = False
+        else:
+            self.data = None
+
+    def copy(self):
+        if self.data is None:
+            return self.value.copy()
+        if self.data is False:
+            return copy_data(self.value)
+        return marshal.loads(self.data)
+
+
+def copy_data(value):
+    """Copies nested lists and objects with an explicit stack, so values
+    nested deeper than the recursion limit copy too."""
+    root = [None]
+    stack = [(root, 0, value)]
+    while stack:
+        holder, place, value = stack.pop()
+        if type(value) is list:
+            copy = [None] * len(value)
+            stack.extend((copy, index, item) for index, item in enumerate(value))
+        elif type(value) is dict:
+            copy = dict.fromkeys(value)
+            stack.extend((copy, key, item) for key, item in value.items())
+        else:
+            copy = value
+        holder[place] = copy
+    return root[0]
+
+
+node_classes["constant"] = ConstantNode
+
+containers = {dict, list, LazyFunction}
+
+
+def from_dict(ast, shared=False):
+    """Converts a dict AST from the parser into nodes. With shared, a dict
+    that appears more than once, as in an interned parse, becomes one node."""
+    # the tree is copied top down with an explicit stack, so that trees nested
+    # deeper than the recursion limit convert too. each entry names where the
+    # copy of a dict or list goes: an attribute of a node or a list index.
+    copies = {} if shared else None
+    root = [None]
+    stack = [(root, 0, ast)]
+    while stack:
+        holder, place, value = stack.pop()
+        if copies is not None and id(value) in copies:
+            copy = copies[id(value)]
+        elif type(value) is LazyFunction and "body" not in value:
+            copy = object.__new__(LazyFunctionNode)
+            copy.source = value
+            stack.append((copy, "parameters", value["parameters"]))
+        elif type(value) is dict and value.get("tag") == "constant":
+            # the value is data, not more of the tree
+            copy = ConstantNode(value["value"])
+        elif type(value) is not list:
+            tag = value.get("tag")
+            if tag is None:
+                cls = Entry
+            else:
+                assert tag in node_classes, f"Unknown tag [{tag}] in AST"
+                cls = node_classes[tag]
+            copy = object.__new__(cls)
+            attributes = cls.attributes
+            for key, child in value.items():
+                if key != "tag":
+                    if type(child) in containers:
+                        stack.append((copy, attributes[key], child))
+                    else:
+                        setattr(copy, attributes[key], child)
+            if copies is not None:
+                copies[id(value)] = copy
+        else:
+            copy = list(value)
+            for index, child in enumerate(value):
+                if type(child) in containers:
+                    stack.append((copy, index, child))
+        if type(holder) is list:
+            holder[place] = copy
+        else:
+            setattr(holder, place, copy)
+    return root[0]
+
+
+def to_dict(ast):
+    """Converts nodes back into the parser's dicts."""
+    root = [None]
+    stack = [(root, 0, ast)]
+    while stack:
+        holder, place, value = stack.pop()
+        if isinstance(value, ConstantNode):
+            copy = {"tag": "constant", "value": value.copy()}
+        elif isinstance(value, Node):
+            copy = {} if value.tag is None else {"tag": value.tag}
+            for key, attribute in value.attributes.items():
+                if hasattr(value, attribute):
+                    child = getattr(value, attribute)
+                    if isinstance(child, (Node, list)):
+                        # filled in when the stack reaches it; this keeps the key order
+                        copy[key] = None
+                        stack.append((copy, key, child))
+                    else:
+                        copy[key] = child
+        else:
+            copy = list(value)
+            for index, child in enumerate(value):
+                if isinstance(child, (Node, list)):
+                    stack.append((copy, index, child))
+        holder[place] = copy
+    return root[0]
+
+
+def tree_memory(ast):
+    """Returns the number of distinct objects in a tree of dicts or nodes,
+    and their total size in bytes. Shared objects count once."""
+    seen = set()
+    size = 0
+    stack = [ast]
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            # the keys are the same few strings in every node
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, ConstantNode):
+            stack.extend([value.value, value.data])
+        elif isinstance(value, Node):
+            stack.extend(getattr(value, attribute) for attribute in value.__slots__ if hasattr(value, attribute))
+    return len(seen), size
+
+
+def test_from_dict():
+    print("testing from_dict")
+    ast = parse(
+        tokenize(
+            'x = {"a": [1, -2.5, "s"]}; function f(y) { if (y < 1) { return } else { print !y } };'
+            "while (x[1] && f(x)) { x = x * 2 / 3 - 1 }"
+        )
+    )
+    nodes = from_dict(ast)
+    assert nodes.opcode == PROGRAM and len(nodes.statements) == 3
+    assignment = nodes.statements[0]
+    assert type(assignment).__name__ == "AssignNode"
+    assert assignment.opcode == ASSIGN and assignment.target.opcode == IDENTIFIER
+    entry = assignment.value.items[0]
+    assert entry.key.value == "a" and entry.value.opcode == LIST
+    function = nodes.statements[1].value
+    assert function.parameters[0].position == 38
+    assert function.body.statements[0].else_.statements[0].opcode == PRINT
+    assert not hasattr(function.body.statements[0].then.statements[0], "value")
+    assert to_dict(nodes) == ast
+    assert nodes == ast and ast == nodes
+
+
+def test_node_dict_access():
+    print("testing node dict access")
+    node = from_dict(parse(tokenize("if (x) { return 1 }"))["statements"][0])
+    assert node["tag"] == "if" and node["condition"] == {"tag": "identifier", "value": "x"}
+    assert "then" in node and "else" not in node and "tag" in node
+    assert node.get("else") is None
+    try:
+        node["else"]
+        assert False, "an unset field should raise KeyError"
+    except KeyError:
+        pass
+    assert node_classes["+"](left=1, right=2).to_dict() == {"tag": "+", "left": 1, "right": 2}
+    assert repr(from_dict({"tag": "number", "value": 1})) == "{'tag': 'number', 'value': 1}"
+    try:
+        from_dict({"tag": "nonsense"})
+        assert False, "an unknown tag should not convert"
+    except AssertionError as e:
+        assert "Unknown tag [nonsense]" in str(e)
+
+
+def test_deep_nodes():
+    print("testing deeply nested nodes")
+    depth = 20000
+    ast = parse(tokenize("[" * depth + "]" * depth))
+    nodes = from_dict(ast)
+    node = nodes.statements[0]
+    for _ in range(depth - 1):
+        node = node.items[0]
+    assert node.opcode == LIST and node.items == []
+    back = to_dict(nodes)
+    for _ in range(depth):
+        back = back["statements"][0] if "statements" in back else back["items"][0]
+    assert back == {"tag": "list", "items": []}
+
+
+def test_lazy_nodes():
+    print("testing lazy function nodes")
+    code = "function f(x) { return x + 1 }; y = f(2)"
+    nodes = from_dict(parse(tokenize(code), lazy=True))
+    function = nodes.statements[0].value
+    assert type(function) is LazyFunctionNode and function.opcode == FUNCTION
+    assert function.parameters[0].value == "x"
+    assert function.body.statements[0].opcode == RETURN
+    assert function == parse(tokenize(code))["statements"][0]["value"]
+
+
+def test_shared_nodes():
+    print("testing shared nodes")
+    code = "x = a * 2; y = a * 2; z = [(a * 2), 3]"
+    ast = parse(tokenize(code), intern="subtrees")
+    nodes = from_dict(ast, shared=True)
+    x, y, z = [statement.value for statement in nodes.statements]
+    assert x is y and z.items[0] is x
+    assert from_dict(ast).statements[0].value is not from_dict(ast).statements[1].value
+    assert to_dict(nodes) == parse(tokenize(code))
+    plain = tree_memory(from_dict(parse(tokenize(code))))
+    interned = tree_memory(nodes)
+    assert interned[0] < plain[0] and interned[1] < plain[1]
+    node = from_dict({"tag": "number", "value": 1})
+    assert tree_memory(node) == (2, sys.getsizeof(node) + sys.getsizeof(1))
+
+
+def test_chain_nodes():
+    print("testing chain nodes")
+    ast = parse(tokenize("x = a * b * c"), flatten=True)
+    nodes = from_dict(ast)
+    chain = nodes.statements[0].value
+    assert chain.opcode == CHAIN and chain.operator == "*"
+    assert [operand.value for operand in chain.operands] == ["a", "b", "c"]
+    assert to_dict(nodes) == ast
+
+
+def test_constant_nodes():
+    print("testing constant nodes")
+    code = 'x = [1, "a", {"b": [2, 3]}]; y = {"c": 4}'
+    ast = parse(tokenize(code), constants=True)
+    nodes = from_dict(ast)
+    x, y = [statement.value for statement in nodes.statements]
+    assert type(x) is ConstantNode and x.opcode == CONSTANT and x.data is not None
+    assert type(y) is ConstantNode and y.data is None
+    # copies share nothing with the node or with each other
+    first = x.copy()
+    first[2]["b"].append(4)
+    assert x.copy() == [1, "a", {"b": [2, 3]}] and x.value == [1, "a", {"b": [2, 3]}]
+    assert y.copy() is not y.value
+    assert to_dict(nodes) == ast
+    # too deep for marshal, which stops near 2000 levels
+    depth = 2500
+    ast = parse(tokenize("x = " + "[" * depth + "1" + "]" * depth), constants=True)
+    x = from_dict(ast).statements[0].value
+    assert type(x) is ConstantNode and x.data is False
+    def innermost(value):
+        for _ in range(depth - 1):
+            assert type(value) is list and len(value) == 1
+            value = value[0]
+        return value
+
+    innermost(x.copy()).append(2)
+    assert innermost(x.copy()) == [1] and innermost(x.value) == [1]
+
+if __name__ == "__main__":
+    test_from_dict()
+    test_node_dict_access()
+    test_deep_nodes()
+    test_lazy_nodes()
+    test_shared_nodes()
+    test_chain_nodes()
+    test_constant_nodes()
+    print("done.")
@@ -0,0 +1,389 @@
+import operator
+
+from tokenizer import tokenize
+from parser import parse
+from evaluator import evaluate
+
+# Constant folding over the parser's dict ASTs. fold_constants returns a new
+# tree and leaves its input alone. Operators whose operands are all known
+# are computed once, here, and replaced by a number or string literal; if
+# statements with a known condition lose the branch that can never run; and
+# a double negation of a value that is certainly a number is dropped. Only
+# folds that give the same result the evaluator would are made: anything
+# that would fail at run time, such as a division by zero, is left for the
+# evaluator to report.
+
+binary_operations = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+    # the evaluator computes both operands of && and || before combining them
+    "&&": lambda left, right: left and right,
+    "||": lambda left, right: left or right,
+}
+
+# tags whose value, when they evaluate at all, is a number
+numeric_tags = {"number", "negate", "-", "/"}
+
+# longer strings stay as expressions rather than being stored in the tree
+max_string_length = 10000
+
+# stands for a value that is not known until run time
+unknown = object()
+
+
+def literal(value):
+    # booleans have no literal the evaluator accepts, so they stay expressions
+    if type(value) in [int, float]:
+        return {"tag": "number", "value": value}
+    if type(value) is str and len(value) <= max_string_length:
+        return {"tag": "string", "value": value}
+    return None
+
+
+def too_long(operator, left_value, right_value):
+    # a string longer than any literal would be, told before it is built:
+    # code that never runs must not cost time or memory to fold
+    if operator == "+" and type(left_value) is str and type(right_value) is str:
+        return len(left_value) + len(right_value) > max_string_length
+    if operator == "*":
+        if type(left_value) is str and type(right_value) in [int, bool]:
+            return len(left_value) * right_value > max_string_length
+        if type(right_value) is str and type(left_value) in [int, bool]:
+            return len(right_value) * left_value > max_string_length
+    return False
+
+
+def fold_expression(ast, count):
+    """Returns the folded expression and its value, or unknown."""
+    tag = ast["tag"]
+    if tag in ["number", "string"]:
+        return ast, ast["value"]
+    if tag in binary_operations:
+        left, left_value = fold_expression(ast["left"], count)
+        right, right_value = fold_expression(ast["right"], count)
+        ast = {"tag": tag, "left": left, "right": right}
+        if left_value is unknown or right_value is unknown:
+            return ast, unknown
+        if tag == "/" and right_value == 0:
+            return ast, unknown
+        if too_long(tag, left_value, right_value):
+            return ast, unknown
+        try:
+            value = binary_operations[tag](left_value, right_value)
+        except Exception:
+            return ast, unknown
+        node = literal(value)
+        if node is None:
+            return ast, value
+        count[0] += 1
+        return node, value
+    if tag == "chain":
+        return fold_chain(ast, count)
+    if tag == "negate":
+        value_ast, value = fold_expression(ast["value"], count)
+        if value is not unknown:
+            try:
+                node = literal(-value)
+            except Exception:
+                node = None
+            if node is not None:
+                count[0] += 1
+                return node, node["value"]
+        if value_ast["tag"] == "negate" and value_ast["value"]["tag"] in numeric_tags:
+            count[0] += 1
+            return value_ast["value"], unknown
+        return {"tag": "negate", "value": value_ast}, unknown
+    if tag == "!":
+        value_ast, value = fold_expression(ast["value"], count)
+        return {"tag": "!", "value": value_ast}, unknown if value is unknown else not value
+    if tag == "list":
+        return {"tag": "list", "items": [fold_expression(item, count)[0] for item in ast["items"]]}, unknown
+    if tag == "object":
+        items = []
+        for item in ast["items"]:
+            items.append(
+                {
+                    "key": fold_expression(item["key"], count)[0],
+                    "value": fold_expression(item["value"], count)[0],
+                }
+            )
+        return {"tag": "object", "items": items}, unknown
+    if tag == "complex":
+        return {
+            "tag": "complex",
+            "base": fold_expression(ast["base"], count)[0],
+            "index": fold_expression(ast["index"], count)[0],
+        }, unknown
+    if tag == "call":
+        return {
+            "tag": "call",
+            "function": fold_expression(ast["function"], count)[0],
+            "arguments": [fold_expression(argument, count)[0] for argument in ast["arguments"]],
+        }, unknown
+    if tag == "function":
+        if "body" not in ast:
+            # a body skipped by a lazy parse stays unparsed, and unfolded
+            return ast, unknown
+        return {
+            "tag": "function",
+            "parameters": ast["parameters"],
+            "body": fold_statement_list(ast["body"], count),
+        }, unknown
+    # identifiers, and tags the evaluator does not handle, are left as they are
+    return ast, unknown
+
+
+def fold_chain(ast, count):
+    # only a known prefix of the operands can be combined: "a" + x + 1 + 2
+    # is not "a" + x + 3
+    operation = binary_operations[ast["operator"]]
+    operands = []
+    values = []
+    for operand in ast["operands"]:
+        operand, value = fold_expression(operand, count)
+        operands.append(operand)
+        values.append(value)
+    value = values[0]
+    known = 1
+    while value is not unknown and known < len(values) and values[known] is not unknown:
+        if too_long(ast["operator"], value, values[known]):
+            break
+        try:
+            value = operation(value, values[known])
+        except Exception:
+            break
+        known += 1
+    node = literal(value) if known > 1 else None
+    if node is None:
+        return {"tag": "chain", "operator": ast["operator"], "operands": operands}, unknown
+    count[0] += known - 1
+    if known == len(operands):
+        return node, value
+    operands[:known] = [node]
+    if len(operands) == 2:
+        return {"tag": ast["operator"], "left": operands[0], "right": operands[1]}, unknown
+    return {"tag": "chain", "operator": ast["operator"], "operands": operands}, unknown
+
+
+def fold_statement_list(ast, count):
+    return {"tag": ast["tag"], "statements": fold_statements(ast["statements"], count)}
+
+
+def fold_statements(statements, count):
+    result = []
+    for i, statement in enumerate(statements):
+        if statement["tag"] != "if":
+            result.append(fold_statement(statement, count))
+            continue
+        condition, value = fold_expression(statement["condition"], count)
+        if value is unknown:
+            result.append(fold_statement(statement, count))
+            continue
+        count[0] += 1
+        branch = statement["then"] if value else statement.get("else")
+        if i < len(statements) - 1:
+            # the if's own value is never seen here, so the branch can run in its place
+            if branch is None:
+                continue
+            if branch["tag"] == "if":
+                result.extend(fold_statements([branch], count))
+            else:
+                result.extend(fold_statements(branch["statements"], count))
+            continue
+        # the last statement gives the list its value, which for an if is
+        # None, so keep the if but drop the branch that cannot run
+        node = {"tag": "if", "condition": condition}
+        if value:
+            node["then"] = fold_statement_list(statement["then"], count)
+        else:
+            node["then"] = {"tag": "statement_list", "statements": []}
+            if branch is not None:
+                node["else"] = fold_statement(branch, count)
+        result.append(node)
+    return result
+
+
+def fold_statement(ast, count):
+    tag = ast["tag"]
+    if tag == "if":
+        node = {
+            "tag": "if",
+            "condition": fold_expression(ast["condition"], count)[0],
+            "then": fold_statement_list(ast["then"], count),
+        }
+        if "else" in ast:
+            node["else"] = fold_statement(ast["else"], count)
+        return node
+    if tag == "statement_list":
+        return fold_statement_list(ast, count)
+    if tag == "while":
+        return {
+            "tag": "while",
+            "condition": fold_expression(ast["condition"], count)[0],
+            "do": fold_statement_list(ast["do"], count),
+        }
+    if tag in ["print", "return"]:
+        if ast.get("value") is None:
+            return ast
+        return {"tag": tag, "value": fold_expression(ast["value"], count)[0]}
+    if tag == "assign":
+        target = ast["target"]
+        if target["tag"] == "complex":
+            target = fold_expression(target, count)[0]
+        return {"tag": "assign", "target": target, "value": fold_expression(ast["value"], count)[0]}
+    return fold_expression(ast, count)[0]
+
+
+def fold_constants(ast):
+    """Returns the folded program and the number of nodes folded."""
+    count = [0]
+    ast = {"tag": "program", "statements": fold_statements(ast["statements"], count)}
+    return ast, count[0]
+
+
+def fold(code):
+    return fold_constants(parse(tokenize(code)))
+
+
+def test_fold_arithmetic():
+    print("testing fold arithmetic")
+    ast, count = fold("x = 60*60*24")
+    assert ast["statements"][0]["value"] == {"tag": "number", "value": 86400}
+    assert count == 2
+    ast, count = fold('print "a" + "b"')
+    assert ast["statements"][0]["value"] == {"tag": "string", "value": "ab"}
+    ast, count = fold("x = (1 < 2) + 1")
+    assert ast["statements"][0]["value"] == {"tag": "number", "value": 2}
+    ast, count = fold("x = 0 || 7 && 3")
+    assert ast["statements"][0]["value"] == {"tag": "number", "value": 3}
+    ast, count = fold("x = y * (2 + 3)")
+    assert ast["statements"][0]["value"]["right"] == {"tag": "number", "value": 5}
+    assert count == 1
+    # relational results are booleans, which have no literal
+    ast, count = fold("x = 1 < 2")
+    assert ast["statements"][0]["value"]["tag"] == "<"
+    assert count == 0
+
+
+def test_fold_keeps_errors():
+    print("testing fold keeps run time errors")
+    for code in ["x = 1 / 0", 'x = 1 + "a"', 'x = -"a"', 'x = "a" * 100000']:
+        ast, count = fold(code)
+        assert ast == parse(tokenize(code)), code
+        assert count == 0
+
+
+def test_fold_long_strings():
+    print("testing fold leaves long strings unbuilt")
+    # these would take gigabytes to build; folding must not try
+    for code, flatten in [
+        ('function never() { return "abc" * 300000000 }; print 1', False),
+        ('x = 300000000 * "abc" + "d"', False),
+        ('x = "abc" * 300000000 * 2', True),
+        ('x = "' + "a" * 6000 + '" + "' + "b" * 6000 + '"', False),
+    ]:
+        ast, count = fold_constants(parse(tokenize(code), flatten=flatten))
+        assert ast == parse(tokenize(code), flatten=flatten), code
+        assert count == 0
+    ast, count = fold('x = "ab" * 5000 + ""')
+    assert ast["statements"][0]["value"] == {"tag": "string", "value": "ab" * 5000}
+
+
+def test_fold_negation():
+    print("testing fold negation")
+    ast, count = fold("x = -(-3)")
+    assert ast["statements"][0]["value"] == {"tag": "number", "value": 3}
+    ast, count = fold("x = -(-(y - 1))")
+    assert ast["statements"][0]["value"]["tag"] == "-"
+    assert count == 1
+    # -(-y) is not y when y is a string or a list, so it stays
+    ast, count = fold("x = -(-y)")
+    assert ast == parse(tokenize("x = -(-y)"))
+
+
+def test_fold_if():
+    print("testing fold if")
+    ast, count = fold("if (1) { x = 1 } else { x = 2 }; y = 3")
+    assert ast == parse(tokenize("x = 1; y = 3"))
+    assert count == 1
+    ast, count = fold("if (2 < 1) { x = 1 } else if (y) { x = 2 } else { x = 3 }; y = 3")
+    assert ast == parse(tokenize("if (y) { x = 2 } else { x = 3 }; y = 3"))
+    ast, count = fold("if (0) { x = 1 }; y = 3")
+    assert ast == parse(tokenize("y = 3"))
+    # a last statement keeps its if, so the list still evaluates to None
+    ast, count = fold("if (0) { x = 1 } else { x = 2 }")
+    expected = parse(tokenize("if (0) { x = 1 } else { x = 2 }"))
+    expected["statements"][0]["then"]["statements"] = []
+    assert ast == expected
+    environment = {}
+    assert evaluate(ast, environment) == (None, False) and environment == {"x": 2}
+    ast, count = fold("function f(a) { if (1) { return a }; return 0 }; x = f(5)")
+    assert ast == parse(tokenize("function f(a) { return a; return 0 }; x = f(5)"))
+    environment = {}
+    evaluate(ast, environment)
+    assert environment["x"] == 5
+
+
+def test_fold_evaluates_the_same():
+    print("testing folded programs evaluate the same")
+    code = """
+        i = 0; total = 0; day = 60*60*24;
+        while (i < 10) {
+            if (1 > 2 || 0) { total = 1000 } else { total = total + day / (12 * 2) };
+            if ("a" + "b" == "ab") { total = total - -(-1) };
+            i = i + 1
+        };
+        names = [("x" + "y"), {("k" + "1"): (2 * 3)}];
+        total
+    """
+    environment = {}
+    result = evaluate(parse(tokenize(code)), environment)
+    folded_environment = {}
+    ast, count = fold_constants(parse(tokenize(code)))
+    assert count == 12, count
+    assert evaluate(ast, folded_environment) == result
+    assert folded_environment == environment
+
+
+def test_fold_chain():
+    print("testing fold chain")
+    ast, count = fold_constants(parse(tokenize("x = 1 + 2 + 3 + y + 4 + 5"), flatten=True))
+    assert ast["statements"][0]["value"] == {
+        "tag": "chain",
+        "operator": "+",
+        "operands": [
+            {"tag": "number", "value": 6},
+            {"tag": "identifier", "value": "y"},
+            {"tag": "number", "value": 4},
+            {"tag": "number", "value": 5},
+        ],
+    }
+    assert count == 2
+    ast, count = fold_constants(parse(tokenize("x = 2 * 3 * 4"), flatten=True))
+    assert ast["statements"][0]["value"] == {"tag": "number", "value": 24}
+    assert count == 2
+    ast, count = fold_constants(parse(tokenize('x = "a" + "b" + y'), flatten=True))
+    assert ast["statements"][0]["value"] == parse(tokenize('x = "ab" + y'))["statements"][0]["value"]
+    # an error part way along is left for the evaluator
+    code = 'x = 1 + 2 + "a" + 3'
+    ast, count = fold_constants(parse(tokenize(code), flatten=True))
+    assert ast == parse(tokenize('x = 3 + "a" + 3'), flatten=True)
+
+
+if __name__ == "__main__":
+    test_fold_arithmetic()
+    test_fold_keeps_errors()
+    test_fold_long_strings()
+    test_fold_negation()
+    test_fold_if()
+    test_fold_evaluates_the_same()
+    test_fold_chain()
+    print("done.")
@@ -0,0 +1,170 @@
+import contextlib
+import io
+
+from tokenizer import tokenize
+from parser import parse
+from evaluator import evaluate
+import compiler
+import vm
+import transpiler
+
+# The engines other than evaluate each promise its semantics: the same
+# result, the same environment afterwards and the same output. These tests
+# hold all of them to that over one corpus; what only one engine has, such
+# as the disassembler or deep recursion in the vm, is tested in its module.
+
+engines = [compiler.run, vm.run, transpiler.run]
+
+
+def both_engines(engine, code, environment=None, **options):
+    """Runs code with evaluate and with engine, each on its own copy of the
+    environment, and checks they agree on the result, the environment and
+    what was printed. options go to parse."""
+    outcomes = []
+    for run in [evaluate, engine]:
+        local_environment = dict(environment or {})
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            result = run(parse(tokenize(code), **options), local_environment)
+        outcomes.append((result, local_environment, output.getvalue()))
+    assert outcomes[0] == outcomes[1], f"{engine.__module__}: {code}: {outcomes[0]} != {outcomes[1]}"
+    return outcomes[1]
+
+
+def test_run_matches_evaluate():
+    print("test run matches evaluate")
+    for engine in engines:
+        for code in [
+            "4",
+            "x",
+            '"s"',
+            "1 + 2 * 3 - 4 / 2",
+            "-x < 2; x > 2; x <= 1; x >= 1; x == 1; x != 1",
+            "x && 1 || 0; x && 0",
+            "print; print 1 + 1; print [x, 2]",
+            "print",
+            'y = [1, x, "a"]; z = {"a": y, "b": {}}',
+            "if (x) { y = 1 } else { y = 2 }; if (0) { y = 3 }; if (0) { y = 3 } else if (x) { y = 4 }",
+            "i = 0; t = 0; while (i < 10) { t = t + i; i = i + 1 }",
+            "function f(a, b) { return a * b }; y = f(x, 3)",
+            "function g(a) { a }; y = g(1)",
+            'l = [1, 2]; l[1] = 3; o = {"k": l}; o["k"] = l[0]; l[0]',
+            "y = x + 1; x = y",
+            "if (x) { z = 1 }; y = z",
+            "function h() { p = p + 1; return p }; y = h(); y = h()",
+            "function k(a, b) { return b }; y = k(1)",
+            "None = 1; _x = None + 1; function class(def) { return def }; y = class(_x)",
+        ]:
+            both_engines(engine, code, {"x": 1, "$parent": {"p": 2, "b": 5, "z": 0}})
+        assert both_engines(engine, "y = p + x", {"x": 1, "$parent": {"p": 2}})[1]["y"] == 3
+
+
+def test_run_return():
+    print("test run return")
+    for engine in engines:
+        # a return inside a while or if ends the function, not just the block
+        result, environment, _ = both_engines(
+            engine,
+            """
+            function f(n) { i = 0; while (1) { if (i == n) { return i * 10 }; i = i + 1 } };
+            function g(n) { if (n) { return 1 } else { return 2 }; return 3 };
+            function h() { return };
+            x = f(3); y = g(0); z = h(); return x + y
+            """,
+        )
+        assert result == (32, True)
+        assert environment["x"] == 30 and environment["y"] == 2 and environment["z"] == None
+        assert both_engines(engine, "return")[0] == (None, True)
+        assert both_engines(engine, "i = 0; while (1) { i = i + 1; if (i > 3) { return i } }; i = 0")[0] == (4, True)
+
+
+def test_run_recursion():
+    print("test run recursion")
+    for engine in engines:
+        code = "function fib(n) { if (n < 2) { return n }; return fib(n - 1) + fib(n - 2) }; x = fib(15)"
+        assert both_engines(engine, code)[1]["x"] == 610
+
+
+def test_run_dynamic_scope():
+    print("test run dynamic scope")
+    for engine in engines:
+        # a call sees its caller's names, its assignments are its own, and
+        # the caller's values come back when it returns
+        result, environment, _ = both_engines(
+            engine,
+            """
+            function inner() { return x * 10 + y };
+            function middle(x) { y = 2; t = inner(); y = 3; return t };
+            function outer(f) { x = 7; return middle(f) + inner() };
+            y = 1; a = outer(4); b = inner(); function g(a, b) { return a + b + y }; c = g(1); return [a, b, c]
+            """,
+            {"$parent": {"x": 5}},
+        )
+        # g(1) leaves b unbound, so it is the caller's b
+        assert result == ([42 + 71, 51, 1 + 51 + 1], True), result
+        assert "t" not in environment and environment["$parent"] == {"x": 5}
+
+
+def test_run_flatten_and_constants():
+    print("test run flatten and constants")
+    terms = " + ".join(["x"] * 500)
+    code = f"x = 1 + 2 + 3 + 4; y = 1 && 0 && 2; z = [1, [2]]; z[1][0] = 3; w = [1, [2]]; v = {terms}"
+    for engine in engines:
+        _, environment, _ = both_engines(engine, code, flatten=True, constants=True)
+        assert environment["x"] == 10 and environment["y"] == 0 and environment["v"] == 5000
+        assert environment["z"] == [1, [3]] and environment["w"] == [1, [2]]
+
+
+def test_run_deep_statements():
+    print("test run deep statements")
+    chain = " else ".join(f"if (x == {i}) {{ y = {i} }}" for i in range(150))
+    ifs = "if (1) { " * 110 + "y = 2" + " }" * 110
+    whiles = "".join(f"w{i} = 0; while (w{i} < 1) {{ w{i} = w{i} + 1; " for i in range(25))
+    for engine in engines:
+        for code in [
+            f"x = 149; {chain}; z = y",
+            f"x = 150; {chain} else {{ y = -1 }}; z = y",
+            f"{ifs}; z = y",
+            f"function f() {{ {ifs.replace('y = 2', 'y = 2; return y + 1')} }}; z = f()",
+            whiles + "y = 3" + " }" * 25 + "; z = y",
+            "function g() { " + whiles + "return w0 + w24" + " }" * 25 + " }; z = g()",
+        ]:
+            _, environment, _ = both_engines(engine, code)
+            assert "z" in environment, code
+
+
+def test_run_large_numbers():
+    print("test run large numbers")
+    for engine in engines:
+        # a literal too large for a float is inf
+        _, environment, output = both_engines(engine, f"x = {'9' * 400}.0; y = -x; print x + 1")
+        assert output == "inf\n" and environment["y"] == float("-inf")
+
+
+def test_run_errors():
+    print("test run errors")
+    for engine in engines:
+        for code, message in [
+            ("y", "Unknown identifier: 'y'."),
+            ("if (0) { y = 1 }; y", "Unknown identifier: 'y'."),
+            ("1 / 0", "Division by zero"),
+            ("x = !1", "Unknown tag [not] in AST"),
+        ]:
+            try:
+                engine(parse(tokenize(code)), {})
+                assert False, f"{code} should fail"
+            except AssertionError as e:
+                assert str(e).startswith(message), str(e)
+        # an unsupported node fails when it is reached, not when it is compiled
+        engine(parse(tokenize("if (0) { x = !1 }")), {})
+
+
+if __name__ == "__main__":
+    test_run_matches_evaluate()
+    test_run_return()
+    test_run_recursion()
+    test_run_dynamic_scope()
+    test_run_flatten_and_constants()
+    test_run_deep_statements()
+    test_run_large_numbers()
+    test_run_errors()
+    print("done.")
@@ -1,4 +1,6 @@
-from tokenizer import tokenize
+from collections import deque
+
+from tokenizer import tokenize, LineIndex
 from pprint import pprint
 
 # NOTE - ADD simple-expression = ... "(" expression ")"
@@ -7,7 +9,7 @@ grammar = """
 
     simple_expression = identifier | <boolean> | <number> | <string> | list_literal | object_literal | ("-" simple_expression) | ("!" simple_expression) | function_literal | ( "(" expression ")" ) ;
 
-    list_literal = "[" expression { "," expression } "]" ;
+    list_literal = "[" [ expression { "," expression } ] "]" ;
     object_literal = "{" [ expression ":" expression { "," expression ":" expression } ] "}" ;
     function_literal = "function" "(" [ identifier { "," identifier } ] ")" statement_list ;
 
@@ -30,13 +32,139 @@ grammar = """
 
     if_statement = "if" "(" expression ")" statement_list [ "else" (if_statement | statement_list) ] ;
     while_statement = "while" "(" expression ")" statement_list ;
-    statement_list = "{" statement { ";" statement } "}" ;
+    statement_list = "{" [ statement { ";" statement } ] "}" ;
 
     statement = if_statement | while_statement | function_statement | return_statement | print_statement | assignment_statement ;
 
     program = [ statement { ";" statement } ] ;
     """
 
+
+class TokenStream:
+    """A cursor over a token list. Parse functions advance it in place, and
+    return it as the remaining tokens, so that tokens[0] is the next token."""
+
+    __slots__ = ("tokens", "index", "lazy", "leaves", "subtrees", "flatten", "constants", "positions")
+
+    def __init__(self, tokens, index=0, lazy=False):
+        self.tokens = tokens
+        self.index = index
+        # when set, function bodies are skipped and parsed on first use
+        self.lazy = lazy
+        # intern tables, when repeated leaves and subtrees are to be shared
+        self.leaves = None
+        self.subtrees = None
+        # when set, chains of one associative operator become one node
+        self.flatten = False
+        # when set, literals of constants become constant nodes
+        self.constants = False
+        # when set, a dict to record where each statement starts
+        self.positions = None
+
+    def __getitem__(self, offset):
+        return self.tokens[self.index + offset]
+
+    def advance(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def skip_statement_list(self):
+        """Moves past the statement list at tokens[0] by matching braces
+        instead of parsing it, and returns its token list and index range.
+        Returns None, without moving, if the list is unclosed."""
+        tokens = self.tokens
+        index = self.index
+        depth = 0
+        while True:
+            tag = tokens[index]["tag"]
+            if tag == "{":
+                depth += 1
+            elif tag == "}":
+                depth -= 1
+                if depth == 0:
+                    start = self.index
+                    self.index = index + 1
+                    return tokens, start, index + 1
+            elif tag is None:
+                return None
+            index += 1
+
+    def __eq__(self, other):
+        if not isinstance(other, TokenStream):
+            return NotImplemented
+        if self.tokens is other.tokens:
+            return self.index == other.index
+        return self.tokens[self.index :] == other.tokens[other.index :]
+
+
+class TokenPipe:
+    """A cursor over tokens pulled on demand from an iterator, such as
+    iter_tokenize, that ends with the end-of-input token. Only the tokens
+    looked at but not yet consumed are held, so memory does not grow with
+    the length of the input."""
+
+    __slots__ = ("source", "current", "ahead", "lazy", "leaves", "subtrees", "flatten", "constants", "positions")
+
+    def __init__(self, tokens, lazy=False):
+        self.source = iter(tokens)
+        # tokens[0] is always pulled; further lookahead waits in ahead
+        self.current = next(self.source)
+        self.ahead = deque()
+        self.lazy = lazy
+        self.leaves = None
+        self.subtrees = None
+        self.flatten = False
+        self.constants = False
+        self.positions = None
+
+    def __getitem__(self, offset):
+        if offset == 0:
+            return self.current
+        ahead = self.ahead
+        while len(ahead) < offset:
+            ahead.append(next(self.source))
+        return ahead[offset - 1]
+
+    def advance(self):
+        token = self.current
+        if self.ahead:
+            self.current = self.ahead.popleft()
+        else:
+            # None once the end-of-input token has been consumed
+            self.current = next(self.source, None)
+        return token
+
+    def skip_statement_list(self):
+        # like TokenStream.skip_statement_list, but the body's tokens are
+        # pulled into a list of their own for the lazy parse to use later
+        body = []
+        depth = 0
+        while True:
+            token = self.advance()
+            body.append(token)
+            tag = token["tag"]
+            if tag == "{":
+                depth += 1
+            elif tag == "}":
+                depth -= 1
+                if depth == 0:
+                    return body, 0, len(body)
+            elif tag is None:
+                # put everything back
+                self.ahead.extendleft(reversed(body[1:]))
+                self.current = body[0]
+                return None
+
+
+def token_stream(tokens):
+    if isinstance(tokens, (TokenStream, TokenPipe)):
+        return tokens
+    if isinstance(tokens, list):
+        return TokenStream(tokens)
+    return TokenPipe(tokens)
+
+
 # BASIC EXPRESSIONS
 
 
@@ -44,37 +172,7 @@ def parse_simple_expression(tokens):
     """
     simple_expression = identifier | <boolean> | <number> | <string> | list_literal | object_literal | ("-" simple_expression) | ("!" simple_expression) | function_literal | ( "(" expression ")" ) ;
     """
-
-    token = tokens[0]
-
-    if token["tag"] in {"identifier", "boolean", "number", "string"}:
-        return {"tag": token["tag"], "value": token["value"]}, tokens[1:]
-
-    if token["tag"] == "[":
-        return parse_list_literal(tokens)
-
-    if token["tag"] == "{":
-        return parse_object_literal(tokens)
-
-    if token["tag"] == "-":
-        value, tokens = parse_simple_expression(tokens[1:])
-        return {"tag": "negate", "value": value}, tokens
-
-    if token["tag"] == "!":
-        value, tokens = parse_simple_expression(tokens[1:])
-        return {"tag": "not", "value": value}, tokens
-
-    if token["tag"] == "function":
-        return parse_function_literal(tokens)
-
-    if token["tag"] == "(":
-        ast, tokens = parse_expression(tokens[1:])
-        assert (
-            tokens[0]["tag"] == ")"
-        ), f"Expected ')' at position {tokens[0]['position']}"
-        return ast, tokens[1:]
-
-    assert False, f"Unexpected token '{token['tag']}' at position {token['position']}"
+    return parse_nested_expression(tokens, "simple")
 
 
 def test_parse_simple_expression():
@@ -146,24 +244,16 @@ def test_parse_simple_expression():
 
 def parse_list_literal(tokens):
     """
-    list_literal = "[" expression { "," expression } "]" ;
+    list_literal = "[" [ expression { "," expression } ] "]" ;
     """
+    tokens = token_stream(tokens)
     assert tokens[0]["tag"] == "[", f"Expected '[' at position {tokens[0]['position']}"
-    tokens = tokens[1:]
-    items = []
-    if tokens[0]["tag"] != "]":
-        value, tokens = parse_simple_expression(tokens)
-        items.append(value)
-        while tokens[0]["tag"] == ",":
-            value, tokens = parse_simple_expression(tokens[1:])
-            items.append(value)
-    assert tokens[0]["tag"] == "]", f"Expected ']' at position {tokens[0]['position']}"
-    return {"tag": "list", "items": items}, tokens[1:]
+    return parse_nested_expression(tokens, "simple")
 
 
 def test_parse_list_literal():
     """
-    list_literal = "[" expression { "," expression } "]" ;
+    list_literal = "[" [ expression { "," expression } ] "]" ;
     """
     print("testing parse_list_literal...")
     ast, tokens = parse_list_literal(tokenize("[1,2,3]"))
@@ -197,28 +287,9 @@ def parse_object_literal(tokens):
     """
     object_literal = "{" [ expression ":" expression { "," expression ":" expression } ] "}" ;
     """
+    tokens = token_stream(tokens)
     assert tokens[0]["tag"] == "{", f"Expected '{{' at position {tokens[0]['position']}"
-    tokens = tokens[1:]
-    items = []
-    if tokens[0]["tag"] != "}":
-        key, tokens = parse_simple_expression(tokens)
-        assert (
-            tokens[0]["tag"] == ":"
-        ), f"Expected ':' at position {tokens[0]['position']}"
-        tokens = tokens[1:]
-        value, tokens = parse_simple_expression(tokens)
-        items.append({"key": key, "value": value})
-        while tokens[0]["tag"] == ",":
-            tokens = tokens[1:]
-            key, tokens = parse_simple_expression(tokens)
-            assert (
-                tokens[0]["tag"] == ":"
-            ), f"Expected ':' at position {tokens[0]['position']}"
-            tokens = tokens[1:]
-            value, tokens = parse_simple_expression(tokens)
-            items.append({"key": key, "value": value})
-    assert tokens[0]["tag"] == "}", f"Expected '}}' at position {tokens[0]['position']}"
-    return {"tag": "object", "items": items}, tokens[1:]
+    return parse_nested_expression(tokens, "simple")
 
 
 def test_parse_object_literal():
@@ -277,32 +348,52 @@ def test_parse_object_literal():
     assert ast == {"tag": "object", "items": []}
 
 
+def parameter_node(token):
+    # parameters keep their position; copy them out of the token stream
+    return {"tag": "identifier", "value": token["value"], "position": token["position"]}
+
+
 def parse_function_literal(tokens):
     """
     function_literal = "function" "(" [ identifier { "," identifier } ] ")" statement_list ;
     """
+    tokens = token_stream(tokens)
     assert (
         tokens[0]["tag"] == "function"
     ), f"Expected 'function' at position {tokens[0]['position']}"
-    tokens = tokens[1:]
+    tokens.advance()
+    return parse_function_definition(tokens)
+
+
+def parse_function_definition(tokens):
+    # the parameter list and body shared by function literals and statements
     assert tokens[0]["tag"] == "(", f"Expected '(' at position {tokens[0]['position']}"
-    tokens = tokens[1:]
+    tokens.advance()
     parameters = []
     if tokens[0]["tag"] != ")":
         assert (
             tokens[0]["tag"] == "identifier"
         ), f"Expected identifier at position {tokens[0]['position']}"
-        parameters.append(tokens[0])
-        tokens = tokens[1:]
+        parameters.append(parameter_node(tokens.advance()))
         while tokens[0]["tag"] == ",":
-            tokens = tokens[1:]
+            tokens.advance()
             assert (
                 tokens[0]["tag"] == "identifier"
             ), f"Expected identifier at position {tokens[0]['position']}"
-            parameters.append(tokens[0])
-            tokens = tokens[1:]
+            parameters.append(parameter_node(tokens.advance()))
     assert tokens[0]["tag"] == ")", f"Expected ']' at position {tokens[0]['position']}"
-    tokens = tokens[1:]
+    tokens.advance()
+    if tokens.lazy and tokens[0]["tag"] == "{":
+        body_tokens = tokens.skip_statement_list()
+        # an unclosed body is parsed now, to report the error where it is
+        if body_tokens is not None:
+            function = LazyFunction(parameters, *body_tokens)
+            function.leaves = tokens.leaves
+            function.subtrees = tokens.subtrees
+            function.flatten = tokens.flatten
+            function.constants = tokens.constants
+            function.positions = tokens.positions
+            return function, tokens
     body_statement_list, tokens = parse_statement_list(tokens)
     return {
         "tag": "function",
@@ -311,6 +402,45 @@ def parse_function_literal(tokens):
     }, tokens
 
 
+class LazyFunction(dict):
+    """A function node from a lazy parse. Its "body" is parsed from the
+    recorded token range the first time it is looked up."""
+
+    def __init__(self, parameters, tokens, start, end):
+        super().__init__(tag="function", parameters=parameters)
+        self.tokens = tokens
+        self.start = start
+        self.end = end
+        # the options of the parse the function came from
+        self.leaves = None
+        self.subtrees = None
+        self.flatten = False
+        self.constants = False
+        self.positions = None
+
+    def __missing__(self, key):
+        if key != "body":
+            raise KeyError(key)
+        tokens = TokenStream(self.tokens, self.start, lazy=True)
+        tokens.leaves = self.leaves
+        tokens.subtrees = self.subtrees
+        tokens.flatten = self.flatten
+        tokens.constants = self.constants
+        tokens.positions = self.positions
+        body, tokens = parse_statement_list(tokens)
+        assert tokens.index == self.end
+        self["body"] = body
+        # the tokens and tables are not needed once the body exists
+        self.tokens = self.leaves = self.subtrees = self.positions = None
+        return body
+
+    def __eq__(self, other):
+        self["body"]
+        return dict.__eq__(self, other)
+
+    __hash__ = None
+
+
 def test_parse_function_literal():
     """
     function_literal = "function" "(" [ identifier { "," identifier } ] ")" statement_list ;
@@ -388,41 +518,7 @@ def parse_complex_expression(tokens):
     """
     complex_expression = simple_expression { ( ) | ("." identifier) | "(" [ expression { "," expression } ] ")" } ;
     """
-    ast, tokens = parse_simple_expression(tokens)
-    while tokens[0]["tag"] in ["[", ".", "("]:
-        if tokens[0]["tag"] == "[":
-            tokens = tokens[1:]
-            index_ast, tokens = parse_expression(tokens)
-            assert (
-                tokens[0]["tag"] == "]"
-            ), f"Expected ']' at position {tokens[0]['position']}"
-            tokens = tokens[1:]
-            ast = {"tag": "complex", "base": ast, "index": index_ast}
-        if tokens[0]["tag"] == ".":
-            tokens = tokens[1:]
-            assert (
-                tokens[0]["tag"] == "identifier"
-            ), f"Expected identifier at position {tokens[0]['position']}"
-            ast = {
-                "tag": "complex",
-                "base": ast,
-                "index": {"tag": "string", "value": tokens[0]["value"]},
-            }
-        if tokens[0]["tag"] == "(":
-            tokens = tokens[1:]
-            items = []
-            if tokens[0]["tag"] != ")":
-                value, tokens = parse_expression(tokens)
-                items.append(value)
-                while tokens[0]["tag"] == ",":
-                    value, tokens = parse_simple_expression(tokens[1:])
-                    items.append(value)
-            assert (
-                tokens[0]["tag"] == ")"
-            ), f"Expected ')' at position {tokens[0]['position']}"
-            tokens = tokens[1:]
-            ast = {"tag": "call", "function": ast, "arguments": items}
-    return ast, tokens
+    return parse_nested_expression(tokens, "complex")
 
 
 def test_parse_complex_expression():
@@ -477,6 +573,325 @@ def test_parse_complex_expression():
     }
 
 
+# BINARY EXPRESSIONS
+
+# the binary operator levels of the grammar, loosest first. every level is
+# left associative, so one precedence-climbing loop handles all of them.
+binary_precedence = {
+    "||": 1,
+    "&&": 2,
+    "<": 3,
+    ">": 3,
+    "<=": 3,
+    ">=": 3,
+    "==": 3,
+    "!=": 3,
+    "+": 4,
+    "-": 4,
+    "*": 5,
+    "/": 5,
+}
+
+
+def parse_binary_expression(tokens, precedence):
+    """
+    Parses the operators that bind at least as tightly as precedence.
+    """
+    return parse_nested_expression(tokens, "binary", precedence)
+
+
+# NESTED EXPRESSIONS
+
+# Generated input can nest lists, objects and parentheses tens of thousands
+# deep, past Python's recursion limit. Expressions are therefore parsed by one
+# loop over an explicit stack of the constructs still waiting for an operand.
+# Each stack entry is a tuple of the construct's name and its parts so far.
+
+leaf_tags = {"identifier", "boolean", "number", "string"}
+
+# operators whose left-deep chains a flattening parse turns into one
+#   {"tag": "chain", "operator": "+", "operands": [...]}
+# node of three or more operands, evaluated left to right like the chain
+chain_operators = {"+", "*", "&&", "||"}
+
+
+# Literals made only of numbers, strings and other such literals, as in
+# tables of data, are parsed into
+#   {"tag": "constant", "value": [...] or {...}}
+# holding the Python value the literal evaluates to.
+
+not_constant = object()
+
+
+def constant_value(node):
+    # the value of a list or object element, when it is known now
+    tag = node["tag"]
+    if tag in ["number", "string", "constant"]:
+        return node["value"]
+    if tag == "negate" and node["value"]["tag"] == "number":
+        return -node["value"]["value"]
+    return not_constant
+
+
+def constant_literal(node):
+    """Returns a constant node for a list or object literal of constants,
+    or the literal itself."""
+    if node["tag"] == "list":
+        value = []
+        for item in node["items"]:
+            item_value = constant_value(item)
+            if item_value is not_constant:
+                return node
+            value.append(item_value)
+    else:
+        value = {}
+        for item in node["items"]:
+            # a key that is not a string is left for the evaluator to refuse
+            if item["key"]["tag"] != "string":
+                return node
+            item_value = constant_value(item["value"])
+            if item_value is not_constant:
+                return node
+            value[item["key"]["value"]] = item_value
+    return {"tag": "constant", "value": value}
+
+
+def parse_nested_expression(tokens, goal, precedence=1):
+    """
+    Parses a simple expression, complex expression or binary expression,
+    as named by goal, without recursing into nested operands.
+    """
+    tokens = token_stream(tokens)
+    # repeated leaves, and pure subtrees over shared children, are looked up
+    # here and shared when the parse interns them
+    leaves = tokens.leaves
+    subtrees = tokens.subtrees
+    flatten = tokens.flatten
+    constants = tokens.constants
+    stack = []
+    wanted = goal
+    while True:
+        # open constructs until an operand is complete
+        if wanted == "binary":
+            stack.append(("binary", precedence))
+            wanted = "complex"
+        if wanted == "complex":
+            stack.append(("suffix",))
+        token = tokens[0]
+        tag = token["tag"]
+        if tag in leaf_tags:
+            tokens.advance()
+            value = {"tag": tag, "value": token["value"]}
+            if leaves is not None:
+                # the type keeps 1 and 1.0 apart
+                value = leaves.setdefault((tag, type(value["value"]), value["value"]), value)
+        elif tag == "[":
+            tokens.advance()
+            if tokens[0]["tag"] != "]":
+                stack.append(("list", []))
+                wanted = "simple"
+                continue
+            tokens.advance()
+            value = {"tag": "list", "items": []}
+            if constants:
+                value = {"tag": "constant", "value": []}
+        elif tag == "{":
+            tokens.advance()
+            if tokens[0]["tag"] != "}":
+                stack.append(("key", []))
+                wanted = "simple"
+                continue
+            tokens.advance()
+            value = {"tag": "object", "items": []}
+            if constants:
+                value = {"tag": "constant", "value": {}}
+        elif tag == "-":
+            tokens.advance()
+            stack.append(("negate",))
+            wanted = "simple"
+            continue
+        elif tag == "!":
+            tokens.advance()
+            stack.append(("not",))
+            wanted = "simple"
+            continue
+        elif tag == "function":
+            value, tokens = parse_function_literal(tokens)
+        elif tag == "(":
+            tokens.advance()
+            stack.append(("paren",))
+            wanted = "binary"
+            precedence = binary_precedence["||"]
+            continue
+        else:
+            assert False, f"Unexpected token '{tag}' at position {token['position']}"
+
+        # hand the operand to the constructs waiting for it, closing each
+        # one that is now complete, until one needs another operand
+        while stack:
+            entry = stack.pop()
+            name = entry[0]
+            if name == "binary":
+                if len(entry) == 4:
+                    left = entry[2]
+                    operator = entry[3]
+                    if flatten and operator in chain_operators and left["tag"] == "chain" and left["operator"] == operator:
+                        # chains are never shared, so one can grow in place
+                        left["operands"].append(value)
+                        node = left
+                    elif flatten and operator in chain_operators and left["tag"] == operator:
+                        node = {"tag": "chain", "operator": operator, "operands": [left["left"], left["right"], value]}
+                    else:
+                        node = {"tag": operator, "left": left, "right": value}
+                        if subtrees is not None:
+                            node = subtrees.setdefault((operator, id(left), id(value)), node)
+                    value = node
+                tag = tokens[0]["tag"]
+                if binary_precedence.get(tag, 0) >= entry[1]:
+                    tokens.advance()
+                    # operands on the right bind tighter, which makes the operator left associative
+                    stack.append(("binary", entry[1], value, tag))
+                    wanted = "binary"
+                    precedence = binary_precedence[tag] + 1
+                    break
+            elif name == "suffix":
+                tag = tokens[0]["tag"]
+                if tag == "[":
+                    tokens.advance()
+                    stack.append(("index", value))
+                    wanted = "binary"
+                    precedence = binary_precedence["||"]
+                    break
+                if tag == ".":
+                    tokens.advance()
+                    assert (
+                        tokens[0]["tag"] == "identifier"
+                    ), f"Expected identifier at position {tokens[0]['position']}"
+                    index = {"tag": "string", "value": tokens[0]["value"]}
+                    if leaves is not None:
+                        index = leaves.setdefault(("string", str, index["value"]), index)
+                    node = {"tag": "complex", "base": value, "index": index}
+                    if subtrees is not None:
+                        node = subtrees.setdefault(("complex", id(value), id(index)), node)
+                    value = node
+                    stack.append(entry)
+                elif tag == "(":
+                    tokens.advance()
+                    if tokens[0]["tag"] != ")":
+                        stack.append(("call", value, []))
+                        wanted = "binary"
+                        precedence = binary_precedence["||"]
+                        break
+                    tokens.advance()
+                    value = {"tag": "call", "function": value, "arguments": []}
+                    stack.append(entry)
+            elif name == "index":
+                assert (
+                    tokens[0]["tag"] == "]"
+                ), f"Expected ']' at position {tokens[0]['position']}"
+                tokens.advance()
+                node = {"tag": "complex", "base": entry[1], "index": value}
+                if subtrees is not None:
+                    node = subtrees.setdefault(("complex", id(entry[1]), id(value)), node)
+                value = node
+                stack.append(("suffix",))
+            elif name == "call":
+                entry[2].append(value)
+                if tokens[0]["tag"] == ",":
+                    tokens.advance()
+                    stack.append(entry)
+                    wanted = "simple"
+                    break
+                assert (
+                    tokens[0]["tag"] == ")"
+                ), f"Expected ')' at position {tokens[0]['position']}"
+                tokens.advance()
+                value = {"tag": "call", "function": entry[1], "arguments": entry[2]}
+                stack.append(("suffix",))
+            elif name == "list":
+                entry[1].append(value)
+                if tokens[0]["tag"] == ",":
+                    tokens.advance()
+                    stack.append(entry)
+                    wanted = "simple"
+                    break
+                assert (
+                    tokens[0]["tag"] == "]"
+                ), f"Expected ']' at position {tokens[0]['position']}"
+                tokens.advance()
+                value = {"tag": "list", "items": entry[1]}
+                if constants:
+                    value = constant_literal(value)
+            elif name == "key":
+                assert (
+                    tokens[0]["tag"] == ":"
+                ), f"Expected ':' at position {tokens[0]['position']}"
+                tokens.advance()
+                stack.append(("value", entry[1], value))
+                wanted = "simple"
+                break
+            elif name == "value":
+                entry[1].append({"key": entry[2], "value": value})
+                if tokens[0]["tag"] == ",":
+                    tokens.advance()
+                    stack.append(("key", entry[1]))
+                    wanted = "simple"
+                    break
+                assert (
+                    tokens[0]["tag"] == "}"
+                ), f"Expected '}}' at position {tokens[0]['position']}"
+                tokens.advance()
+                value = {"tag": "object", "items": entry[1]}
+                if constants:
+                    value = constant_literal(value)
+            elif name == "paren":
+                assert (
+                    tokens[0]["tag"] == ")"
+                ), f"Expected ')' at position {tokens[0]['position']}"
+                tokens.advance()
+            else:
+                # negate and not
+                node = {"tag": name, "value": value}
+                if subtrees is not None:
+                    node = subtrees.setdefault((name, id(value)), node)
+                value = node
+        else:
+            return value, tokens
+
+
+def test_parse_binary_expression():
+    print("testing parse_binary_expression...")
+    ast, tokens = parse_binary_expression(tokenize("1"), 1)
+    assert ast == {"tag": "number", "value": 1}
+    assert tokens[0]["tag"] is None
+    # stops at operators looser than the requested level
+    ast, tokens = parse_binary_expression(tokenize("1*2+3"), binary_precedence["*"])
+    assert ast == {
+        "tag": "*",
+        "left": {"tag": "number", "value": 1},
+        "right": {"tag": "number", "value": 2},
+    }
+    assert tokens[0]["tag"] == "+"
+    ast, tokens = parse_binary_expression(tokenize("1-2-3/4/5"), 1)
+    assert ast == {
+        "tag": "-",
+        "left": {
+            "tag": "-",
+            "left": {"tag": "number", "value": 1},
+            "right": {"tag": "number", "value": 2},
+        },
+        "right": {
+            "tag": "/",
+            "left": {
+                "tag": "/",
+                "left": {"tag": "number", "value": 3},
+                "right": {"tag": "number", "value": 4},
+            },
+            "right": {"tag": "number", "value": 5},
+        },
+    }
+
+
 # ARITHMETIC EXPRESSIONS
 
 
@@ -501,12 +916,7 @@ def parse_arithmetic_term(tokens):
     """
     arithmetic_term = arithmetic_factor { ("*" | "/") arithmetic_factor } ;
     """
-    node, tokens = parse_arithmetic_factor(tokens)
-    while tokens[0]["tag"] in ["*", "/"]:
-        tag = tokens[0]["tag"]
-        next_node, tokens = parse_arithmetic_factor(tokens[1:])
-        node = {"tag": tag, "left": node, "right": next_node}
-    return node, tokens
+    return parse_binary_expression(tokens, binary_precedence["*"])
 
 
 def test_parse_arithmetic_term():
@@ -547,12 +957,7 @@ def parse_arithmetic_expression(tokens):
     """
     arithmetic_expression = arithmetic_term { ("+" | "-") arithmetic_term } ;
     """
-    node, tokens = parse_arithmetic_term(tokens)
-    while tokens[0]["tag"] in ["+", "-"]:
-        tag = tokens[0]["tag"]
-        next_node, tokens = parse_arithmetic_term(tokens[1:])
-        node = {"tag": tag, "left": node, "right": next_node}
-    return node, tokens
+    return parse_binary_expression(tokens, binary_precedence["+"])
 
 
 def test_parse_arithmetic_expression():
@@ -617,12 +1022,7 @@ def parse_relational_expression(tokens):
     """
     relational_expression = arithmetic_expression { ("<" | ">" | "<=" | ">=" | "==" | "!=") arithmetic_expression } ;
     """
-    node, tokens = parse_arithmetic_expression(tokens)
-    while tokens[0]["tag"] in ["<", ">", "<=", ">=", "==", "!="]:
-        tag = tokens[0]["tag"]
-        next_node, tokens = parse_arithmetic_expression(tokens[1:])
-        node = {"tag": tag, "left": node, "right": next_node}
-    return node, tokens
+    return parse_binary_expression(tokens, binary_precedence["<"])
 
 
 def test_parse_relational_expression():
@@ -677,12 +1077,7 @@ def parse_logical_term(tokens):
     """
     logical_term = logical_factor { "&&" logical_factor } ;
     """
-    node, tokens = parse_logical_factor(tokens)
-    while tokens[0]["tag"] == "&&":
-        tag = tokens[0]["tag"]
-        next_node, tokens = parse_logical_factor(tokens[1:])
-        node = {"tag": tag, "left": node, "right": next_node}
-    return node, tokens
+    return parse_binary_expression(tokens, binary_precedence["&&"])
 
 
 def test_parse_logical_term():
@@ -711,12 +1106,7 @@ def parse_logical_expression(tokens):
     """
     logical_expression = logical_term { "||" logical_term } ;
     """
-    node, tokens = parse_logical_term(tokens)
-    while tokens[0]["tag"] == "||":
-        tag = tokens[0]["tag"]
-        next_node, tokens = parse_logical_term(tokens[1:])
-        node = {"tag": tag, "left": node, "right": next_node}
-    return node, tokens
+    return parse_binary_expression(tokens, binary_precedence["||"])
 
 
 def test_parse_logical_expression():
@@ -749,7 +1139,7 @@ def parse_expression(tokens):
     """
     expression = logical_expression ;
     """
-    return parse_logical_expression(tokens)
+    return parse_binary_expression(tokens, binary_precedence["||"])
 
 
 def test_parse_expression():
@@ -767,25 +1157,27 @@ def test_parse_expression():
 
 def parse_statement_list(tokens):
     """
-    statement_list = "{" statement { ";" statement } "}" ;
+    statement_list = "{" [ statement { ";" statement } ] "}" ;
     """
+    tokens = token_stream(tokens)
     assert tokens[0]["tag"] == "{", f"Expected '{{' at position {tokens[0]['position']}"
-    tokens = tokens[1:]
+    tokens.advance()
     statements = []
     if tokens[0]["tag"] != "}":
         statement, tokens = parse_statement(tokens)
         statements.append(statement)
         while tokens[0]["tag"] == ";":
-            tokens = tokens[1:]
+            tokens.advance()
             statement, tokens = parse_statement(tokens)
             statements.append(statement)
     assert tokens[0]["tag"] == "}", f"Expected '}}' at position {tokens[0]['position']}"
-    return {"tag": "statement_list", "statements": statements}, tokens[1:]
+    tokens.advance()
+    return {"tag": "statement_list", "statements": statements}, tokens
 
 
 def test_parse_statement_list():
     """
-    statement_list = "{" statement { ";" statement } "}" ;
+    statement_list = "{" [ statement { ";" statement } ] "}" ;
     """
     print("testing parse_statement_list...")
     ast, tokens = parse_statement_list(tokenize("{}"))
@@ -812,31 +1204,41 @@ def parse_if_statement(tokens):
     """
     if_statement = "if" "(" expression ")" statement_list [ "else" (if_statement | statement_list) ] ;
     """
+    tokens = token_stream(tokens)
     assert tokens[0]["tag"] == "if"
-    tokens = tokens[1:]
-    if tokens[0]["tag"] != "(":
-        raise Exception(f"Expected '(': {tokens[0]}")
-    condition, tokens = parse_expression(tokens[1:])
-    if tokens[0]["tag"] != ")":
-        raise Exception(f"Expected ')': {tokens[0]}")
-    then_statement_list, tokens = parse_statement_list(tokens[1:])
-    node = {
-        "tag": "if",
-        "condition": condition,
-        "then": then_statement_list,
-    }
-    if tokens[0]["tag"] == "else":
-        tokens = tokens[1:]
+    ast = None
+    # an else-if chain is parsed in a loop, attaching each if to the one before
+    while True:
+        tokens.advance()
+        if tokens[0]["tag"] != "(":
+            raise Exception(f"Expected '(' at position {tokens[0]['position']}")
+        tokens.advance()
+        condition, tokens = parse_expression(tokens)
+        if tokens[0]["tag"] != ")":
+            raise Exception(f"Expected ')' at position {tokens[0]['position']}")
+        tokens.advance()
+        then_statement_list, tokens = parse_statement_list(tokens)
+        node = {
+            "tag": "if",
+            "condition": condition,
+            "then": then_statement_list,
+        }
+        if ast is None:
+            ast = node
+        else:
+            parent["else"] = node
+        parent = node
+        if tokens[0]["tag"] != "else":
+            return ast, tokens
+        tokens.advance()
         assert tokens[0]["tag"] in [
             "{",
             "if",
         ], "Else must be followed by statement_list or if statement."
         if tokens[0]["tag"] == "{":
             else_statement_list, tokens = parse_statement_list(tokens)
-        else:
-            else_statement_list, tokens = parse_if_statement(tokens)
-        node["else"] = else_statement_list
-    return node, tokens
+            node["else"] = else_statement_list
+            return ast, tokens
 
 
 def test_parse_if_statement():
@@ -878,14 +1280,17 @@ def parse_while_statement(tokens):
     """
     while_statement = "while" "(" expression ")" statement_list ;
     """
+    tokens = token_stream(tokens)
     assert tokens[0]["tag"] == "while"
-    tokens = tokens[1:]
+    tokens.advance()
     if tokens[0]["tag"] != "(":
-        raise Exception(f"Expected '(': {tokens[0]}")
-    condition, tokens = parse_expression(tokens[1:])
+        raise Exception(f"Expected '(' at position {tokens[0]['position']}")
+    tokens.advance()
+    condition, tokens = parse_expression(tokens)
     if tokens[0]["tag"] != ")":
-        raise Exception(f"Expected ')': {tokens[0]}")
-    do_statement_list, tokens = parse_statement_list(tokens[1:])
+        raise Exception(f"Expected ')' at position {tokens[0]['position']}")
+    tokens.advance()
+    do_statement_list, tokens = parse_statement_list(tokens)
     return {"tag": "while", "condition": condition, "do": do_statement_list}, tokens
 
 
@@ -909,8 +1314,9 @@ def parse_return_statement(tokens):
     """
     return_statement = "return" [ expression ] ;
     """
+    tokens = token_stream(tokens)
     assert tokens[0]["tag"] == "return"
-    tokens = tokens[1:]
+    tokens.advance()
     if tokens[0]["tag"] in ["}", ";", None]:
         value = None
         return {"tag": "return"}, tokens
@@ -940,8 +1346,9 @@ def parse_print_statement(tokens):
     """
     print_statement = "print" [ expression ] ;
     """
+    tokens = token_stream(tokens)
     assert tokens[0]["tag"] == "print"
-    tokens = tokens[1:]
+    tokens.advance()
     if tokens[0]["tag"] in ["}", ";", None]:
         # no expression
         return {"tag": "print", "value": None}, tokens
@@ -965,7 +1372,7 @@ def parse_assignment_statement(tokens):
     """
     target, tokens = parse_expression(tokens)
     if tokens[0]["tag"] == "=":
-        tokens = tokens[1:]
+        tokens.advance()
         value, tokens = parse_expression(tokens)
         return {"tag": "assign", "target": target, "value": value}, tokens
     return target, tokens
@@ -990,17 +1397,15 @@ def parse_function_statement(tokens):
     """
     function_statement = "function" identifier "(" [ identifier { "," identifier } ] ")" statement_list ;
     """
+    tokens = token_stream(tokens)
     assert tokens[0]["tag"] == "function"
-    tokens = tokens[1:]
+    tokens.advance()
     assert tokens[0]["tag"] == "identifier"
-    identifier_token = tokens[0]
-    tokens = tokens[1:]
-    tokens = [
-        identifier_token,
-        {"tag": "=", "value": "="},
-        {"tag": "function", "value": "function"},
-    ] + tokens
-    return parse_assignment_statement(tokens)
+    identifier_token = tokens.advance()
+    # syntactic sugar for identifier = function(...) {...}
+    value, tokens = parse_function_definition(tokens)
+    target = {"tag": "identifier", "value": identifier_token["value"]}
+    return {"tag": "assign", "target": target, "value": value}, tokens
 
 
 def test_parse_function_statement():
@@ -1027,6 +1432,17 @@ def parse_statement(tokens):
     """
     statement = if_statement | while_statement |  function_statement | return_statement | print_statement | assignment_statement ;
     """
+    tokens = token_stream(tokens)
+    positions = tokens.positions
+    if positions is None:
+        return parse_statement_kind(tokens)
+    position = tokens[0]["position"]
+    statement, tokens = parse_statement_kind(tokens)
+    positions[id(statement)] = position
+    return statement, tokens
+
+
+def parse_statement_kind(tokens):
     tag = tokens[0]["tag"]
     # note: none of these consumes a token
     # if tag == "{":
@@ -1081,18 +1497,24 @@ def parse_program(tokens):
     """
     program = [ statement { ";" statement } ] ;
     """
-    statements = []
+    tokens = token_stream(tokens)
+    statements = list(parse_statements(tokens))
+    return {"tag": "program", "statements": statements}, tokens
+
+
+def parse_statements(tokens):
+    # the statements of a program, yielded as each one is parsed
     if tokens[0]["tag"]:
         statement, tokens = parse_statement(tokens)
-        statements.append(statement)
+        yield statement
         while tokens[0]["tag"] == ";":
-            tokens = tokens[1:]
+            tokens.advance()
             statement, tokens = parse_statement(tokens)
-            statements.append(statement)
+            yield statement
     assert (
         tokens[0]["tag"] == None
     ), f"Expected end of input at position {tokens[0]['position']}, got [{tokens[0]}]"
-    return {"tag": "program", "statements": statements}, tokens[1:]
+    tokens.advance()
 
 
 def test_parse_program():
@@ -1108,9 +1530,37 @@ def test_parse_program():
     }
 
 
-def parse(tokens):
-    ast, tokens = parse_program(tokens)
-    return ast
+def parse(tokens, line_index=None, lazy=False, intern=None, flatten=False, constants=False, positions=None):
+    statements = list(iter_parse(tokens, line_index, lazy, intern, flatten, constants, positions))
+    return {"tag": "program", "statements": statements}
+
+
+def iter_parse(tokens, line_index=None, lazy=False, intern=None, flatten=False, constants=False, positions=None):
+    """Yields the top-level statements of a program as each one is parsed.
+    tokens may be a list, or an iterator that is read only as far as the
+    statement being parsed. intern="leaves" makes repeated identifiers and
+    literals share one node, and intern="subtrees" also shares repeated
+    operator, index and negation subtrees; the tree must then be treated
+    as read only. flatten turns long chains of +, *, && or || into single
+    "chain" nodes, and constants turns list and object literals of numbers
+    and strings into "constant" nodes holding their value. positions, a
+    dict, is filled with {id(statement): position of its first token} for
+    every statement parsed, including those of lazy bodies when they are."""
+    assert intern in [None, "leaves", "subtrees"], f"Unknown intern mode {intern}"
+    tokens = token_stream(tokens)
+    tokens.lazy = lazy
+    tokens.leaves = {} if intern is not None else None
+    tokens.subtrees = {} if intern == "subtrees" else None
+    tokens.flatten = flatten
+    tokens.constants = constants
+    tokens.positions = positions
+    try:
+        yield from parse_statements(tokens)
+    except Exception as error:
+        # report positions as lines and columns when the source was indexed
+        if line_index is not None:
+            error.args = (line_index.describe_positions(str(error)),)
+        raise
 
 
 def test_parse():
@@ -1169,6 +1619,202 @@ def test_parse():
     }
 
 
+def test_parse_error_location():
+    print("testing parse error locations")
+    line_index = LineIndex()
+    tokens = tokenize("x = 1;\nif (x {\n  print x\n}", line_index=line_index)
+    try:
+        parse(tokens, line_index)
+        assert False, "Should have a parse error for the missing ')'."
+    except Exception as e:
+        assert "Expected ')' at line 2, column 7" in str(e), str(e)
+    try:
+        parse(tokenize("x = [1, 2"))
+        assert False, "Should have a parse error for the missing ']'."
+    except AssertionError as e:
+        assert "Expected ']' at position 9" in str(e), str(e)
+
+
+def test_parse_deep_nesting():
+    print("testing deeply nested input")
+    depth = 20000
+    # compare by walking down the tree; == on nested dicts would itself recurse
+    ast = parse_expression(tokenize("[" * depth + "1" + "]" * depth))[0]
+    for _ in range(depth):
+        assert ast["tag"] == "list" and len(ast["items"]) == 1
+        ast = ast["items"][0]
+    assert ast == {"tag": "number", "value": 1}
+    ast = parse_expression(tokenize("(" * depth + "-" * depth + "x" + ")" * depth))[0]
+    for _ in range(depth):
+        assert ast["tag"] == "negate"
+        ast = ast["value"]
+    assert ast == {"tag": "identifier", "value": "x"}
+    ast = parse_expression(tokenize('{"a":' * depth + "1" + "}" * depth + "[0]"))[0]
+    assert ast["tag"] == "complex" and ast["index"] == {"tag": "number", "value": 0}
+    ast = ast["base"]
+    for _ in range(depth):
+        assert ast["tag"] == "object" and ast["items"][0]["key"]["value"] == "a"
+        ast = ast["items"][0]["value"]
+    assert ast == {"tag": "number", "value": 1}
+    ast = parse(tokenize("if(x){1}" + " else if(x){2}" * depth + " else {3}"))
+    ast = ast["statements"][0]
+    for _ in range(depth):
+        ast = ast["else"]
+        assert ast["tag"] == "if" and ast["then"]["statements"][0]["value"] == 2
+    assert ast["else"] == {
+        "tag": "statement_list",
+        "statements": [{"tag": "number", "value": 3}],
+    }
+
+
+def test_parse_lazy():
+    print("testing lazy parsing")
+    code = "function f(x) { if (x) { return {1: [2]} } }; g = function() { return f(1) }; g()"
+    eager = parse(tokenize(code))
+    ast = parse(tokenize(code), lazy=True)
+    f = ast["statements"][0]["value"]
+    g = ast["statements"][1]["value"]
+    assert type(f) is LazyFunction and "body" not in f
+    assert f["parameters"] == [{"tag": "identifier", "value": "x", "position": 11}]
+    # the body is parsed when it is first looked up
+    assert f["body"] == eager["statements"][0]["value"]["body"]
+    assert "body" in f and "body" not in g
+    assert ast == eager
+    # errors in a skipped body show up when it is parsed
+    ast = parse(tokenize("function f() { 1 + }; 2"), lazy=True)
+    try:
+        ast["statements"][0]["value"]["body"]
+        assert False, "the body should fail to parse"
+    except AssertionError as e:
+        assert "Unexpected token '}' at position 19" in str(e), str(e)
+    # an unclosed body is parsed at once
+    try:
+        parse(tokenize("function f() { 1"), lazy=True)
+        assert False, "the unclosed body should fail to parse"
+    except AssertionError as e:
+        assert "Expected '}' at position 16" in str(e), str(e)
+
+
+def test_iter_parse():
+    print("testing iter_parse")
+    code = "x = [1, {2: 3}]; function f(y) { return y }; if (x) { print f(x) } else { print 2 }"
+    statements = iter_parse(iter(tokenize(code)))
+    assert next(statements) == parse(tokenize("x = [1, {2: 3}]"))["statements"][0]
+    assert [statement["tag"] for statement in statements] == ["assign", "if"]
+    assert parse(iter(tokenize(code))) == parse(tokenize(code))
+    assert parse(iter(tokenize(code)), lazy=True) == parse(tokenize(code))
+
+    # statements come out before the rest of the input has been tokenized
+    pulled = []
+
+    def source():
+        for token in tokenize("print 1; print 2; 3 +"):
+            pulled.append(token)
+            yield token
+
+    statements = iter_parse(source())
+    assert next(statements) == {"tag": "print", "value": {"tag": "number", "value": 1}}
+    assert len(pulled) == 3
+    assert next(statements)["tag"] == "print"
+    try:
+        next(statements)
+        assert False, "the last statement should fail to parse"
+    except AssertionError as e:
+        assert "Unexpected token 'None' at position 21" in str(e), str(e)
+
+    try:
+        parse(iter(tokenize("function f() { 1")), lazy=True)
+        assert False, "the unclosed body should fail to parse"
+    except AssertionError as e:
+        assert "Expected '}' at position 16" in str(e), str(e)
+
+    # a pipe holds only the tokens looked at but not consumed
+    tokens = token_stream(iter(tokenize("function f() { if (x) { 1 } }; 2")))
+    assert isinstance(tokens, TokenPipe)
+    parse_statement(tokens)
+    assert len(tokens.ahead) == 0 and tokens[0]["tag"] == ";"
+    assert tokens[1]["value"] == 2 and len(tokens.ahead) == 1
+
+
+def test_parse_intern():
+    print("testing interned parsing")
+    code = 'x = a + 1; y = a + 1; z = 1.0 + -a[1]; w = -a[1]; v = b["c"]; u = b["c"]'
+    plain = parse(tokenize(code))
+    ast = parse(tokenize(code), intern="leaves")
+    assert ast == plain
+    x, y, z, w, v, u = [statement["value"] for statement in ast["statements"]]
+    assert x is not y and x["left"] is y["left"] and x["right"] is y["right"]
+    # equal values of different types stay apart
+    assert z["left"] == {"tag": "number", "value": 1.0} and z["left"] is not x["right"]
+    ast = parse(tokenize(code), intern="subtrees")
+    assert ast == plain
+    x, y, z, w, v, u = [statement["value"] for statement in ast["statements"]]
+    assert x is y and z["right"] is w and v is u
+    # statements and lists are never shared
+    ast = parse(tokenize("[a]; [a]"), intern="subtrees")
+    first, second = ast["statements"]
+    assert first is not second and first["items"][0] is second["items"][0]
+    ast = parse(tokenize("function f() { return a + 1 }; a + 1"), lazy=True, intern="subtrees")
+    body = ast["statements"][0]["value"]["body"]
+    assert body["statements"][0]["value"] is ast["statements"][1]
+
+
+def test_parse_flatten():
+    print("testing flattened chains")
+    ast = parse(tokenize("x = a + b + c * d * e - f + g"), flatten=True)
+    a, b, c, d, e, f, g = [{"tag": "identifier", "value": name} for name in "abcdefg"]
+    assert ast["statements"][0]["value"] == {
+        "tag": "+",
+        "left": {
+            "tag": "-",
+            "left": {
+                "tag": "chain",
+                "operator": "+",
+                "operands": [a, b, {"tag": "chain", "operator": "*", "operands": [c, d, e]}],
+            },
+            "right": f,
+        },
+        "right": g,
+    }
+    # two operands, and chains grouped to the right, stay binary
+    assert parse(tokenize("a && (b && c)"), flatten=True) == parse(tokenize("a && (b && c)"))
+    ast = parse(tokenize("(a || b) || c || d"), flatten=True, intern="subtrees")
+    assert ast["statements"][0] == {"tag": "chain", "operator": "||", "operands": [a, b, c, d]}
+    ast = parse(tokenize("1" + " + 1" * 100000), flatten=True)
+    assert len(ast["statements"][0]["operands"]) == 100001
+
+
+def test_parse_constants():
+    print("testing constant literals")
+    ast = parse(tokenize('x = [1, -2.5, "a", [], {"b": [3, {}]}]'), constants=True)
+    assert ast["statements"][0]["value"] == {"tag": "constant", "value": [1, -2.5, "a", [], {"b": [3, {}]}]}
+    # anything computed, and keys that are not strings, keep the literal
+    ast = parse(tokenize('x = [1, y, [2, 3]]; z = {1: 2}; w = [(1 + 2)]'), constants=True)
+    x, z, w = [statement["value"] for statement in ast["statements"]]
+    assert x["tag"] == "list" and x["items"][2] == {"tag": "constant", "value": [2, 3]}
+    assert z["tag"] == "object" and w["tag"] == "list"
+    assert parse(tokenize('x = {"a": 1, "a": 2}'), constants=True)["statements"][0]["value"]["value"] == {"a": 2}
+
+
+def test_parse_positions():
+    print("testing statement positions")
+    positions = {}
+    code = "x = 1; if (x) { print x; f(x) }; function g() { return 2 }"
+    ast = parse(tokenize(code), positions=positions)
+    assign, if_, function = ast["statements"]
+    print_, call = if_["then"]["statements"]
+    body = function["value"]["body"]["statements"][0]
+    for statement, text in [(assign, "x = 1"), (if_, "if"), (print_, "print"), (call, "f(x)"), (function, "function g"), (body, "return")]:
+        assert positions[id(statement)] == code.index(text), text
+    assert len(positions) == 6
+    # the statements of a lazy body are recorded when it is parsed
+    positions = {}
+    ast = parse(tokenize(code), lazy=True, positions=positions)
+    assert len(positions) == 5
+    ast["statements"][2]["value"]["body"]
+    assert len(positions) == 6
+
+
 if __name__ == "__main__":
     # List of all test functions
     test_functions = [
@@ -1210,3 +1856,12 @@ if __name__ == "__main__":
         print(f"Untested grammar = [[[ {test_grammar} ]]]")
 
     test_parse()
+    test_parse_binary_expression()
+    test_parse_error_location()
+    test_parse_deep_nesting()
+    test_parse_lazy()
+    test_iter_parse()
+    test_parse_intern()
+    test_parse_flatten()
+    test_parse_constants()
+    test_parse_positions()
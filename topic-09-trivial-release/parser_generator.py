@@ -0,0 +1,485 @@
+import hashlib
+import os
+import re
+import sys
+from pprint import pformat
+
+from parser import grammar
+
+# Compiles the EBNF grammar string in parser.py into the tables of an LL
+# parser, written out as grammar_tables.py and driven by grammar_parser.py.
+#
+# Each rule is rewritten into plain productions, with a helper nonterminal
+# named "rule.n" for every group, [option] and {repetition}. Quoted strings
+# and <classes> are token tags, as are bare names that are not rules, such
+# as identifier. The table maps a nonterminal and the tag of the next token
+# to the production to use; where one tag starts two productions, as
+# "function" does for a statement, the tag of the token after it decides.
+#
+# Every nonterminal that a lookahead selects is expanded here, ahead of
+# time, as far as that lookahead decides the expansion, so the parser does
+# one table lookup for each token rather than one for each rule it passes
+# through on the way down. On the way back up, the operator levels that an
+# operand ends are skipped with one lookup too, by merging each run of
+# helpers that can match nothing into one nonterminal.
+
+tables_filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), "grammar_tables.py")
+
+grammar_pattern = re.compile(r'\s*(?:("[^"]*")|(<\w+>)|(\w+)|(.))')
+
+
+def read_grammar(text):
+    """Returns the rules of an EBNF grammar as {name: expression}, with
+    expressions as nested tuples: ("alternatives", [...]), ("sequence",
+    [...]), ("option", e), ("repeat", e), ("name", n) and ("tag", t)."""
+    tokens = []
+    for match in grammar_pattern.finditer(text.strip()):
+        quoted, tag_class, name, symbol = match.groups()
+        if quoted:
+            tokens.append(("tag", quoted[1:-1]))
+        elif tag_class:
+            tokens.append(("tag", tag_class[1:-1]))
+        elif name:
+            tokens.append(("name", name))
+        else:
+            tokens.append(("symbol", symbol))
+    tokens.append(("symbol", None))
+    position = 0
+
+    def expect(symbol):
+        nonlocal position
+        assert tokens[position] == ("symbol", symbol), f"Expected '{symbol}' in grammar, got {tokens[position]}"
+        position += 1
+
+    def read_alternatives():
+        alternatives = [read_sequence()]
+        while tokens[position] == ("symbol", "|"):
+            expect("|")
+            alternatives.append(read_sequence())
+        return alternatives[0] if len(alternatives) == 1 else ("alternatives", alternatives)
+
+    def read_sequence():
+        nonlocal position
+        items = []
+        while True:
+            kind, value = tokens[position]
+            if kind in ["tag", "name"]:
+                items.append((kind, value))
+                position += 1
+            elif value in ["(", "[", "{"]:
+                position += 1
+                inner = read_alternatives()
+                closing = {"(": ")", "[": "]", "{": "}"}[value]
+                expect(closing)
+                items.append(inner if value == "(" else ("option" if value == "[" else "repeat", inner))
+            else:
+                return items[0] if len(items) == 1 else ("sequence", items)
+
+    rules = {}
+    while tokens[position] != ("symbol", None):
+        kind, name = tokens[position]
+        assert kind == "name", f"Expected a rule name in grammar, got {tokens[position]}"
+        assert name not in rules, f"Rule [{name}] is defined twice"
+        position += 1
+        expect("=")
+        rules[name] = read_alternatives()
+        expect(";")
+    return rules
+
+
+def productions_of(rules):
+    """Rewrites the rules into {nonterminal: [production, ...]}, each
+    production being a tuple of nonterminal names and token tags."""
+    productions = {}
+
+    def symbols(rule, expression):
+        kind = expression[0]
+        if kind == "tag":
+            return [expression[1]]
+        if kind == "name":
+            # names that are not rules are token tags, like identifier
+            return [expression[1]]
+        if kind == "sequence":
+            return [symbol for item in expression[1] for symbol in symbols(rule, item)]
+        helper = f"{rule}.{sum(name.startswith(rule + '.') for name in productions) + 1}"
+        productions[helper] = []
+        if kind == "alternatives":
+            productions[helper] = [tuple(symbols(rule, item)) for item in expression[1]]
+        elif kind == "option":
+            productions[helper] = [tuple(symbols(rule, expression[1])), ()]
+        else:
+            productions[helper] = [tuple(symbols(rule, expression[1])) + (helper,), ()]
+        return [helper]
+
+    for rule, expression in rules.items():
+        productions[rule] = []
+        if expression[0] == "alternatives":
+            productions[rule] = [tuple(symbols(rule, item)) for item in expression[1]]
+        else:
+            productions[rule] = [tuple(symbols(rule, expression))]
+    return productions
+
+
+def first_sets(productions, k):
+    """Returns {nonterminal: set of tuples}, the first k tags of everything
+    each nonterminal derives; shorter tuples end where the derivation does."""
+    first = {name: set() for name in productions}
+
+    def of(sequence):
+        result = {()}
+        for symbol in sequence:
+            if all(len(prefix) >= k for prefix in result):
+                break
+            starts = first[symbol] if symbol in productions else {(symbol,)}
+            result = {
+                prefix if len(prefix) >= k else (prefix + start)[:k] for prefix in result for start in starts
+            }
+        return result
+
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in productions.items():
+            for production in alternatives:
+                new = of(production) - first[name]
+                if new:
+                    first[name] |= new
+                    changed = True
+    return first, of
+
+
+def follow_sets(productions, start, first, of):
+    """Returns {nonterminal: set of tags that can come after it}, with None
+    for the end of input."""
+    follow = {name: set() for name in productions}
+    follow[start].add(None)
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in productions.items():
+            for production in alternatives:
+                for i, symbol in enumerate(production):
+                    if symbol not in productions:
+                        continue
+                    new = set()
+                    for prefix in of(production[i + 1 :]):
+                        if prefix:
+                            new.add(prefix[0])
+                        else:
+                            new |= follow[name]
+                    if new - follow[symbol]:
+                        follow[symbol] |= new
+                        changed = True
+    return follow
+
+
+def predict_table(productions, start):
+    """Returns {nonterminal: {tag: production}}. Where a tag starts more than
+    one production, the entry is {second tag: production} instead."""
+    first, of = first_sets(productions, 2)
+    follow = follow_sets(productions, start, first, of)
+
+    def lookaheads(name, production):
+        # the first two tags of the production, followed by what follows name
+        result = set()
+        for prefix in of(production):
+            if len(prefix) == 2:
+                result.add(prefix)
+            elif len(prefix) == 1:
+                result |= {(prefix[0], tag) for tag in follow[name]}
+            else:
+                result |= {(tag, None) for tag in follow[name]}
+        return result
+
+    table = {}
+    for name, alternatives in productions.items():
+        candidates = {}
+        for production in alternatives:
+            for pair in lookaheads(name, production):
+                candidates.setdefault(pair[0], {}).setdefault(pair[1], set()).add(production)
+        row = table[name] = {}
+        for tag, seconds in candidates.items():
+            chosen = set().union(*seconds.values())
+            if len(chosen) == 1:
+                row[tag] = chosen.pop()
+                continue
+            for second, choices in seconds.items():
+                assert len(choices) == 1, f"Grammar is not LL(2): [{name}] on {tag!r} {second!r} starts {sorted(choices)}"
+            row[tag] = {second: choices.pop() for second, choices in seconds.items()}
+    return table
+
+
+def generate(text=grammar, start="program"):
+    """Returns the tables of the parser for the grammar text, as the dict
+    that grammar_tables.py holds."""
+    rules = read_grammar(text)
+    productions = productions_of(rules)
+    table = predict_table(productions, start)
+    nonterminals = list(productions)
+    number = {name: i for i, name in enumerate(nonterminals)}
+    # a rule made only of alternative single rules, like statement, passes
+    # its one value up without a node of its own
+    passing = {
+        name
+        for name, alternatives in productions.items()
+        if name in rules and all(len(p) == 1 and p[0] in rules for p in alternatives)
+    }
+    reducing = [name for name in rules if name not in passing]
+    # a rule that starts with a rule and goes on with an option or a
+    # repetition, like arithmetic_term, is reduced each time its tail
+    # matches, over the value so far and the tail, and not at all when the
+    # first rule stands alone: {tail: rule}
+    tails = {
+        production[1]: name
+        for name, (production, *others) in productions.items()
+        if name in rules and not others and len(production) == 2 and production[0] in rules and production[1] not in rules
+    }
+
+    def push(stack, name, production):
+        # pushes a production of name, with any reduction it ends in, and
+        # returns where the reduction's values start: 0 for the next value
+        # to come, -1 for the value before it, or None with no reduction
+        mark = None
+        if name in tails and production:
+            reduction = -1 - reducing.index(tails[name])
+            if production[-1] == name:
+                # a repetition: reduce before the next round
+                production = production[:-1] + (reduction, name)
+            else:
+                production = production + (reduction,)
+            mark = -1
+        elif name in reducing and name not in tails.values():
+            stack.append(-1 - reducing.index(name))
+            mark = 0
+        stack.extend(number.get(symbol, symbol) if type(symbol) is str else symbol for symbol in reversed(production))
+        return mark
+
+    def expand(name, tag):
+        # what the parser pushes, from the bottom up, for name on tag, as
+        # far as tag decides it: nonterminals are numbers, the reduction of
+        # a rule is -1 - its index in reducing, and tags are strings. marks
+        # is the number of reductions whose values start with the next
+        # value, or -1 for one that starts with the value before it
+        stack = [number[name]]
+        marks = 0
+        shift = False
+        while stack:
+            top = stack[-1]
+            if type(top) is str:
+                assert top == tag, f"[{name}] on {tag!r} expects {top!r}"
+                shift = True
+                stack.pop()
+                break
+            if top < 0:
+                break
+            production = table[nonterminals[top]].get(tag)
+            if production is None or type(production) is dict:
+                break
+            stack.pop()
+            mark = push(stack, nonterminals[top], production)
+            if mark == -1:
+                assert marks == 0, f"[{name}] on {tag!r} reduces a tail inside another rule"
+                marks = -1
+            elif mark == 0:
+                assert marks >= 0, f"[{name}] on {tag!r} reduces a tail inside another rule"
+                marks += 1
+        if shift and marks > 0 and stack and type(stack[-1]) is int and stack[-1] < 0:
+            # a rule of the one token, like a leaf simple_expression, is
+            # reduced as the token is shifted: shift is then the reduction
+            shift = stack.pop()
+            marks -= 1
+        return [tuple(stack), marks, shift]
+
+    def encode(name, production):
+        # a production that needs a second tag is expanded when it is chosen
+        stack = []
+        mark = push(stack, name, production)
+        return [tuple(stack), {None: 0, 0: 1, -1: -1}[mark], False]
+
+    def tag_order(tag):
+        # the end of input, None, sorts first; sorting keeps the file stable
+        return (tag is not None, tag or "")
+
+    empty = [(), 0, False]
+    rows = []
+    # what a nonterminal does on a tag missing from its row, which is to
+    # match nothing, or None when it cannot
+    defaults = []
+    for name in nonterminals:
+        row = {}
+        for tag in sorted(table[name], key=tag_order):
+            production = table[name][tag]
+            if type(production) is dict:
+                row[tag] = {second: encode(name, production[second]) for second in sorted(production, key=tag_order)}
+            else:
+                row[tag] = expand(name, tag)
+        default = None
+        for entry in row.values():
+            if type(entry) is list and not entry[2] and all(symbol < 0 for symbol in entry[0] if type(symbol) is int):
+                default = entry
+        rows.append({tag: entry for tag, entry in row.items() if entry != default})
+        defaults.append(default)
+
+    # after an operand the stack holds a run of helpers that usually match
+    # nothing, one for each operator level. each such run becomes a single
+    # nonterminal whose row goes straight to the first helper that matches
+    # the tag, so a tag costs one lookup however many levels it skips.
+    runs = {}
+    pending = []
+
+    def merge(stack):
+        result = []
+        run = []
+        for symbol in stack + (None,):
+            if type(symbol) is int and symbol >= 0 and defaults[symbol] == empty:
+                run.append(symbol)
+                continue
+            if len(run) > 1:
+                members = tuple(run)
+                if members not in runs:
+                    runs[members] = len(nonterminals)
+                    nonterminals.append(" ".join(nonterminals[member] for member in reversed(members)))
+                    defaults.append(empty)
+                    pending.append(members)
+                result.append(runs[members])
+            else:
+                result.extend(run)
+            run = []
+            if symbol is not None:
+                result.append(symbol)
+        return tuple(result)
+
+    def merged(entry, below=()):
+        if type(entry) is dict:
+            return {second: merged(choice, below) for second, choice in entry.items()}
+        return [merge(below + entry[0]), entry[1], entry[2]]
+
+    plain = rows
+    rows = [{tag: merged(entry) for tag, entry in row.items()} for row in plain]
+    while pending:
+        members = pending.pop(0)
+        row = {}
+        # the topmost helper that matches a tag is the one to expand
+        for i in reversed(range(len(members))):
+            for tag, entry in plain[members[i]].items():
+                if tag not in row:
+                    row[tag] = merged(entry, members[:i])
+        rows.append({tag: row[tag] for tag in sorted(row, key=tag_order)})
+
+    return {
+        "grammar_hash": grammar_hash(text),
+        "start": number[start],
+        "nonterminals": nonterminals,
+        "reducing": reducing,
+        "defaults": defaults,
+        "rows": rows,
+    }
+
+
+def grammar_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def render(tables):
+    lines = [
+        "# Generated by parser_generator.py from the grammar in parser.py. Do not edit;",
+        "# run `python parser_generator.py --write` after changing the grammar.",
+        "",
+    ]
+    for key, value in tables.items():
+        if key != "rows":
+            lines.append(f"{key} = {pformat(value, width=100, sort_dicts=False)}")
+            lines.append("")
+    # one line for each nonterminal and tag: [stack to push, marks, shift],
+    # where shift is True, False or the reduction to apply to the one token
+    lines.append("rows = [")
+    for name, row in zip(tables["nonterminals"], tables["rows"]):
+        lines.append(f"    # {name}")
+        lines.append("    {")
+        for tag, entry in row.items():
+            lines.append(f"        {tag!r}: {entry!r},")
+        lines.append("    },")
+    lines.append("]")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def write_tables(filename=tables_filename):
+    source = render(generate())
+    with open(filename, "w") as f:
+        f.write(source)
+
+
+def test_read_grammar():
+    print("testing read_grammar")
+    rules = read_grammar('a = "x" { "," b } ; b = identifier [ <number> ] | ( "(" a ")" ) ;')
+    assert rules == {
+        "a": ("sequence", [("tag", "x"), ("repeat", ("sequence", [("tag", ","), ("name", "b")]))]),
+        "b": (
+            "alternatives",
+            [
+                ("sequence", [("name", "identifier"), ("option", ("tag", "number"))]),
+                ("sequence", [("tag", "("), ("name", "a"), ("tag", ")")]),
+            ],
+        ),
+    }
+    assert set(read_grammar(grammar)) >= {"program", "statement", "expression", "simple_expression"}
+
+
+def test_productions_of():
+    print("testing productions_of")
+    productions = productions_of(read_grammar('a = "x" { "," b } ; b = identifier [ <number> ] ;'))
+    assert productions == {
+        "a": [("x", "a.1")],
+        "a.1": [(",", "b", "a.1"), ()],
+        "b": [("identifier", "b.1")],
+        "b.1": [("number",), ()],
+    }
+
+
+def test_predict_table():
+    print("testing predict_table")
+    productions = productions_of(read_grammar('s = f | e ; f = "function" identifier ; e = "function" "(" ")" | identifier ;'))
+    table = predict_table(productions, "s")
+    assert table["s"] == {"function": {"identifier": ("f",), "(": ("e",)}, "identifier": ("e",)}
+    assert table["e"]["identifier"] == ("identifier",)
+    try:
+        predict_table(productions_of(read_grammar('s = "a" "b" | "a" "b" "c" ;')), "s")
+        assert False, "an LL(3) grammar should be refused"
+    except AssertionError as e:
+        assert "not LL(2)" in str(e)
+
+
+def test_generate():
+    print("testing generate")
+    tables = generate()
+    nonterminals = tables["nonterminals"]
+    assert nonterminals[tables["start"]] == "program"
+    assert "statement" not in tables["reducing"] and "expression" not in tables["reducing"]
+    row = tables["rows"][nonterminals.index("statement")]
+    # a statement starting with a number goes all the way down to the leaf
+    stack, marks, shift = row["number"]
+    assert shift == -1 - tables["reducing"].index("simple_expression")
+    assert marks == len([symbol for symbol in stack if type(symbol) is int and symbol < 0])
+    # and the operator levels it can end are one merged nonterminal
+    assert "complex_expression.1 arithmetic_term.1" in nonterminals[stack[-1]]
+    assert type(row["function"]) is dict and set(row["function"]) == {"identifier", "("}
+
+
+def test_tables_are_current():
+    print("testing grammar_tables.py is current")
+    with open(tables_filename) as f:
+        assert f.read() == render(generate()), "run `python parser_generator.py --write`"
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--write"]:
+        write_tables()
+        print(f"wrote {tables_filename}")
+    else:
+        test_read_grammar()
+        test_productions_of()
+        test_predict_table()
+        test_generate()
+        test_tables_are_current()
+        print("done.")
@@ -1,24 +1,121 @@
 #!/usr/bin/env python
 
+import argparse
+import mmap
 import sys
 
-from tokenizer import tokenize
+from tokenizer import tokenize, iter_tokenize, LineIndex
 
-from parser import parse
+from parser import parse, iter_parse
 
 from evaluator import evaluate
 
+import compiler
+
+import vm
+
+import transpiler
+
+from cache import cached_parse
+
+from nodes import from_dict, tree_memory
+
+from optimizer import fold_constants
+
+def read_tokens(filename, options, line_index):
+    if options.mmap:
+        # tokenize straight from the mapped file, without copying it into a str
+        with open(filename, 'rb') as f:
+            if f.seek(0, 2) == 0:
+                return tokenize(b"", line_index=line_index)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return tokenize(buffer, line_index=line_index)
+    with open(filename, 'r') as f:
+        return list(iter_tokenize(f, line_index=line_index))
+
+def run_stream(options, environment):
+    # tokens are pulled from the file as the parser needs them, and each
+    # statement runs before the next is read
+    line_index = LineIndex()
+    folded = 0
+    with open(options.filename, 'r') as f:
+        tokens = iter_tokenize(f, line_index=line_index)
+        for statement in iter_parse(tokens, line_index, lazy=options.lazy, intern=options.intern, flatten=options.flatten, constants=options.constants):
+            if options.fold:
+                program, count = fold_constants({"tag": "program", "statements": [statement]})
+                statement = program["statements"][0]
+                folded += count
+            value, return_chain = options.engine(statement, environment)
+            if return_chain:
+                break
+    if options.fold:
+        print(f"folded {folded} nodes", file=sys.stderr)
+
 def main():
+    argument_parser = argparse.ArgumentParser(description="Run a trivial program.")
+    argument_parser.add_argument("filename", nargs="?", help="script to run (omit for a REPL)")
+    argument_parser.add_argument("--mmap", action="store_true", help="memory-map the script instead of reading it")
+    argument_parser.add_argument("--cache", action="store_true", help="reuse the parsed script from the AST cache when unchanged")
+    argument_parser.add_argument("--lazy", action="store_true", help="parse function bodies when they are first called")
+    argument_parser.add_argument("--stream", action="store_true", help="run each top-level statement as soon as it is parsed")
+    argument_parser.add_argument("--intern", choices=["leaves", "subtrees"], help="share repeated leaves, or also repeated pure subtrees, in the tree")
+    argument_parser.add_argument("--memory", action="store_true", help="report the size of the tree before running")
+    argument_parser.add_argument("--fold", action="store_true", help="fold constant expressions before running")
+    argument_parser.add_argument("--flatten", action="store_true", help="parse long chains of +, *, && and || into single nodes")
+    argument_parser.add_argument("--constants", action="store_true", help="parse literals of numbers and strings into ready-made values")
+    argument_parser.add_argument("--generated", action="store_true", help="parse with the table-driven parser generated from the grammar")
+    argument_parser.add_argument("--engine", choices=["evaluate", "compile", "vm", "python"], default="evaluate", help="walk the tree, compile it to closures first, compile it to bytecode for the stack machine, or translate it to Python")
+    options = argument_parser.parse_args()
+    if options.cache:
+        # the cache holds plain parses of the whole file
+        for flag in ["mmap", "lazy", "intern", "flatten", "constants", "generated"]:
+            if getattr(options, flag):
+                argument_parser.error(f"--cache cannot be used with --{flag}")
+    if options.stream:
+        # statements are parsed one at a time from the text of the file
+        for flag in ["cache", "generated", "mmap", "memory"]:
+            if getattr(options, flag):
+                argument_parser.error(f"--stream cannot be used with --{flag}")
+    if not options.filename:
+        # the REPL reads lines as they are typed
+        for flag in ["cache", "mmap", "stream", "memory"]:
+            if getattr(options, flag):
+                argument_parser.error(f"--{flag} needs a script to run")
+    if options.generated:
+        # the generated parser builds plain trees only
+        for flag in ["lazy", "intern", "flatten", "constants"]:
+            if getattr(options, flag):
+                argument_parser.error(f"--generated cannot be used with --{flag}")
+    options.engine = {"evaluate": evaluate, "compile": compiler.run, "vm": vm.run, "python": transpiler.run}[options.engine]
+
     environment = {}
     # Check for command line arguments
-    if len(sys.argv) > 1:
+    if options.filename:
         # Filename provided, read and execute it
-        with open(sys.argv[1], 'r') as f:
-            source_code = f.read()
-        
-        tokens = tokenize(source_code)
-        ast = parse(tokens)
-        evaluate(ast, environment)
+        if options.stream:
+            run_stream(options, environment)
+            return
+        if options.cache:
+            with open(options.filename, 'rb') as f:
+                ast = cached_parse(f.read(), line_index=LineIndex())
+        else:
+            line_index = LineIndex()
+            tokens = read_tokens(options.filename, options, line_index)
+            if options.generated:
+                # imported only here: it checks its tables against the grammar as it loads
+                import grammar_parser
+                ast = grammar_parser.parse(tokens, line_index)
+            else:
+                ast = parse(tokens, line_index, lazy=options.lazy, intern=options.intern, flatten=options.flatten, constants=options.constants)
+        if options.fold:
+            ast, count = fold_constants(ast)
+            print(f"folded {count} nodes", file=sys.stderr)
+        # keep only the compact form of the tree while the program runs
+        ast = from_dict(ast, shared=options.intern is not None)
+        if options.memory:
+            count, size = tree_memory(ast)
+            print(f"tree: {count} objects, {size} bytes", file=sys.stderr)
+        options.engine(ast, environment)
 
     else:
         # REPL loop
@@ -32,9 +129,17 @@ def main():
                     break
 
                 # Tokenize, parse, and execute the code
-                tokens = tokenize(source_code)
-                ast = parse(tokens)
-                result, _ = evaluate(ast, environment)
+                line_index = LineIndex()
+                tokens = tokenize(source_code, line_index=line_index)
+                if options.generated:
+                    import grammar_parser
+                    ast = grammar_parser.parse(tokens, line_index)
+                else:
+                    ast = parse(tokens, line_index, lazy=options.lazy, intern=options.intern, flatten=options.flatten, constants=options.constants)
+                if options.fold:
+                    ast, _ = fold_constants(ast)
+                ast = from_dict(ast, shared=options.intern is not None)
+                result, _ = options.engine(ast, environment)
                 if result != None:
                     print(result)
             except Exception as e:
@@ -1,28 +1,13 @@
+import io
 import re
+from array import array
+from bisect import bisect_left, bisect_right
 
 patterns = [
     [r"//[^\n]*", "comment"],  # Comment
     [r"\s+", "whitespace"],  # Whitespace
     [r"\d*\.\d+|\d+\.\d*|\d+", "number"],  # numeric literals
-    [r'"([^"]|"")*"', "string"],  # string literals
-    [r"true|false", "boolean"],  # boolean literals
-    [r"null", "null"],  # the null literal
-    [r"function", "function"],  # function keyword
-    [r"return", "return"],  # return keyword
-    [r"if", "if"],  # if keyword
-    [r"else", "else"],  # else keyword
-    [r"while", "while"],  # while keyword
-    [r"for", "for"],  # for keyword
-    [r"break", "break"],  # for keyword
-    [r"continue", "continue"],  # for keyword
-    [r"print", "print"],  # print keyword
-    [r"import", "import"],  # import keyword
-    [r"external", "external"],  # external keyword
-    [r"input", "input"],  # function keyword
-    [r"exit", "exit"],  # exit keyword
-    [r"and", "&&"],  # alternate for &&
-    [r"or", "||"],  # alternate for ||
-    [r"not", "!"],  # alternate for !
+    [r'"(?:[^"]|"")*"', "string"],  # string literals
     [r"[a-zA-Z_][a-zA-Z0-9_]*", "identifier"],  # identifiers
     [r"\+", "+"],
     [r"\-", "-"],
@@ -52,56 +37,301 @@ patterns = [
     [r".", "error"],  # unexpected content
 ]
 
+# words that the identifier pattern picks up, and the tags they become
+keywords = {
+    "true": "boolean",  # boolean literals
+    "false": "boolean",
+    "null": "null",  # the null literal
+    "function": "function",
+    "return": "return",
+    "if": "if",
+    "else": "else",
+    "while": "while",
+    "for": "for",
+    "break": "break",
+    "continue": "continue",
+    "print": "print",
+    "import": "import",
+    "external": "external",
+    "input": "input",
+    "exit": "exit",
+    "and": "&&",  # alternate for &&
+    "or": "||",  # alternate for ||
+    "not": "!",  # alternate for !
+}
+
+# combine the patterns into one alternation, with a named group per entry.
+# alternatives are tried left to right, so the first pattern in the table
+# that matches still wins, exactly as in the one-at-a-time loop.
+master_pattern = re.compile(
+    "|".join(f"(?P<t{i}>{pattern})" for i, (pattern, tag) in enumerate(patterns))
+)
+group_tags = {f"t{i}": tag for i, (pattern, tag) in enumerate(patterns)}
+# the same scanner for bytes, mmap and memoryview sources
+master_bytes_pattern = re.compile(master_pattern.pattern.encode())
+string_group = next(group for group, tag in group_tags.items() if tag == "string")
+
 for pattern in patterns:
     pattern[0] = re.compile(pattern[0])
 
-test_generated_tags = set()
+class Token:
+    """A token, with dict-style access for code written against token dicts."""
+
+    __slots__ = ("tag", "value", "position")
+
+    def __init__(self, tag, value, position):
+        self.tag = tag
+        self.value = value
+        self.position = position
+
+    def __getitem__(self, key):
+        if key == "tag":
+            return self.tag
+        if key == "value":
+            return self.value
+        if key == "position":
+            return self.position
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in Token.__slots__
+
+    def keys(self):
+        return Token.__slots__
+
+    def to_dict(self):
+        return {"tag": self.tag, "value": self.value, "position": self.position}
+
+    def __eq__(self, other):
+        if isinstance(other, Token):
+            return (self.tag, self.value, self.position) == (
+                other.tag,
+                other.value,
+                other.position,
+            )
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Token({self.tag!r}, {self.value!r}, {self.position!r})"
+
+
+class LineIndex:
+    """Start offsets of the source lines, filled in while tokenizing."""
+
+    def __init__(self):
+        self.line_starts = array("l", [0])
+
+    def add_text(self, text, position):
+        # record the line starting after each newline in text
+        character = "\n" if isinstance(text, str) else b"\n"
+        newline = text.find(character)
+        while newline != -1:
+            self.line_starts.append(position + newline + 1)
+            newline = text.find(character, newline + 1)
+
+    def location(self, position):
+        # (line, column) of a position, both counted from 1
+        line = bisect_right(self.line_starts, position)
+        return line, position - self.line_starts[line - 1] + 1
+
+    def describe(self, position):
+        line, column = self.location(position)
+        return f"line {line}, column {column}"
+
+    def describe_positions(self, message):
+        # rewrite "at position N" in a message as a line and column
+        return re.sub(
+            r"at position (\d+)",
+            lambda match: "at " + self.describe(int(match.group(1))),
+            message,
+        )
+
+
+def make_token(tag, text, position):
+    # complain about errors and throw exception
+    if tag == "error":
+        raise Exception(f"Syntax error: illegal character : {[text]}")
+
+    # package the token
+    value = text
+    if tag == "string":
+        value = text[1:-1].replace('""', '"')
+    elif tag == "number":
+        if "." in text:
+            value = float(text)
+        else:
+            value = int(text)
+    elif tag == "boolean":
+        value = 1 if text == "true" else 0
+    return Token(tag, value, position)
 
 
 # The lex/tokenize function
-def tokenize(characters, generated_tags=test_generated_tags):
+def tokenize(characters, generated_tags=None, line_index=None):
+    if not isinstance(characters, str):
+        return tokenize_buffer(characters, generated_tags, line_index)
     tokens = []
-    position = 0
-    while position < len(characters):
-        # find the first token pattern that matches
-        for pattern, tag in patterns:
-            match = pattern.match(characters, position)
-            if match:
-                break
+    # the last pattern matches any character, so the matches cover the input
+    for match in master_pattern.finditer(characters):
+        tag = group_tags[match.lastgroup]
+        if tag == "identifier":
+            tag = keywords.get(match.group(0), "identifier")
+
+        # note that the tag was generated, when collecting coverage
+        if generated_tags is not None:
+            generated_tags.add(tag)
 
-        # this should never fail, since the last pattern matches everything.
-        assert match
+        # only whitespace and strings can contain newlines
+        if line_index is not None and (tag == "whitespace" or tag == "string"):
+            line_index.add_text(match.group(0), match.start())
 
-        # note that the tag was generated
-        generated_tags.add(tag)
+        # append token to stream, skipping whitespace and comments
+        if tag != "whitespace" and tag != "comment":
+            tokens.append(make_token(tag, match.group(0), match.start()))
 
-        # complain about errors and throw exception
-        if tag == "error":
-            raise Exception(f"Syntax error: illegal character : {[match.group(0)]}")
+    tokens.append(Token(None, None, len(characters)))
+    return tokens
 
-        # package the token
-        token = {"tag": tag, "value": match.group(0), "position": position}
-        if token["tag"] == "string":
-            token["value"] = token["value"][1:-1].replace('""', '"')
-        if token["tag"] == "number":
-            if "." in token["value"]:
-                token["value"] = float(token["value"])
-            else:
-                token["value"] = int(token["value"])
-        if token["tag"] == "boolean":
-            token["value"] = 1 if token["value"] == "true" else 0
 
-        # append token to stream, skipping whitespace and comments
-        if tag not in ["comment", "whitespace"]:
-            tokens.append(token)
+# Tokenize a UTF-8 bytes-like buffer (bytes, mmap, memoryview) in place.
+# Positions are byte offsets, and only the text of the tokens that are kept
+# is decoded.
+def tokenize_buffer(buffer, generated_tags=None, line_index=None):
+    tokens = []
+    for match in master_bytes_pattern.finditer(buffer):
+        tag = group_tags[match.lastgroup]
 
-        # update position for next match
-        position = match.end()
+        # only whitespace and strings can contain newlines
+        if line_index is not None and (tag == "whitespace" or tag == "string"):
+            line_index.add_text(match.group(0), match.start())
+
+        if tag == "whitespace" or tag == "comment":
+            if generated_tags is not None:
+                generated_tags.add(tag)
+            continue
 
-    tokens.append({"tag": None, "value": None, "position": position})
+        text = match.group(0).decode(errors="backslashreplace")
+        if tag == "identifier":
+            tag = keywords.get(text, "identifier")
+
+        # note that the tag was generated, when collecting coverage
+        if generated_tags is not None:
+            generated_tags.add(tag)
+
+        tokens.append(make_token(tag, text, match.start()))
+
+    tokens.append(Token(None, None, len(buffer)))
     return tokens
 
 
+# Tokenize a file object a chunk at a time, yielding tokens as they are found
+def iter_tokenize(
+    fileobj, chunk_size=65536, generated_tags=None, line_index=None
+):
+    buffer = ""
+    offset = 0  # source position of buffer[0]
+    position = 0
+    at_end = False
+    while True:
+        match = master_pattern.match(buffer, position)
+        if not at_end:
+            # a token that reaches the end of the buffer may continue into the
+            # next chunk, as may a string followed by a (doubled) quote or an
+            # opening quote that has not been closed yet.
+            end = match.end() if match else position
+            if (
+                end == len(buffer)
+                or (buffer[end] == '"' and match.lastgroup == string_group)
+                or match.group(0) == '"'
+            ):
+                chunk = fileobj.read(chunk_size)
+                at_end = not chunk
+                offset += position
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+        if not match:
+            break
+
+        tag = group_tags[match.lastgroup]
+        if tag == "identifier":
+            tag = keywords.get(match.group(0), "identifier")
+
+        # note that the tag was generated, when collecting coverage
+        if generated_tags is not None:
+            generated_tags.add(tag)
+
+        # only whitespace and strings can contain newlines
+        if line_index is not None and (tag == "whitespace" or tag == "string"):
+            line_index.add_text(match.group(0), offset + match.start())
+
+        # yield the token, skipping whitespace and comments
+        if tag != "whitespace" and tag != "comment":
+            yield make_token(tag, match.group(0), offset + match.start())
+        position = match.end()
+
+    yield Token(None, None, offset + position)
+
+
+# Re-lex the text around an edit (replace `removed` characters at `offset`
+# with `inserted`), reusing the old tokens on either side of it.
+# Returns the edited text and its tokens; the old token list must not be
+# used again, since the tokens after the edit are shifted in place.
+def retokenize(
+    tokens, characters, offset, removed, inserted, generated_tags=None
+):
+    new_characters = characters[:offset] + inserted + characters[offset + removed :]
+    delta = len(inserted) - removed
+    edit_end = offset + len(inserted)
+
+    # a token that starts before the edit can still run into it, so restart
+    # at the last one of those; the lexer has no state besides its position.
+    index = bisect_left(tokens, offset, key=lambda token: token.position) - 1
+    if index < 0:
+        index = 0
+        restart = 0
+    else:
+        restart = tokens[index].position
+    new_tokens = tokens[:index]
+
+    # old tokens at or after the end of the edit are candidates for resyncing
+    old_index = bisect_left(tokens, offset + removed, key=lambda token: token.position)
+    for match in master_pattern.finditer(new_characters, restart):
+        tag = group_tags[match.lastgroup]
+        if tag == "identifier":
+            tag = keywords.get(match.group(0), "identifier")
+
+        # note that the tag was generated, when collecting coverage
+        if generated_tags is not None:
+            generated_tags.add(tag)
+
+        if tag == "whitespace" or tag == "comment":
+            continue
+        start = match.start()
+        if start >= edit_end:
+            # past the edit the text is the old text shifted by delta, so once
+            # a token starts where an old one did, the rest of the old stream
+            # applies unchanged.
+            while tokens[old_index].position + delta < start:
+                old_index += 1
+            if tokens[old_index].position + delta == start:
+                break
+        new_tokens.append(make_token(tag, match.group(0), start))
+    else:
+        new_tokens.append(Token(None, None, len(new_characters)))
+        return new_characters, new_tokens
+
+    # the old tokens are moved, not copied, so the old list is stale afterwards
+    remaining = tokens[old_index:]
+    if delta != 0:
+        for token in remaining:
+            token.position += delta
+    new_tokens.extend(remaining)
+    return new_characters, new_tokens
+
+
 def test_simple_tokens():
     print("testing simple tokens...")
     examples = ".,[,],+,-,*,/,(,),{,},;,:,!,&&,||,<,>,<=,>=,==,!=,=".split(",")
@@ -243,6 +473,15 @@ def test_keywords():
         assert "value" not in t
 
 
+def test_keyword_prefixes():
+    print("testing identifiers that start with keywords...")
+    for s in ["format", "android", "order", "notes", "iffy", "trueish", "nullable"]:
+        t = tokenize(s)
+        assert len(t) == 2, f"got tokens = {t}"
+        assert t[0]["tag"] == "identifier"
+        assert t[0]["value"] == s
+
+
 def test_comments():
     print("testing comments...")
     assert verify_same_tokens("//comment", "\n")
@@ -263,10 +502,164 @@ def test_error():
         assert "illegal character" in error_string
 
 
+def test_master_pattern():
+    print("testing master pattern against the pattern table...")
+    example = 'x = 3.5 * (y1 + .2); if (a <= b && !c) { print "it said ""hi"""; } // done\n$'
+    position = 0
+    while position < len(example):
+        # the first table entry that matches must be the one the scanner picks
+        for pattern, tag in patterns:
+            match = pattern.match(example, position)
+            if match:
+                break
+        scanned = master_pattern.match(example, position)
+        assert group_tags[scanned.lastgroup] == tag, f"at {position}: {tag}"
+        assert scanned.end() == match.end()
+        position = match.end()
+
+
+def test_iter_tokenize():
+    print("testing chunked tokenizing...")
+    example = """
+        x = 12.5 + .25 * 100; // a comment that runs past a chunk
+        s = "a ""quoted"" word"; t = "";
+        if (format >= 3 && android != 4) { print s }
+    """
+    for chunk_size in [1, 2, 3, 5, 7, 64, 65536]:
+        t = list(iter_tokenize(io.StringIO(example), chunk_size))
+        assert t == tokenize(example), f"chunk size {chunk_size}"
+    assert list(iter_tokenize(io.StringIO(""))) == tokenize("")
+    try:
+        list(iter_tokenize(io.StringIO('x = "unterminated'), 4))
+        assert False, "Should have a token exception for the open quote."
+    except Exception as e:
+        assert "Syntax error" in str(e)
+
+
+def test_token():
+    print("testing token objects...")
+    t = tokenize("x")[0]
+    assert (t.tag, t.value, t.position) == ("identifier", "x", 0)
+    assert (t["tag"], t["value"], t["position"]) == ("identifier", "x", 0)
+    assert t == {"tag": "identifier", "value": "x", "position": 0}
+    assert {"tag": "identifier", "value": "x", "position": 0} == t
+    assert t != {"tag": "identifier", "value": "y", "position": 0}
+    assert t == Token("identifier", "x", 0)
+    assert dict(t) == t.to_dict()
+    try:
+        t["other"]
+        assert False, "Should have a KeyError for 'other'."
+    except KeyError:
+        pass
+
+
+def test_line_index():
+    print("testing line index...")
+    example = 'x = 1;\n  y = "two\nlines";\n\n// note\n   z'
+    for chunked in [False, True]:
+        line_index = LineIndex()
+        if chunked:
+            t = list(iter_tokenize(io.StringIO(example), 3, line_index=line_index))
+        else:
+            t = tokenize(example, line_index=line_index)
+        assert list(line_index.line_starts) == [0, 7, 18, 26, 27, 35]
+        assert line_index.location(t[0]["position"]) == (1, 1)
+        assert line_index.location(t[4]["position"]) == (2, 3)
+        assert line_index.location(t[6]["position"]) == (2, 7)
+        assert line_index.location(t[8]["position"]) == (6, 4)
+        assert line_index.describe(t[8]["position"]) == "line 6, column 4"
+    message = line_index.describe_positions("Expected ')' at position 9")
+    assert message == "Expected ')' at line 2, column 3"
+
+
+def test_tokenize_buffer():
+    print("testing tokenizing from a buffer...")
+    import mmap
+    import tempfile
+
+    example = 'x = 12.5 + .25; s = "a ""quoted"" word" // comment\nif (format) {}'
+    assert tokenize(example.encode()) == tokenize(example)
+    assert tokenize(memoryview(example.encode())) == tokenize(example)
+    with tempfile.TemporaryFile() as f:
+        f.write(example.encode())
+        f.flush()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            assert tokenize(buffer) == tokenize(example)
+    t = tokenize('s = "caf\u00e9"; t'.encode())
+    assert t[2]["value"] == "caf\u00e9"
+    assert t[4]["position"] == 13  # byte offsets: the accented e takes two bytes
+    line_index = LineIndex()
+    tokenize(b"x\n  y", line_index=line_index)
+    assert list(line_index.line_starts) == [0, 2]
+    try:
+        tokenize(b"$banana")
+        assert False, "Should have a token exception for '$'."
+    except Exception as e:
+        assert "illegal character" in str(e)
+
+
+def test_retokenize():
+    print("testing incremental retokenizing...")
+    import random
+
+    example = """x = 12.5 + .25; // a comment
+        s = "a ""quoted"" word"; if (format >= 3) { print s }"""
+    edits = [
+        (0, 0, "y"),  # merge with the first identifier
+        (0, 1, ""),  # delete it
+        (len(example), 0, " + 1"),  # append at the end
+        (4, 2, "7"),  # change a number
+        (6, 0, "."),  # split a number
+        (15, 0, "/"),  # turn whitespace into part of a comment
+        (16, 2, ""),  # remove the comment marker
+        (example.index("word"), 0, '"'),  # end the string early
+        (example.index("if"), 2, "iff"),  # keyword becomes identifier
+        (example.index(">="), 1, ""),  # operator shrinks
+    ]
+    for offset, removed, inserted in [(3, 0, "x"), (3, 0, "\n"), (0, 0, "1")]:
+        characters, t = retokenize(tokenize("// x"), "// x", offset, removed, inserted)
+        assert t == tokenize(characters)
+    rng = random.Random(1)
+    for i in range(200):
+        offset = rng.randrange(len(example) + 1)
+        removed = rng.randrange(min(6, len(example) - offset) + 1)
+        inserted = "".join(rng.choice('ab1 .;"/{}\n') for _ in range(rng.randrange(4)))
+        edits.append((offset, removed, inserted))
+    for offset, removed, inserted in edits:
+        edited = example[:offset] + inserted + example[offset + removed :]
+        try:
+            expected = tokenize(edited)
+        except Exception:
+            continue
+        characters, t = retokenize(tokenize(example), example, offset, removed, inserted)
+        assert characters == edited
+        assert t == expected, f"edit {(offset, removed, inserted)}"
+    # successive edits, each applied to the tokens from the one before
+    characters, t = example, tokenize(example)
+    for offset, removed, inserted in [(0, 0, "ab"), (20, 3, "  "), (5, 1, ";")]:
+        characters, t = retokenize(t, characters, offset, removed, inserted)
+        assert t == tokenize(characters)
+
+
 def test_tag_coverage():
     print("testing comprehensive tag coverage...")
+    generated_tags = set()
+    examples = [
+        "x = 1.5 + 2 - 3 * 4 / 5; // comment",
+        'print "a" ; [ ] { } ( ) , : . == != <= >= < > && || ! and or not',
+        "function return if else while for break continue",
+        "import external input exit true false null",
+    ]
+    for example in examples:
+        tokenize(example, generated_tags=generated_tags)
+    try:
+        tokenize("$", generated_tags=generated_tags)
+    except Exception:
+        pass
     for pattern, tag in patterns:
-        assert tag in test_generated_tags, f"Tag [ {tag} ] was not tested."
+        assert tag in generated_tags, f"Tag [ {tag} ] was not tested."
+    for keyword, tag in keywords.items():
+        assert tag in generated_tags, f"Tag [ {tag} ] was not tested."
 
 
 if __name__ == "__main__":
@@ -279,7 +672,14 @@ if __name__ == "__main__":
     test_whitespace()
     test_multiple_tokens()
     test_keywords()
+    test_keyword_prefixes()
     test_comments()
     test_error()
+    test_master_pattern()
+    test_iter_tokenize()
+    test_token()
+    test_line_index()
+    test_tokenize_buffer()
+    test_retokenize()
     test_tag_coverage()
     print("done.")
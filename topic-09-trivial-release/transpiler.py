@@ -0,0 +1,583 @@
+import builtins
+import linecache
+import math
+import sys
+from keyword import iskeyword
+
+from tokenizer import tokenize, LineIndex
+from parser import parse
+from nodes import from_dict, ConstantNode
+from evaluator import evaluate
+
+# A third engine, with the semantics of evaluator.evaluate: a tree is
+# translated into Python source, which is compiled once and run by CPython
+# itself. The program becomes `def program(_env)`, returning (value,
+# return_chain) as evaluate does, and each trivial function becomes a
+# `def function(_env)` of its own, translated and compiled when it is first
+# called and kept until the run ends. while and if become Python's while
+# and if.
+#
+# Scoping is dynamic: a function sees its caller's variables through
+# "$parent", so every scope still needs its environment dict. A name
+# assigned in a scope is a Python local as well, and each assignment writes
+# the value through to the dict; reads use the local. Until a name is surely
+# assigned, the local may still hold _unset, and a read of it falls back to
+# the enclosing environments. Names never assigned in a scope are looked up
+# in the environments. An empty statement list does nothing here, where
+# evaluate fails on it.
+#
+# Generated names all start with an underscore; trivial names that do, or
+# that are Python keywords, become _v_<name>. Each statement's line ends
+# with a comment giving where it starts in the source, when the parse
+# recorded statement positions.
+
+chain_limit = 100
+nesting_limit = 50
+loop_limit = 15
+
+binary_operators = {"+", "-", "*", "<", ">", "<=", ">=", "==", "!="}
+binary_helpers = {"/": "_divide", "&&": "_and", "||": "_or"}
+
+
+class Unset:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "_unset"
+
+
+unset = Unset()
+
+
+class Translation:
+    """Python source for a program or a function body: its lines, the
+    values it refers to as _constants[i], and, for each line, where its
+    statement starts in the trivial source."""
+
+    __slots__ = ("name", "lines", "constants", "constant_index", "positions", "statement_positions", "line_index")
+
+    def __init__(self, name, statement_positions=None, line_index=None):
+        self.name = name
+        self.lines = []
+        self.constants = []
+        # id(value): its index in constants
+        self.constant_index = {}
+        # generated line number: trivial source position
+        self.positions = {}
+        self.statement_positions = statement_positions
+        self.line_index = line_index
+
+    def line(self, indent, text, statement=None):
+        if self.statement_positions is not None and id(statement) in self.statement_positions:
+            position = self.statement_positions[id(statement)]
+            self.positions[len(self.lines) + 1] = position
+            where = self.line_index.describe(position) if self.line_index is not None else f"position {position}"
+            text += f"  # {where}"
+        self.lines.append("    " * indent + text)
+
+    def constant(self, value):
+        if id(value) not in self.constant_index:
+            self.constant_index[id(value)] = len(self.constants)
+            self.constants.append(value)
+        return f"_constants[{self.constant_index[id(value)]}]"
+
+    @property
+    def source(self):
+        return "\n".join(self.lines) + "\n"
+
+
+class Scope:
+    """The names assigned in the program or function being translated."""
+
+    __slots__ = ("names", "program")
+
+    def __init__(self, names, program):
+        self.names = names
+        self.program = program
+
+
+def local_name(identifier):
+    if identifier.startswith("_") or iskeyword(identifier):
+        return "_v_" + identifier
+    return identifier
+
+
+def assigned_names(statements, names):
+    # the names statements assign to, in order, without those of the functions they define
+    for statement in statements:
+        tag = statement["tag"]
+        if tag == "assign" and statement["target"]["tag"] == "identifier":
+            names[statement["target"]["value"]] = None
+        elif tag == "if":
+            assigned_names(statement["then"]["statements"], names)
+            if "else" in statement:
+                else_ = statement["else"]
+                assigned_names(else_["statements"] if else_["tag"] == "statement_list" else [else_], names)
+        elif tag == "while":
+            assigned_names(statement["do"]["statements"], names)
+    return names
+
+
+def translate_program(ast, positions=None, line_index=None):
+    """Translates a program, or a single statement, into `def program(_env)`."""
+    translation = Translation("program", positions, line_index)
+    statements = ast["statements"] if ast["tag"] in ("program", "statement_list") else [ast]
+    scope = Scope(assigned_names(statements, {}), True)
+    translation.line(0, "def program(_env):")
+    for identifier in scope.names:
+        translation.line(1, f'{local_name(identifier)} = _env.get("{identifier}", _unset)')
+    definite = set()
+    for statement in statements[:-1]:
+        translate_statement(statement, translation, scope, 1, definite)
+    if statements:
+        # the program's value is its last statement's
+        last = statements[-1]
+        tag = last["tag"]
+        if tag == "print" and last["value"]:
+            value = translate_expression(last["value"], translation, scope, definite)
+            translation.line(1, f"return _print_value({value}), False", last)
+        elif tag == "print":
+            translation.line(1, "print()", last)
+            translation.line(1, 'return "\\n", False')
+        elif tag in ("if", "while", "assign", "return"):
+            translate_statement(last, translation, scope, 1, definite)
+            if tag != "return":
+                translation.line(1, "return None, False")
+        else:
+            translation.line(1, f"return {translate_expression(last, translation, scope, definite)}, False", last)
+    else:
+        translation.line(1, "return None, False")
+    return translation
+
+
+def translate_function(function, positions=None, line_index=None, complete=True):
+    """Translates a function's body into `def function(_env)`. The call
+    puts the arguments in _env; the function returns the value of the
+    return it reaches, or None. Unless complete, the translation is for
+    calls given fewer arguments than parameters, which leave the rest to
+    be looked up like any name not yet assigned."""
+    translation = Translation("function", positions, line_index)
+    parameters = [parameter["value"] for parameter in function["parameters"]]
+    statements = function["body"]["statements"]
+    names = assigned_names(statements, dict.fromkeys(parameters))
+    scope = Scope(names, False)
+    translation.line(0, "def function(_env):")
+    for identifier in names:
+        if identifier in parameters:
+            value = f'_env["{identifier}"]' if complete else f'_env.get("{identifier}", _unset)'
+            translation.line(1, f"{local_name(identifier)} = {value}")
+        else:
+            translation.line(1, f"{local_name(identifier)} = _unset")
+    definite = set(parameters) if complete else set()
+    for statement in statements:
+        translate_statement(statement, translation, scope, 1, definite)
+    if not statements:
+        translation.line(1, "pass")
+    return translation
+
+
+def translate_block(statements, translation, scope, indent, definite, loops=0):
+    # the statements of an if or while body; an empty one does nothing
+    for statement in statements:
+        translate_statement(statement, translation, scope, indent, definite, loops)
+    if not statements:
+        translation.line(indent, "pass")
+
+
+def translate_statement(ast, translation, scope, indent, definite, loops=0):
+    """Adds the lines of a statement, indent blocks and loops whiles deep.
+    definite holds the names surely assigned before it, and gets those
+    surely assigned by it."""
+    if indent > nesting_limit or loops >= loop_limit:
+        translate_evaluated(ast, translation, scope, indent)
+        return
+    tag = ast["tag"]
+    if tag == "assign":
+        target = ast["target"]
+        value = translate_expression(ast["value"], translation, scope, definite)
+        if target["tag"] == "identifier":
+            identifier = target["value"]
+            translation.line(indent, f'{local_name(identifier)} = _env["{identifier}"] = {value}', ast)
+            definite.add(identifier)
+            return
+        assert target["tag"] == "complex", f"Unknown target type in assignment. {target}"
+        # evaluate computes and prints the base, then the index, then the value
+        base = translate_expression(target["base"], translation, scope, definite)
+        index = translate_expression(target["index"], translation, scope, definite)
+        translation.line(indent, f"_base = _target_base({base})", ast)
+        translation.line(indent, f"_slot = _target_index(_base, {index})")
+        translation.line(indent, f"_base[_slot] = {value}")
+        return
+    if tag == "if":
+        # an else if chain stays at one level, as elif
+        condition = translate_expression(ast["condition"], translation, scope, definite)
+        translation.line(indent, f"if {condition}:", ast)
+        branches = []
+        while True:
+            branch = set(definite)
+            translate_block(ast["then"]["statements"], translation, scope, indent + 1, branch, loops)
+            branches.append(branch)
+            if "else" not in ast:
+                return
+            else_ = ast["else"]
+            if else_["tag"] != "if":
+                break
+            ast = else_
+            condition = translate_expression(ast["condition"], translation, scope, definite)
+            translation.line(indent, f"elif {condition}:", ast)
+        translation.line(indent, "else:")
+        otherwise = set(definite)
+        translate_block(else_["statements"], translation, scope, indent + 1, otherwise, loops)
+        definite |= otherwise.intersection(*branches)
+        return
+    if tag == "while":
+        condition = translate_expression(ast["condition"], translation, scope, definite)
+        translation.line(indent, f"while {condition}:", ast)
+        # the body may not run at all
+        translate_block(ast["do"]["statements"], translation, scope, indent + 1, set(definite), loops + 1)
+        return
+    if tag == "return":
+        value = translate_expression(ast["value"], translation, scope, definite) if "value" in ast else "None"
+        translation.line(indent, f"return {value}, True" if scope.program else f"return {value}", ast)
+        return
+    if tag == "print":
+        if ast["value"]:
+            translation.line(indent, f"print({translate_expression(ast['value'], translation, scope, definite)})", ast)
+        else:
+            translation.line(indent, "print()", ast)
+        return
+    # an expression, computed for what it does
+    translation.line(indent, translate_expression(ast, translation, scope, definite), ast)
+
+
+def translate_evaluated(ast, translation, scope, indent):
+    # CPython allows 100 levels of indentation and 20 nested loops; a
+    # statement past the limits is run by evaluate, which sees the locals
+    # through _env, and the names it may assign are read back from there
+    translation.line(indent, f"_value, _returned = _execute({translation.constant(ast)}, _env)", ast)
+    translation.line(indent, "if _returned:")
+    translation.line(indent + 1, "return _value, True" if scope.program else "return _value")
+    for identifier in assigned_names([ast], {}):
+        translation.line(indent, f'{local_name(identifier)} = _env.get("{identifier}", _unset)')
+
+
+def translate_expression(ast, translation, scope, definite, depth=0):
+    """Returns Python source for an expression, depth levels inside a statement."""
+    if depth > nesting_limit:
+        # CPython rejects source nested 200 brackets deep; every assignment
+        # is written through to _env, so evaluate can take over from here
+        return f"_evaluate({translation.constant(ast)}, _env)"
+    tag = ast["tag"]
+    if tag == "number":
+        assert type(ast["value"]) in [float, int], f"unexpected type {type(ast['value'])}"
+        if not math.isfinite(ast["value"]):
+            # repr gives inf and nan, which are not Python literals
+            return translation.constant(ast["value"])
+        return repr(ast["value"])
+    if tag == "string":
+        assert type(ast["value"]) == str, f"unexpected type {type(ast['value'])}"
+        return repr(ast["value"])
+    if tag == "identifier":
+        identifier = ast["value"]
+        if identifier not in scope.names:
+            return f'_lookup(_env, "{identifier}")'
+        name = local_name(identifier)
+        if identifier in definite:
+            return name
+        return f'({name} if {name} is not _unset else _lookup(_env, "{identifier}"))'
+    if tag in binary_operators:
+        left = translate_expression(ast["left"], translation, scope, definite, depth + 1)
+        right = translate_expression(ast["right"], translation, scope, definite, depth + 1)
+        return f"({left} {tag} {right})"
+    if tag in binary_helpers:
+        left = translate_expression(ast["left"], translation, scope, definite, depth + 1)
+        right = translate_expression(ast["right"], translation, scope, definite, depth + 1)
+        if tag == "/" and ast["right"]["tag"] == "number" and ast["right"]["value"] != 0:
+            # no zero to check for
+            return f"({left} / {right})"
+        return f"{binary_helpers[tag]}({left}, {right})"
+    if tag == "chain":
+        operands = [translate_expression(operand, translation, scope, definite, depth + 1) for operand in ast["operands"]]
+        if ast["operator"] in ("+", "*") and len(operands) <= chain_limit:
+            return "(" + f" {ast['operator']} ".join(operands) + ")"
+        # Python's compiler recurses on each operator, so long chains are folded at run time
+        return f'_chain("{ast["operator"]}", [{", ".join(operands)}])'
+    if tag == "negate":
+        return f"(-{translate_expression(ast['value'], translation, scope, definite, depth + 1)})"
+    if tag == "!":
+        return f"(not {translate_expression(ast['value'], translation, scope, definite, depth + 1)})"
+    if tag == "list":
+        return "[" + ", ".join(translate_expression(item, translation, scope, definite, depth + 1) for item in ast["items"]) + "]"
+    if tag == "object":
+        items = []
+        for item in ast["items"]:
+            key = translate_expression(item["key"], translation, scope, definite, depth + 1)
+            value = translate_expression(item["value"], translation, scope, definite, depth + 1)
+            items.append(f"_key({key}): {value}")
+        return "{" + ", ".join(items) + "}"
+    if tag == "constant":
+        # a new list or object on every evaluation, as the literal would give
+        constant = ast if isinstance(ast, ConstantNode) else ConstantNode(ast["value"])
+        return f"{translation.constant(constant)}.copy()"
+    if tag == "function":
+        return translation.constant(ast)
+    if tag == "call":
+        function = translate_expression(ast["function"], translation, scope, definite, depth + 1)
+        arguments = [translate_expression(argument, translation, scope, definite, depth + 1) for argument in ast["arguments"]]
+        return f"_call({function}, [{', '.join(arguments)}], _env)"
+    if tag == "complex":
+        # evaluate prints the node before it computes either part
+        base = translate_expression(ast["base"], translation, scope, definite, depth + 1)
+        index = translate_expression(ast["index"], translation, scope, definite, depth + 1)
+        return f"_index(_trace({translation.constant(ast)}), {base}, {index})"
+    # evaluate fails only when it reaches the node, so the code does too
+    return f'_fail("Unknown tag [{tag}] in AST")'
+
+
+# helpers the generated code calls
+
+
+def lookup(environment, identifier):
+    while identifier not in environment:
+        assert "$parent" in environment, f"Unknown identifier: '{identifier}'."
+        environment = environment["$parent"]
+    return environment[identifier]
+
+
+def divide(left_value, right_value):
+    assert right_value != 0, "Division by zero"
+    return left_value / right_value
+
+
+def logical_and(left_value, right_value):
+    # both operands are computed, as evaluate does
+    return left_value and right_value
+
+
+def logical_or(left_value, right_value):
+    return left_value or right_value
+
+
+def chain(operator, operands):
+    value = operands[0]
+    for operand in operands[1:]:
+        if operator == "+":
+            value = value + operand
+        elif operator == "*":
+            value = value * operand
+        elif operator == "&&":
+            value = value and operand
+        else:
+            value = value or operand
+    return value
+
+
+def key(value):
+    assert type(value) is str, "Object key must be a string"
+    return value
+
+
+def trace(ast):
+    print(ast)
+
+
+def index(_, base, index):
+    if index == None:
+        return base
+    if type(index) in [int, float]:
+        assert int(index) == index
+        assert type(base) == list
+        assert len(base) > index
+        return base[index]
+    if type(index) == str:
+        assert type(base) == dict
+        return base[index]
+    assert False, f"Unknown index type [{index}]"
+
+
+def target_base(base):
+    print(f"Target Base = {[base]}")
+    return base
+
+
+def target_index(base, index):
+    print(f"Target Index = {[index]}")
+    assert type(index) in [int, float, str], f"Unknown index type [{index}]"
+    if type(index) in [int, float]:
+        assert int(index) == index
+        assert type(base) == list
+        assert len(base) > index
+    if type(index) in [str]:
+        assert type(base) == dict
+    return index
+
+
+def print_value(value):
+    print(value)
+    return str(value) + "\n"
+
+
+def fail(message):
+    assert False, message
+
+
+def evaluate_value(ast, environment):
+    value, _ = evaluate(ast, environment)
+    return value
+
+
+# id(function node): [function node, parameter names, compiled Python function,
+# and the one for calls short of arguments, once needed]
+functions = {}
+
+
+def call(function, arguments, environment):
+    entry = functions.get(id(function))
+    if entry is None or entry[0] is not function:
+        parameters = [parameter["value"] for parameter in function["parameters"]]
+        entry = functions[id(function)] = [function, parameters, load(translate_function(function)), None]
+    local_environment = dict(zip(entry[1], arguments))
+    local_environment["$parent"] = environment
+    if len(arguments) >= len(entry[1]):
+        return entry[2](local_environment)
+    if entry[3] is None:
+        entry[3] = load(translate_function(function, complete=False))
+    return entry[3](local_environment)
+
+
+helpers = {
+    "_unset": unset,
+    "_lookup": lookup,
+    "_divide": divide,
+    "_and": logical_and,
+    "_or": logical_or,
+    "_chain": chain,
+    "_key": key,
+    "_trace": trace,
+    "_index": index,
+    "_target_base": target_base,
+    "_target_index": target_index,
+    "_print_value": print_value,
+    "_fail": fail,
+    "_evaluate": evaluate_value,
+    "_execute": evaluate,
+    "_call": call,
+}
+
+loaded = 0
+# the file names of the generated code in linecache, from the latest run
+filenames = []
+
+
+def load(translation):
+    """Compiles a translation and returns the Python function it defines."""
+    global loaded
+    loaded += 1
+    filename = f"<trivial {translation.name} {loaded}>"
+    source = translation.source
+    # let tracebacks show the generated lines
+    linecache.cache[filename] = (len(source), None, translation.lines, filename)
+    filenames.append(filename)
+    namespace = dict(helpers, _constants=translation.constants, __builtins__=builtins)
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace[translation.name]
+
+
+def run(ast, environment):
+    """Translates a tree (dict or nodes) and runs it, as evaluate(ast, environment) would."""
+    if type(ast) is dict:
+        ast = from_dict(ast)
+    # the previous run's lines are kept until now, for its traceback
+    for filename in filenames:
+        linecache.cache.pop(filename, None)
+    filenames.clear()
+    try:
+        return load(translate_program(ast))(environment)
+    finally:
+        functions.clear()
+
+
+def function_literals(ast):
+    # the function literals in a tree, outermost first
+    found = []
+    stack = [ast]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, list):
+            stack.extend(reversed(value))
+        elif isinstance(value, dict):
+            if value.get("tag") == "constant":
+                continue
+            if value.get("tag") == "function":
+                found.append(value)
+            stack.extend(reversed([child for key, child in value.items() if key != "tag"]))
+    return found
+
+
+def dump(ast, positions=None, line_index=None):
+    """The Python source for a dict tree and for every function in it."""
+    parts = [translate_program(ast, positions, line_index).source]
+    for function in function_literals(ast):
+        parameters = ", ".join(parameter["value"] for parameter in function["parameters"])
+        translation = translate_function(function, positions, line_index)
+        parts.append(f"# function({parameters})\n" + translation.source)
+    return "\n\n".join(parts)
+
+
+def test_run_deep_expressions():
+    print("test transpiled run deep expressions")
+    from parity import both_engines
+
+    # past CPython's 200 nested brackets, the deepest parts are left to evaluate
+    for code in [
+        "print " + " - ".join(["1"] * 201),
+        "y = " + " + ".join(["x"] * 300),
+        "y = " + "[" * 250 + "x" + "]" * 250,
+        "function f(a) { y = " + "-(" * 210 + "a" + ")" * 210 + "; return y }; z = f(2)",
+    ]:
+        both_engines(run, code, {"x": 1})
+
+
+def test_run_clears_tables():
+    print("test transpiled run clears tables")
+    # a session of runs in one environment, as the REPL and --stream give
+    environment = {}
+    run(parse(tokenize("function f(a) { return a + 1 }; x = f(1)")), environment)
+    assert not functions
+    before = len(linecache.cache)
+    for _ in range(5):
+        run(parse(tokenize("x = f(x)")), environment)
+        assert not functions and len(filenames) == 2
+    assert environment["x"] == 7 and len(linecache.cache) == before
+
+
+def test_dump():
+    print("test dump")
+    code = "i = 0;\nwhile (i < 3) {\n  i = i + 1\n};\nfunction f(a) { return a + i }"
+    positions = {}
+    line_index = LineIndex()
+    text = dump(parse(tokenize(code, line_index=line_index), positions=positions), positions, line_index)
+    assert text.splitlines()[:5] == [
+        "def program(_env):",
+        '    i = _env.get("i", _unset)',
+        '    f = _env.get("f", _unset)',
+        '    i = _env["i"] = 0  # line 1, column 1',
+        "    while (i < 3):  # line 2, column 1",
+    ], text
+    assert '        i = _env["i"] = (i + 1)  # line 3, column 3' in text
+    assert '    return (a + _lookup(_env, "i"))  # line 5, column 17' in text
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # python transpiler.py FILE prints the Python translation of FILE
+        positions = {}
+        line_index = LineIndex()
+        with open(sys.argv[1]) as f:
+            ast = parse(tokenize(f.read(), line_index=line_index), positions=positions)
+        print(dump(ast, positions, line_index), end="")
+    else:
+        test_run_deep_expressions()
+        test_run_clears_tables()
+        test_dump()
+        print("done.")
@@ -0,0 +1,701 @@
+import sys
+
+from tokenizer import tokenize
+from parser import parse
+from nodes import (
+    from_dict,
+    node_kinds,
+    NUMBER,
+    STRING,
+    IDENTIFIER,
+    LIST,
+    OBJECT,
+    NEGATE,
+    LOGICAL_NOT,
+    FUNCTION,
+    COMPLEX,
+    CALL,
+    ADD,
+    SUBTRACT,
+    MULTIPLY,
+    DIVIDE,
+    LESS,
+    GREATER,
+    LESS_EQUAL,
+    GREATER_EQUAL,
+    EQUAL,
+    NOT_EQUAL,
+    AND,
+    OR,
+    STATEMENT_LIST,
+    PROGRAM,
+    IF,
+    WHILE,
+    RETURN,
+    PRINT,
+    ASSIGN,
+    CHAIN,
+    CONSTANT,
+)
+
+# A bytecode compiler and a stack machine to run it, with the semantics of
+# evaluator.evaluate. A tree is compiled into a Code: a flat list of
+# instructions, each an opcode and an argument, and the pools of constants
+# and names the arguments point into. Jumps hold the index of their target.
+#
+# Calls push a frame (the caller's code, position and environment) on a
+# stack of their own, so a deep recursion in a program is not a deep
+# recursion in Python. Functions are still the function nodes, as evaluate
+# has them; a function's body is compiled when it is first called and kept
+# in a side table keyed by the node until the run ends.
+#
+# Every statement leaves one value on the stack, as evaluate returns one,
+# unless it is compiled to be discarded. Only the last statement of the
+# program keeps its value: it is what run returns. An empty statement list
+# does nothing here, where evaluate fails on it.
+
+(
+    LOAD_CONSTANT,
+    COPY_CONSTANT,
+    LOAD_NAME,
+    STORE_NAME,
+    BUILD_LIST,
+    BUILD_OBJECT,
+    BINARY_ADD,
+    BINARY_SUBTRACT,
+    BINARY_MULTIPLY,
+    BINARY_DIVIDE,
+    COMPARE_LESS,
+    COMPARE_GREATER,
+    COMPARE_LESS_EQUAL,
+    COMPARE_GREATER_EQUAL,
+    COMPARE_EQUAL,
+    COMPARE_NOT_EQUAL,
+    LOGICAL_AND,
+    LOGICAL_OR,
+    UNARY_NEGATE,
+    UNARY_NOT,
+    PRINT_VALUE,
+    PRINT_EMPTY,
+    POP,
+    JUMP,
+    JUMP_IF_FALSE,
+    CALL_FUNCTION,
+    RETURN_VALUE,
+    END,
+    TRACE,
+    INDEX,
+    TARGET_BASE,
+    TARGET_INDEX,
+    STORE_INDEX,
+    FAIL,
+) = range(34)
+
+instruction_names = [
+    "LOAD_CONSTANT",
+    "COPY_CONSTANT",
+    "LOAD_NAME",
+    "STORE_NAME",
+    "BUILD_LIST",
+    "BUILD_OBJECT",
+    "BINARY_ADD",
+    "BINARY_SUBTRACT",
+    "BINARY_MULTIPLY",
+    "BINARY_DIVIDE",
+    "COMPARE_LESS",
+    "COMPARE_GREATER",
+    "COMPARE_LESS_EQUAL",
+    "COMPARE_GREATER_EQUAL",
+    "COMPARE_EQUAL",
+    "COMPARE_NOT_EQUAL",
+    "LOGICAL_AND",
+    "LOGICAL_OR",
+    "UNARY_NEGATE",
+    "UNARY_NOT",
+    "PRINT_VALUE",
+    "PRINT_EMPTY",
+    "POP",
+    "JUMP",
+    "JUMP_IF_FALSE",
+    "CALL_FUNCTION",
+    "RETURN_VALUE",
+    "END",
+    "TRACE",
+    "INDEX",
+    "TARGET_BASE",
+    "TARGET_INDEX",
+    "STORE_INDEX",
+    "FAIL",
+]
+
+# instructions whose argument indexes the constants or the names
+constant_arguments = {LOAD_CONSTANT, COPY_CONSTANT, TRACE, FAIL}
+name_arguments = {LOAD_NAME, STORE_NAME}
+
+binary_instructions = {
+    ADD: BINARY_ADD,
+    SUBTRACT: BINARY_SUBTRACT,
+    MULTIPLY: BINARY_MULTIPLY,
+    DIVIDE: BINARY_DIVIDE,
+    LESS: COMPARE_LESS,
+    GREATER: COMPARE_GREATER,
+    LESS_EQUAL: COMPARE_LESS_EQUAL,
+    GREATER_EQUAL: COMPARE_GREATER_EQUAL,
+    EQUAL: COMPARE_EQUAL,
+    NOT_EQUAL: COMPARE_NOT_EQUAL,
+    AND: LOGICAL_AND,
+    OR: LOGICAL_OR,
+}
+
+chain_instructions = {"+": BINARY_ADD, "*": BINARY_MULTIPLY, "&&": LOGICAL_AND, "||": LOGICAL_OR}
+
+statement_opcodes = {PRINT, IF, WHILE, STATEMENT_LIST, PROGRAM, RETURN, ASSIGN}
+
+
+class Code:
+    """Compiled code: instructions as [opcode, argument, opcode, argument, ...],
+    and the constants and names the arguments refer to."""
+
+    __slots__ = ("instructions", "constants", "names", "constant_index", "name_index")
+
+    def __init__(self):
+        self.instructions = []
+        self.constants = []
+        self.names = []
+        # numbers and strings are pooled by (type, value), so 1 and 1.0 stay apart
+        self.constant_index = {}
+        self.name_index = {}
+
+    def emit(self, opcode, argument=0):
+        """Appends an instruction and returns its position, for patching jumps."""
+        self.instructions += [opcode, argument]
+        return len(self.instructions) - 2
+
+    def patch(self, position, target=None):
+        """Points the jump at position to target, or to the next instruction."""
+        self.instructions[position + 1] = len(self.instructions) if target is None else target
+
+    def constant(self, value):
+        if type(value) in (int, float, str, type(None)):
+            # 0.0 and -0.0 are equal but print differently, so floats go by repr
+            key = (type(value), repr(value) if type(value) is float else value)
+            if key not in self.constant_index:
+                self.constant_index[key] = len(self.constants)
+                self.constants.append(value)
+            return self.constant_index[key]
+        self.constants.append(value)
+        return len(self.constants) - 1
+
+    def name(self, identifier):
+        if identifier not in self.name_index:
+            self.name_index[identifier] = len(self.names)
+            self.names.append(identifier)
+        return self.name_index[identifier]
+
+
+# id(function node): (function node, compiled body)
+bodies = {}
+
+
+def compile_tree(ast):
+    """Compiles a tree (dict or nodes) whose value, like a program's, is its last statement's."""
+    if type(ast) is dict:
+        ast = from_dict(ast)
+    code = Code()
+    if ast.opcode in (PROGRAM, STATEMENT_LIST):
+        statements = ast.statements
+        for statement in statements[:-1]:
+            emit(statement, code, True)
+        if statements:
+            emit(statements[-1], code, False)
+        else:
+            code.emit(LOAD_CONSTANT, code.constant(None))
+    else:
+        emit(ast, code, False)
+    code.emit(END)
+    return code
+
+
+def compile_body(function):
+    """Compiles a function body. It returns None unless a return is reached."""
+    code = Code()
+    emit(function.body, code, True)
+    code.emit(LOAD_CONSTANT, code.constant(None))
+    code.emit(RETURN_VALUE)
+    return code
+
+
+def compiled_body(function):
+    entry = bodies.get(id(function))
+    if entry is None or entry[0] is not function:
+        entry = bodies[id(function)] = (function, compile_body(function))
+    return entry[1]
+
+
+def emit(ast, code, discard):
+    """Compiles ast into code, leaving its value on the stack unless discard."""
+    emitters[ast.opcode](ast, code, discard)
+    if discard and ast.opcode not in statement_opcodes:
+        code.emit(POP)
+
+
+def emit_number(ast, code, discard):
+    assert type(ast.value) in [
+        float,
+        int,
+    ], f"unexpected type {type(ast.value)}"
+    code.emit(LOAD_CONSTANT, code.constant(ast.value))
+
+
+def emit_string(ast, code, discard):
+    assert type(ast.value) == str, f"unexpected type {type(ast.value)}"
+    code.emit(LOAD_CONSTANT, code.constant(ast.value))
+
+
+def emit_identifier(ast, code, discard):
+    code.emit(LOAD_NAME, code.name(ast.value))
+
+
+def emit_list(ast, code, discard):
+    for item in ast.items:
+        emit(item, code, False)
+    code.emit(BUILD_LIST, len(ast.items))
+
+
+def emit_constant(ast, code, discard):
+    # a new list or object on every evaluation, as the literal would give
+    code.emit(COPY_CONSTANT, code.constant(ast))
+
+
+def emit_object(ast, code, discard):
+    for item in ast.items:
+        emit(item.key, code, False)
+        emit(item.value, code, False)
+    code.emit(BUILD_OBJECT, len(ast.items))
+
+
+def emit_operation(instruction, right, code):
+    """Emits a binary instruction after its left operand. A right operand
+    that is a constant or a name goes in the argument, saving an instruction:
+    constant n as n + 1, name n as -1 - n, and 0 for the stack."""
+    if right.opcode in (NUMBER, STRING):
+        emitters[right.opcode](right, code, False)
+        # take back the LOAD_CONSTANT, keeping its constant
+        argument = code.instructions.pop()
+        code.instructions.pop()
+        code.emit(instruction, argument + 1)
+    elif right.opcode == IDENTIFIER:
+        code.emit(instruction, -1 - code.name(right.value))
+    else:
+        emit(right, code, False)
+        code.emit(instruction)
+
+
+def emit_binary(ast, code, discard):
+    emit(ast.left, code, False)
+    emit_operation(binary_instructions[ast.opcode], ast.right, code)
+
+
+def emit_chain(ast, code, discard):
+    # all operands are computed, left to right, even for && and ||, as evaluate does
+    instruction = chain_instructions[ast.operator]
+    operands = ast.operands
+    emit(operands[0], code, False)
+    for operand in operands[1:]:
+        emit_operation(instruction, operand, code)
+
+
+def emit_negate(ast, code, discard):
+    emit(ast.value, code, False)
+    code.emit(UNARY_NEGATE)
+
+
+def emit_logical_not(ast, code, discard):
+    emit(ast.value, code, False)
+    code.emit(UNARY_NOT)
+
+
+def emit_function(ast, code, discard):
+    code.emit(LOAD_CONSTANT, code.constant(ast))
+
+
+def emit_call(ast, code, discard):
+    emit(ast.function, code, False)
+    for argument in ast.arguments:
+        emit(argument, code, False)
+    code.emit(CALL_FUNCTION, len(ast.arguments))
+
+
+def emit_complex(ast, code, discard):
+    # evaluate prints the node before it evaluates either part
+    code.emit(TRACE, code.constant(ast))
+    emit(ast.base, code, False)
+    emit(ast.index, code, False)
+    code.emit(INDEX)
+
+
+def emit_print(ast, code, discard):
+    if ast.value:
+        emit(ast.value, code, False)
+        code.emit(PRINT_VALUE, 0 if discard else 1)
+    else:
+        code.emit(PRINT_EMPTY, 0 if discard else 1)
+
+
+def emit_none(code, discard):
+    if not discard:
+        code.emit(LOAD_CONSTANT, code.constant(None))
+
+
+def emit_if(ast, code, discard):
+    emit(ast.condition, code, False)
+    to_else = code.emit(JUMP_IF_FALSE)
+    emit(ast.then, code, True)
+    if "else" in ast:
+        to_end = code.emit(JUMP)
+        code.patch(to_else)
+        emit(ast.else_, code, True)
+        code.patch(to_end)
+    else:
+        code.patch(to_else)
+    emit_none(code, discard)
+
+
+def emit_while(ast, code, discard):
+    start = len(code.instructions)
+    emit(ast.condition, code, False)
+    to_end = code.emit(JUMP_IF_FALSE)
+    emit(ast.do, code, True)
+    code.emit(JUMP, start)
+    code.patch(to_end)
+    emit_none(code, discard)
+
+
+def emit_statements(ast, code, discard):
+    # statement lists are bodies, whose value nothing uses
+    for statement in ast.statements:
+        emit(statement, code, True)
+    emit_none(code, discard)
+
+
+def emit_return(ast, code, discard):
+    if "value" in ast:
+        emit(ast.value, code, False)
+    else:
+        code.emit(LOAD_CONSTANT, code.constant(None))
+    code.emit(RETURN_VALUE)
+
+
+def emit_assign(ast, code, discard):
+    assert "target" in ast
+    target = ast.target
+    if target.opcode == IDENTIFIER:
+        emit(ast.value, code, False)
+        code.emit(STORE_NAME, code.name(target.value))
+    elif target.opcode == COMPLEX:
+        emit(target.base, code, False)
+        code.emit(TARGET_BASE)
+        emit(target.index, code, False)
+        code.emit(TARGET_INDEX)
+        emit(ast.value, code, False)
+        code.emit(STORE_INDEX)
+    else:
+        assert False, f"Unknown target type in assignment. {target}"
+    emit_none(code, discard)
+
+
+def emit_unknown(ast, code, discard):
+    # evaluate fails only when it reaches the node, so the code does too
+    code.emit(FAIL, code.constant(f"Unknown tag [{ast.tag}] in AST"))
+
+
+emitters = [emit_unknown] * len(node_kinds)
+emitters[NUMBER] = emit_number
+emitters[STRING] = emit_string
+emitters[IDENTIFIER] = emit_identifier
+emitters[LIST] = emit_list
+emitters[CONSTANT] = emit_constant
+emitters[OBJECT] = emit_object
+emitters[NEGATE] = emit_negate
+emitters[LOGICAL_NOT] = emit_logical_not
+emitters[FUNCTION] = emit_function
+emitters[COMPLEX] = emit_complex
+emitters[CALL] = emit_call
+for opcode in binary_instructions:
+    emitters[opcode] = emit_binary
+emitters[CHAIN] = emit_chain
+emitters[STATEMENT_LIST] = emit_statements
+emitters[PROGRAM] = emit_statements
+emitters[IF] = emit_if
+emitters[WHILE] = emit_while
+emitters[RETURN] = emit_return
+emitters[PRINT] = emit_print
+emitters[ASSIGN] = emit_assign
+
+
+def run(ast, environment):
+    """Compiles a tree and runs it, as evaluate(ast, environment) would."""
+    try:
+        return execute(compile_tree(ast), environment)
+    finally:
+        # functions outlive the run in the environment, their bodies need not
+        bodies.clear()
+
+
+def execute(code, environment):
+    """Runs compiled code and returns (value, return_chain)."""
+    instructions = code.instructions
+    constants = code.constants
+    names = code.names
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    # the frames of the calls in progress: (instructions, constants, names, position, environment)
+    frames = []
+    position = 0
+    while True:
+        opcode = instructions[position]
+        argument = instructions[position + 1]
+        position += 2
+        if opcode == LOAD_NAME:
+            identifier = names[argument]
+            scope = environment
+            while identifier not in scope:
+                assert "$parent" in scope, f"Unknown identifier: '{identifier}'."
+                scope = scope["$parent"]
+            push(scope[identifier])
+        elif opcode == LOAD_CONSTANT:
+            push(constants[argument])
+        elif opcode == STORE_NAME:
+            environment[names[argument]] = pop()
+        elif opcode == JUMP_IF_FALSE:
+            if not pop():
+                position = argument
+        elif opcode == JUMP:
+            position = argument
+        elif BINARY_ADD <= opcode <= LOGICAL_OR:
+            # the right operand is on the stack, or named by the argument
+            if argument == 0:
+                right = pop()
+            elif argument > 0:
+                right = constants[argument - 1]
+            else:
+                identifier = names[-1 - argument]
+                scope = environment
+                while identifier not in scope:
+                    assert "$parent" in scope, f"Unknown identifier: '{identifier}'."
+                    scope = scope["$parent"]
+                right = scope[identifier]
+            if opcode == BINARY_ADD:
+                stack[-1] = stack[-1] + right
+            elif opcode == BINARY_SUBTRACT:
+                stack[-1] = stack[-1] - right
+            elif opcode == COMPARE_LESS:
+                stack[-1] = stack[-1] < right
+            elif opcode == BINARY_MULTIPLY:
+                stack[-1] = stack[-1] * right
+            elif opcode == BINARY_DIVIDE:
+                assert right != 0, "Division by zero"
+                stack[-1] = stack[-1] / right
+            elif opcode == COMPARE_GREATER:
+                stack[-1] = stack[-1] > right
+            elif opcode == COMPARE_EQUAL:
+                stack[-1] = stack[-1] == right
+            elif opcode == COMPARE_NOT_EQUAL:
+                stack[-1] = stack[-1] != right
+            elif opcode == COMPARE_LESS_EQUAL:
+                stack[-1] = stack[-1] <= right
+            elif opcode == COMPARE_GREATER_EQUAL:
+                stack[-1] = stack[-1] >= right
+            elif opcode == LOGICAL_AND:
+                stack[-1] = stack[-1] and right
+            else:
+                stack[-1] = stack[-1] or right
+        elif opcode == POP:
+            pop()
+        elif opcode == CALL_FUNCTION:
+            arguments = stack[len(stack) - argument :]
+            del stack[len(stack) - argument :]
+            function = pop()
+            local_environment = {}
+            for parameter, value in zip(function.parameters, arguments):
+                local_environment[parameter.value] = value
+            local_environment["$parent"] = environment
+            frames.append((instructions, constants, names, position, environment))
+            body = compiled_body(function)
+            instructions = body.instructions
+            constants = body.constants
+            names = body.names
+            position = 0
+            environment = local_environment
+        elif opcode == RETURN_VALUE:
+            if not frames:
+                # a return outside any function ends the program
+                return pop(), True
+            # the value stays on the stack, where the caller expects it
+            instructions, constants, names, position, environment = frames.pop()
+        elif opcode == END:
+            return pop(), False
+        elif opcode == UNARY_NEGATE:
+            stack[-1] = -stack[-1]
+        elif opcode == UNARY_NOT:
+            stack[-1] = not stack[-1]
+        elif opcode == BUILD_LIST:
+            items = stack[len(stack) - argument :]
+            del stack[len(stack) - argument :]
+            push(items)
+        elif opcode == BUILD_OBJECT:
+            items = stack[len(stack) - 2 * argument :]
+            del stack[len(stack) - 2 * argument :]
+            object = {}
+            for i in range(0, len(items), 2):
+                assert type(items[i]) is str, "Object key must be a string"
+                object[items[i]] = items[i + 1]
+            push(object)
+        elif opcode == COPY_CONSTANT:
+            push(constants[argument].copy())
+        elif opcode == PRINT_VALUE:
+            value = pop()
+            print(value)
+            if argument:
+                push(str(value) + "\n")
+        elif opcode == PRINT_EMPTY:
+            print()
+            if argument:
+                push("\n")
+        elif opcode == TRACE:
+            print(constants[argument])
+        elif opcode == INDEX:
+            index = pop()
+            base = stack[-1]
+            if index == None:
+                continue
+            if type(index) in [int, float]:
+                assert int(index) == index
+                assert type(base) == list
+                assert len(base) > index
+                stack[-1] = base[index]
+            elif type(index) == str:
+                assert type(base) == dict
+                stack[-1] = base[index]
+            else:
+                assert False, f"Unknown index type [{index}]"
+        elif opcode == TARGET_BASE:
+            print(f"Target Base = {[stack[-1]]}")
+        elif opcode == TARGET_INDEX:
+            index = stack[-1]
+            base = stack[-2]
+            print(f"Target Index = {[index]}")
+            assert type(index) in [int, float, str], f"Unknown index type [{index}]"
+            if type(index) in [int, float]:
+                assert int(index) == index
+                assert type(base) == list
+                assert len(base) > index
+            if type(index) in [str]:
+                assert type(base) == dict
+        elif opcode == STORE_INDEX:
+            value = pop()
+            index = pop()
+            base = pop()
+            base[index] = value
+        elif opcode == FAIL:
+            assert False, constants[argument]
+        else:
+            assert False, f"Unknown instruction [{opcode}]"
+
+
+def describe(value):
+    """A short form of a constant, for the disassembler."""
+    if hasattr(value, "opcode") and value.opcode == FUNCTION:
+        return "function(" + ", ".join(parameter.value for parameter in value.parameters) + ")"
+    text = repr(value)
+    return text if len(text) <= 40 else text[:37] + "..."
+
+
+def disassemble(code, title="program"):
+    """Lists the instructions of code, then those of the functions it defines."""
+    lines = [f"{title}:"]
+    functions = []
+    instructions = code.instructions
+    for position in range(0, len(instructions), 2):
+        opcode, argument = instructions[position], instructions[position + 1]
+        line = f"{position:6}  {instruction_names[opcode]:22}"
+        if opcode in constant_arguments:
+            line += f"{argument:4}  ({describe(code.constants[argument])})"
+        elif opcode in name_arguments:
+            line += f"{argument:4}  ({code.names[argument]})"
+        elif BINARY_ADD <= opcode <= LOGICAL_OR and argument > 0:
+            line += f"{argument:4}  ({describe(code.constants[argument - 1])})"
+        elif BINARY_ADD <= opcode <= LOGICAL_OR and argument < 0:
+            line += f"{argument:4}  ({code.names[-1 - argument]})"
+        elif opcode in (JUMP, JUMP_IF_FALSE, CALL_FUNCTION, BUILD_LIST, BUILD_OBJECT, PRINT_VALUE, PRINT_EMPTY):
+            line += f"{argument:4}"
+        lines.append(line.rstrip())
+    for index, constant in enumerate(code.constants):
+        if hasattr(constant, "opcode") and constant.opcode == FUNCTION:
+            functions.append((index, constant))
+    for index, function in functions:
+        lines.append("")
+        lines.append(disassemble(compiled_body(function), f"{title} constant {index}, {describe(function)}"))
+    return "\n".join(lines)
+
+
+def test_run_deep_recursion():
+    print("test vm run deep recursion")
+    # deeper than Python's recursion limit; evaluate would fail here
+    environment = {}
+    run(parse(tokenize("function down(n) { if (n == 0) { return 0 }; return down(n - 1) + 1 }; x = down(3000)")), environment)
+    assert environment["x"] == 3000
+    assert not bodies, "compiled bodies are dropped when a run ends"
+
+
+def test_constant_pool():
+    print("test constant pool")
+    from optimizer import fold_constants
+
+    # 0.0 and -0.0 are equal, but each needs its own constant
+    environment = {}
+    run(fold_constants(parse(tokenize("x = 0.0; y = -0.0")))[0], environment)
+    assert str(environment["x"]) == "0.0" and str(environment["y"]) == "-0.0"
+
+
+def test_disassemble():
+    print("test disassemble")
+    code = compile_tree(parse(tokenize("i = 0; while (i < 3) { i = i + 1 }; f = function(a) { return a }; f(i)")))
+    text = disassemble(code)
+    assert text.splitlines()[:10] == [
+        "program:",
+        "     0  LOAD_CONSTANT            0  (0)",
+        "     2  STORE_NAME               0  (i)",
+        "     4  LOAD_NAME                0  (i)",
+        "     6  COMPARE_LESS             2  (3)",
+        "     8  JUMP_IF_FALSE           18",
+        "    10  LOAD_NAME                0  (i)",
+        "    12  BINARY_ADD               3  (1)",
+        "    14  STORE_NAME               0  (i)",
+        "    16  JUMP                     4",
+    ], text
+    code = compile_tree(parse(tokenize("x + y * (1 + z)")))
+    assert disassemble(code).splitlines()[1:] == [
+        "     0  LOAD_NAME                0  (x)",
+        "     2  LOAD_NAME                1  (y)",
+        "     4  LOAD_CONSTANT            0  (1)",
+        "     6  BINARY_ADD              -3  (z)",
+        "     8  BINARY_MULTIPLY",
+        "    10  BINARY_ADD",
+        "    12  END",
+    ]
+    assert "program constant 3, function(a):" in text
+    assert "RETURN_VALUE" in text
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # python vm.py FILE lists the code compiled from FILE
+        with open(sys.argv[1]) as f:
+            print(disassemble(compile_tree(parse(tokenize(f.read())))))
+    else:
+        test_run_deep_recursion()
+        test_constant_pool()
+        test_disassemble()
+        print("done.")